@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
+from lib.result_io import read_result_summary
+
 console = Console()
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -22,12 +23,12 @@ STRATEGY_DIRS = {
 
 
 def _load_strategy(path: Path) -> dict | None:
-    """Load a strategy JSON file."""
+    """Load a strategy JSON file's summary (never its trade log sidecar)."""
     try:
-        with open(path) as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
+        data = read_result_summary(path)
+    except (ValueError, OSError):
         return None
+    return data if isinstance(data, dict) else None
 
 
 def _extract_metrics(data: dict) -> dict:
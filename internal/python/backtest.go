@@ -19,6 +19,37 @@ type BacktestResult struct {
 	OOSDecay     float64 `json:"oos_decay"`
 	TotalReturn  float64 `json:"total_return"`
 	AvgTrade     float64 `json:"avg_trade_pnl"`
+
+	// Timings is only present when the run was started with Profile set.
+	Timings *BacktestTimings `json:"timings,omitempty"`
+}
+
+// StageTiming is the cost of one backtest stage (load_data, indicators,
+// signals, simulate_trades, metrics, serialize, ...).
+type StageTiming struct {
+	WallSeconds float64 `json:"wall_s"`
+	CPUSeconds  float64 `json:"cpu_s"`
+	PeakRSSMB   float64 `json:"peak_rss_mb"`
+	Rows        int     `json:"rows,omitempty"`
+	RowsPerSec  float64 `json:"rows_per_sec,omitempty"`
+	Calls       int     `json:"calls,omitempty"`
+}
+
+// ProfileHotspot is one of the strategy functions with the most self time.
+type ProfileHotspot struct {
+	Function          string  `json:"function"`
+	Calls             int     `json:"calls"`
+	SelfSeconds       float64 `json:"self_s"`
+	CumulativeSeconds float64 `json:"cumulative_s"`
+}
+
+// BacktestTimings is the "timings" block written by --profile.
+type BacktestTimings struct {
+	Stages       map[string]StageTiming `json:"stages"`
+	TotalWallSec float64                `json:"total_wall_s"`
+	PeakRSSMB    float64                `json:"peak_rss_mb"`
+	Hotspots     []ProfileHotspot       `json:"hotspots,omitempty"`
+	ProfileDump  string                 `json:"profile_dump,omitempty"`
 }
 
 // BacktestOptions configures a single backtest invocation.
@@ -28,6 +59,7 @@ type BacktestOptions struct {
 	CostModel    string // path to cost model config (JSON)
 	DateRange    string // optional date range filter, e.g. "2022-01-01:2024-01-01"
 	WalkForward  bool   // enable walk-forward validation
+	Profile      bool   // record per-stage timings in BacktestResult.Timings
 }
 
 // backtestTimeout is the maximum time allowed for a single backtest run.
@@ -56,6 +88,10 @@ func (r *Runner) RunBacktest(ctx context.Context, opts BacktestOptions) (*Backte
 		args = append(args, "--walk-forward")
 	}
 
+	if opts.Profile {
+		args = append(args, "--profile")
+	}
+
 	// Invoke the backtest runner script.
 	out, err := r.Exec(ctx, "lib/backtest_runner.py", args...)
 	if err != nil {
@@ -18,26 +18,156 @@ Walk-forward mode::
     python lib/backtest_runner.py \
       --strategy path/to/strategy.py \
       --data path/to/data.csv \
-      --walk-forward '{"train_bars": 10000, "test_bars": 2000, "step_bars": 2000}' \
+      --walk-forward '{"train_bars": 10000, "test_bars": 2000, "step_bars": 2000, "warmup_bars": 200}' \
+      --strict \
+      --jobs 8 --fold-stream folds.ndjson \
       --cost-model '{"type": "futures", "commission_per_side": 2.50, "slippage_ticks": 0.5, "tick_value": 12.50}' \
       --output wfo_results.json
+
+Parameter sweep mode (data and strategy are loaded once, combos run in a
+process pool, finished combos stream to a JSONL file for resuming)::
+
+    python lib/backtest_runner.py \
+      --strategy path/to/strategy.py \
+      --data path/to/data.csv \
+      --param-grid '{"fast_period": [5, 10, 20], "slow_period": [30, 50]}' \
+      --workers 8 \
+      --sweep-results sweep.jsonl \
+      --indicator-cache-mb 256 --indicator-cache-dir output/indicator_cache \
+      --output sweep_results.json
+
+Chunked mode for data larger than memory (same results as the default
+in-memory path for strategies that declare ``warmup_bars``)::
+
+    python lib/backtest_runner.py \
+      --strategy path/to/strategy.py \
+      --data path/to/BTC_1s_2018_2025.csv \
+      --chunk-bars 1000000 \
+      --output results.json
+
+Incremental mode (after appending bars to the CSV, only the new bars are
+run; the checkpoint holds the simulator, indicator look-back and metric
+inputs)::
+
+    python lib/backtest_runner.py \
+      --strategy path/to/strategy.py \
+      --data path/to/data.csv \
+      --checkpoint output/checkpoints/strategy.ckpt \
+      --output results.json
+
+Profiling (adds a ``timings`` block with wall/CPU time, peak RSS and rows per
+stage; ``--profile-dump`` also writes a pstats file of the strategy code)::
+
+    python lib/backtest_runner.py \
+      --strategy path/to/strategy.py \
+      --data path/to/data.csv \
+      --profile --profile-dump output/profiles/strategy.pstats
+
+Monte Carlo robustness (resamples the trade PnL into many paths; the
+percentiles land under ``monte_carlo`` and feed the ``mc_*`` flags)::
+
+    python lib/backtest_runner.py \
+      --strategy path/to/strategy.py \
+      --data path/to/data.csv \
+      --monte-carlo 10000 --mc-method bootstrap
+
+Prop-firm validation (the trades go straight into the prop-firm rules,
+exits attributed to trading days by ``--session``; the report lands under
+``prop_firm``, Monte Carlo pass odds with ``--prop-firm-mc``)::
+
+    python lib/backtest_runner.py \
+      --strategy path/to/strategy.py \
+      --data path/to/data.csv \
+      --session CME \
+      --cost-model '{"type": "futures", "point_value": 50}' \
+      --prop-firm --prop-firm-account-sizes 50000,100000 --prop-firm-mc 10000
+
+Portfolio mode (one strategy on several symbols in parallel; equity is
+aligned on the union of their timestamps)::
+
+    python lib/backtest_runner.py \
+      --strategy path/to/strategy.py \
+      --portfolio ES=data/ES_5min.csv NQ=data/NQ_5min.csv BTCUSDT=data/BTCUSDT_5min.csv \
+      --cost-model '{"type": "futures", "point_value": 50}' \
+      --symbol-cost-models '{"NQ": {"type": "futures", "tick_value": 5.0, "tick_size": 0.25},
+                             "BTCUSDT": {"type": "crypto_cex"}}' \
+      --output portfolio.json
+
+Batch mode (data loaded once, many strategy files run in parallel, one
+results JSON each plus a leaderboard)::
+
+    python lib/backtest_runner.py \
+      --strategies 'output/strategies/converted/*.py' \
+      --data path/to/data.csv \
+      --workers 8 \
+      --batch-dir output/backtests/batch \
+      --output leaderboard.json
 """
 
 from __future__ import annotations
 
 import argparse
+import contextlib
+import glob
 import importlib.util
+import itertools
 import json
 import logging
 import math
+import os
+import pickle
 import sys
-from dataclasses import asdict, dataclass, field
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, TextIO
 
 import numpy as np
 import pandas as pd
 
+if __package__ in (None, ""):
+    # Executed as ``python lib/backtest_runner.py``: make ``lib.*`` importable.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib.calendar_index import (  # noqa: E402
+    CalendarIndex,
+    Session,
+    TradeCalendar,
+    daily_ratios,
+    daily_returns,
+    day_ids,
+    distinct_days,
+    monthly_returns,
+    resolve_session,
+    weekly_returns,
+)
+from lib.data_cache import (  # noqa: E402
+    FileMark,
+    cached_rows,
+    extend_cached,
+    file_sha256,
+    load_cached,
+    mark_file,
+    read_appended,
+)
+from lib.indicator_cache import IndicatorCache, data_fingerprint  # noqa: E402
+from lib.monte_carlo import MONTE_CARLO_METHODS, MonteCarloConfig, MonteCarloSummary, run_monte_carlo  # noqa: E402
+from lib.portfolio import SymbolEquity, mark_to_market, portfolio_report, timestamps_ns  # noqa: E402
+from lib.profiling import StageTimer, optional_stage  # noqa: E402
+from lib.prop_firm import (  # noqa: E402
+    DEFAULT_ACCOUNT_SIZES,
+    DEFAULT_RULES_FILE,
+    PassProbabilityConfig,
+    PropFirmConfig,
+    TradeSeries,
+    load_compiled_rules,
+    validate_prop_firms,
+)
+from lib.result_io import OUTPUT_FORMATS, encode_result, write_encoded, write_result  # noqa: E402
+from lib.shared_data import SharedFrameHandle, attach_frame, share_frame  # noqa: E402
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -101,17 +231,52 @@ def compute_round_trip_cost(cost_model: dict, notional: float) -> float:
     raise ValueError(f"Unknown cost model type: {cm_type}")
 
 
+PROP_FIRM_POINT_VALUE_ERROR = (
+    'Prop-firm limits are in dollars: set "point_value" (or "tick_value" and "tick_size") '
+    "in the cost model so trade PnL can be converted"
+)
+
+
+def point_value(cost_model: dict) -> float | None:
+    """Dollar value of a one-point price move for one contract or unit.
+
+    Taken from ``point_value`` or, failing that, ``tick_value / tick_size``.
+    Crypto models trade one unit of a dollar-quoted asset, so they default to
+    1.0. Futures have no sensible default (the bundled ``tick_value`` alone
+    does not say how many ticks make a point), so ``None`` is returned and
+    callers that need dollars must refuse to run.
+    """
+    if cost_model.get("point_value") is not None:
+        value = float(cost_model["point_value"])
+    elif cost_model.get("tick_size") is not None and "tick_value" in cost_model:
+        value = float(cost_model["tick_value"]) / float(cost_model["tick_size"])
+    elif cost_model.get("type", "futures") in ("crypto_cex", "crypto_dex"):
+        value = 1.0
+    else:
+        return None
+    if not math.isfinite(value) or value <= 0:
+        raise ValueError(f"Cost model point value must be positive, got {value}")
+    return value
+
+
+def pnl_in_dollars(trades: TradeBatch, cost_model: dict, multiplier: float) -> np.ndarray:
+    """Net trade PnL in dollars.
+
+    ``TradeBatch.pnl`` is the price move in points minus the round-trip cost
+    in dollars; the cost is added back, the move scaled by ``multiplier``
+    (see ``point_value``) and the cost taken off again.
+    """
+    rt_cost = compute_round_trip_cost(cost_model, np.abs(trades.entry_price))
+    return (trades.pnl + rt_cost) * multiplier - rt_cost
+
+
 # ---------------------------------------------------------------------------
 # Strategy loader
 # ---------------------------------------------------------------------------
 
 
-def load_strategy(strategy_path: str, params: dict | None = None) -> Any:
-    """Dynamically load a Strategy class from a Python file.
-
-    The file must define a ``Strategy`` class with ``indicators()``,
-    ``signals()``, and ``default_params()`` methods.
-    """
+def load_strategy_class(strategy_path: str) -> type:
+    """Execute a strategy file once and return its ``Strategy`` class."""
     path = Path(strategy_path).resolve()
     if not path.exists():
         raise FileNotFoundError(f"Strategy file not found: {path}")
@@ -128,7 +293,11 @@ def load_strategy(strategy_path: str, params: dict | None = None) -> Any:
             f"Strategy file {path} must define a 'Strategy' class"
         )
 
-    strategy_cls = module.Strategy
+    return module.Strategy
+
+
+def instantiate_strategy(strategy_cls: type, params: dict | None = None) -> Any:
+    """Create a strategy instance, falling back to its default params."""
     init_params = params if params is not None else {}
     try:
         strategy = strategy_cls(params=init_params) if init_params else strategy_cls()
@@ -144,21 +313,72 @@ def load_strategy(strategy_path: str, params: dict | None = None) -> Any:
     return strategy
 
 
+def attach_indicator_cache(strategy: Any, cache: IndicatorCache | None, strategy_path: str) -> Any:
+    """Expose ``cache`` to the strategy as ``strategy.indicator_cache``.
+
+    The strategy gets a view scoped to its resolved file path, so strategies
+    sharing one cache (a batch, or the disk tier across runs) never read
+    each other's columns. Strategies that do not look for the attribute are
+    unaffected.
+    """
+    if cache is not None:
+        strategy.indicator_cache = cache.scoped(str(Path(strategy_path).resolve()))
+    return strategy
+
+
+def load_strategy(strategy_path: str, params: dict | None = None) -> Any:
+    """Dynamically load a Strategy class from a Python file.
+
+    The file must define a ``Strategy`` class with ``indicators()``,
+    ``signals()``, and ``default_params()`` methods.
+    """
+    return instantiate_strategy(load_strategy_class(strategy_path), params)
+
+
 # ---------------------------------------------------------------------------
 # Data loading
 # ---------------------------------------------------------------------------
 
 
-def load_data(data_path: str, start_bar: int = 0, end_bar: int = -1) -> pd.DataFrame:
+def load_data(
+    data_path: str,
+    start_bar: int = 0,
+    end_bar: int = -1,
+    use_cache: bool = True,
+) -> pd.DataFrame:
     """Load OHLCV data from CSV.
 
     Auto-detects column naming conventions:
     - Standard: timestamp/datetime, open, high, low, close, volume
     - Databento: ts_event, open, high, low, close, volume
     - CCXT: timestamp, open, high, low, close, volume (unix ms)
+
+    With ``use_cache`` (the default) the normalized columns are stored once
+    in a memory-mapped binary cache (see ``lib/data_cache.py``) and later
+    loads read only the requested ``start_bar``/``end_bar`` slice.
     """
-    df = pd.read_csv(data_path)
+    if use_cache:
+        return load_cached(data_path, parse_csv, start_bar, end_bar)
+
+    df = parse_csv(data_path)
+
+    # Slice bars
+    if end_bar == -1:
+        df = df.iloc[start_bar:]
+    else:
+        df = df.iloc[start_bar:end_bar]
+
+    df = df.reset_index(drop=True)
+    return df
+
+
+def parse_csv(data_path: str | BinaryIO) -> pd.DataFrame:
+    """Read a CSV (path or binary stream) and normalize column names and timestamps (no slicing)."""
+    return normalize_ohlcv(pd.read_csv(data_path))
 
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize raw CSV columns (names, volume, timestamps) in place."""
     # Normalize column names to lowercase
     df.columns = [c.strip().lower() for c in df.columns]
 
@@ -194,13 +414,6 @@ def load_data(data_path: str, start_bar: int = 0, end_bar: int = -1) -> pd.DataF
         else:
             df["timestamp"] = pd.to_datetime(ts_col, utc=True)
 
-    # Slice bars
-    if end_bar == -1:
-        df = df.iloc[start_bar:]
-    else:
-        df = df.iloc[start_bar:end_bar]
-
-    df = df.reset_index(drop=True)
     return df
 
 
@@ -209,6 +422,11 @@ def load_data(data_path: str, start_bar: int = 0, end_bar: int = -1) -> pd.DataF
 # ---------------------------------------------------------------------------
 
 
+# Why a trade closed; ``TradeBatch.exit_reason`` holds the index.
+EXIT_REASONS = ("signal", "end_of_data", "stop", "target", "trail")
+EXIT_SIGNAL, EXIT_END, EXIT_STOP, EXIT_TARGET, EXIT_TRAIL = range(len(EXIT_REASONS))
+
+
 @dataclass
 class Trade:
     entry_bar: int
@@ -219,62 +437,431 @@ class Trade:
     pnl: float
     mfe: float  # max favorable excursion
     mae: float  # max adverse excursion (negative)
+    exit_reason: str = "signal"
+
+
+@dataclass
+class TradeBatch:
+    """Closed trades stored as parallel NumPy arrays (struct-of-arrays).
+
+    ``side`` is +1 for long and -1 for short and ``exit_reason`` an index
+    into ``EXIT_REASONS``. Metrics read the arrays directly; ``to_trades()`` and iteration give a ``list[Trade]`` view for
+    code that still expects per-trade objects.
+    """
+
+    entry_bar: np.ndarray
+    exit_bar: np.ndarray
+    side: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    pnl: np.ndarray
+    mfe: np.ndarray
+    mae: np.ndarray
+    exit_reason: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def __iter__(self) -> Iterator[Trade]:
+        return iter(self.to_trades())
+
+    @classmethod
+    def empty(cls) -> TradeBatch:
+        ints = np.empty(0, dtype=np.int64)
+        floats = np.empty(0, dtype=np.float64)
+        codes = np.empty(0, dtype=np.int8)
+        return cls(ints, ints, codes, floats, floats, floats, floats, floats, codes)
+
+    @classmethod
+    def from_trades(cls, trades: Sequence[Trade]) -> TradeBatch:
+        if not trades:
+            return cls.empty()
+        return cls(
+            entry_bar=np.array([t.entry_bar for t in trades], dtype=np.int64),
+            exit_bar=np.array([t.exit_bar for t in trades], dtype=np.int64),
+            side=np.array([1 if t.side == "long" else -1 for t in trades], dtype=np.int8),
+            entry_price=np.array([t.entry_price for t in trades], dtype=np.float64),
+            exit_price=np.array([t.exit_price for t in trades], dtype=np.float64),
+            pnl=np.array([t.pnl for t in trades], dtype=np.float64),
+            mfe=np.array([t.mfe for t in trades], dtype=np.float64),
+            mae=np.array([t.mae for t in trades], dtype=np.float64),
+            exit_reason=np.array([EXIT_REASONS.index(t.exit_reason) for t in trades], dtype=np.int8),
+        )
+
+    def to_trades(self) -> list[Trade]:
+        """Materialize the compatibility ``list[Trade]`` view."""
+        return [
+            Trade(
+                entry_bar=eb,
+                exit_bar=xb,
+                side="long" if sd == 1 else "short",
+                entry_price=ep,
+                exit_price=xp,
+                pnl=pnl,
+                mfe=fe,
+                mae=ae,
+                exit_reason=EXIT_REASONS[er],
+            )
+            for eb, xb, sd, ep, xp, pnl, fe, ae, er in zip(
+                self.entry_bar.tolist(),
+                self.exit_bar.tolist(),
+                self.side.tolist(),
+                self.entry_price.tolist(),
+                self.exit_price.tolist(),
+                self.pnl.tolist(),
+                self.mfe.tolist(),
+                self.mae.tolist(),
+                self.exit_reason.tolist(),
+            )
+        ]
+
+    def to_records(self) -> list[dict]:
+        """Build the rounded per-trade ``trade_log`` records."""
+        return [
+            {
+                "entry_bar": eb,
+                "exit_bar": xb,
+                "side": "long" if sd == 1 else "short",
+                "entry_price": round(ep, 4),
+                "exit_price": round(xp, 4),
+                "pnl": round(pnl, 2),
+                "mfe": round(fe, 2),
+                "mae": round(ae, 2),
+                "exit_reason": EXIT_REASONS[er],
+            }
+            for eb, xb, sd, ep, xp, pnl, fe, ae, er in zip(
+                self.entry_bar.tolist(),
+                self.exit_bar.tolist(),
+                self.side.tolist(),
+                self.entry_price.tolist(),
+                self.exit_price.tolist(),
+                self.pnl.tolist(),
+                self.mfe.tolist(),
+                self.mae.tolist(),
+                self.exit_reason.tolist(),
+            )
+        ]
+
+
+def as_trade_batch(trades: TradeBatch | Sequence[Trade]) -> TradeBatch:
+    """Accept either a ``TradeBatch`` or a legacy ``list[Trade]``."""
+    if isinstance(trades, TradeBatch):
+        return trades
+    return TradeBatch.from_trades(trades)
+
+
+SIMULATION_ENGINES = ("vectorized", "loop")
+
+# Optional per-bar exit levels a strategy may add next to ``signal``. Like the
+# signal, the row of the bar before entry applies to the whole trade; NaN
+# means no such exit.
+#   stop_price:   stop-loss price level
+#   target_price: take-profit price level
+#   trail:        trailing-stop distance (price units) from the best price
+#                 reached by the end of the previous bar (the entry open at first)
+BRACKET_COLUMNS = ("stop_price", "target_price", "trail")
+
+# How a bar whose range touches both the stop and the target is resolved,
+# set with the cost model's ``same_bar_exit`` key. The bar's path is unknown,
+# so the default assumes the stop filled first.
+SAME_BAR_RULES = ("stop_first", "target_first", "nearest_to_open")
+DEFAULT_SAME_BAR_RULE = "stop_first"
 
 
 def simulate_trades(
     df: pd.DataFrame,
     cost_model: dict,
-) -> list[Trade]:
-    """Vectorized trade simulation from signal column.
+    engine: str = "vectorized",
+) -> TradeBatch:
+    """Simulate trades from the signal column.
 
     Enters at next bar's open on signal change, exits on reversal.
     Tracks MFE and MAE for each trade.
+
+    When the frame has any of ``BRACKET_COLUMNS``, open trades also exit
+    intrabar: a stop (or trailing stop) fills at its level when a bar's low
+    (high, for shorts) reaches it, a target when the high (low) reaches it,
+    and either fills at the bar's open if the bar gaps through the level. A
+    trade closed this way stays closed until the signal changes again. Bars
+    touching both levels are resolved by ``cost_model["same_bar_exit"]``
+    (one of ``SAME_BAR_RULES``).
+
+    Args:
+        df: OHLCV dataframe with a ``signal`` column.
+        cost_model: Cost model dict.
+        engine: ``"vectorized"`` (default) for the NumPy event engine or
+            ``"loop"`` for the per-bar reference implementation. Both
+            produce identical trades.
+
+    Returns:
+        A ``TradeBatch``; call ``to_trades()`` for a ``list[Trade]`` view.
     """
     if "signal" not in df.columns:
         raise ValueError("DataFrame must have a 'signal' column after strategy.signals()")
 
+    if engine == "vectorized":
+        return _simulate_trades_vectorized(df, cost_model)
+    if engine == "loop":
+        return TradeBatch.from_trades(_simulate_trades_loop(df, cost_model))
+    raise ValueError(f"Unknown simulation engine: {engine} (expected one of {SIMULATION_ENGINES})")
+
+
+def _bracket_levels(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+    """``(stop_price, target_price, trail)`` as float arrays, or None without bracket columns."""
+    if not any(col in df.columns for col in BRACKET_COLUMNS):
+        return None
+    nan = np.full(len(df), np.nan)
+    stop, target, trail = (
+        df[col].to_numpy(dtype=np.float64) if col in df.columns else nan for col in BRACKET_COLUMNS
+    )
+    return stop, target, trail
+
+
+def _same_bar_rule(cost_model: dict) -> str:
+    rule = cost_model.get("same_bar_exit", DEFAULT_SAME_BAR_RULE)
+    if rule not in SAME_BAR_RULES:
+        raise ValueError(f"Unknown same_bar_exit rule: {rule} (expected one of {SAME_BAR_RULES})")
+    return rule
+
+
+def _resolve_bracket_hit(
+    stop_hit: np.ndarray,
+    target_hit: np.ndarray,
+    fav_open: np.ndarray,
+    stop_level: np.ndarray,
+    target: np.ndarray,
+    rule: str,
+) -> np.ndarray:
+    """Whether each hit bar exits at the stop (True) or the target (False).
+
+    Prices are in the trade's favourable direction (negated for shorts). A
+    bar opening beyond a level exits there first; otherwise ``rule`` breaks
+    bars that touch both.
+    """
+    if rule == "stop_first":
+        stop_first = np.ones(len(stop_hit), dtype=bool)
+    elif rule == "target_first":
+        stop_first = np.zeros(len(stop_hit), dtype=bool)
+    else:
+        stop_first = (fav_open - stop_level) <= (target - fav_open)
+    stop_first = np.where(fav_open <= stop_level, True, np.where(fav_open >= target, False, stop_first))
+    return stop_hit & (~target_hit | stop_first)
+
+
+def _bracket_exits(
+    opens: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    entries: np.ndarray,
+    segment_end: np.ndarray,
+    sides: np.ndarray,
+    levels: tuple[np.ndarray, np.ndarray, np.ndarray],
+    rule: str,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Find the first intrabar stop/target exit of each trade.
+
+    Scans bars ``[entry, segment_end)`` of the trades that have a level,
+    with all of them laid end to end in one array; prices are negated for
+    shorts so one set of long-side comparisons serves both sides.
+
+    Returns:
+        ``(trade_index, exit_bar, exit_price, reason)`` of the trades that
+        hit a level.
+    """
+    stop, target, trail = (level[entries - 1] for level in levels)
+    scanned = np.flatnonzero(~(np.isnan(stop) & np.isnan(target) & np.isnan(trail)))
+    empty = np.empty(0, dtype=np.int64)
+    if len(scanned) == 0:
+        return empty, empty, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int8)
+    stop, target, trail = stop[scanned], target[scanned], trail[scanned]
+
+    lengths = segment_end[scanned] - entries[scanned]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    seg = np.repeat(np.arange(len(scanned)), lengths)
+    bars = entries[scanned][seg] + np.arange(len(seg)) - starts[seg]
+
+    direction = np.where(sides[scanned] == 1, 1.0, -1.0)
+    d = direction[seg]
+    long_bar = d > 0
+    fav_open = d * opens[bars]
+    fav_high = np.where(long_bar, highs[bars], -lows[bars])
+    fav_low = np.where(long_bar, lows[bars], -highs[bars])
+
+    # Best price before each bar: the entry open, then the running max of
+    # the trade's earlier bars (NaN bars skipped).
+    running = pd.Series(np.where(np.isnan(fav_high), -np.inf, fav_high)).groupby(seg).cummax().to_numpy()
+    peak = np.empty(len(seg), dtype=np.float64)
+    peak[1:] = running[:-1]
+    peak[starts] = -np.inf
+    peak = np.maximum(peak, fav_open[starts][seg])
+
+    fav_stop = (direction * stop)[seg]
+    fav_target = (direction * target)[seg]
+    trail_level = peak - trail[seg]
+    stop_level = np.fmax(fav_stop, trail_level)
+
+    stop_hit = fav_low <= stop_level
+    target_hit = fav_high >= fav_target
+    positions = np.where(stop_hit | target_hit, np.arange(len(seg)), len(seg))
+    first = np.minimum.reduceat(positions, starts)
+    hit = first < len(seg)
+    trade_index = scanned[hit]
+    k = first[hit]
+
+    at_stop = _resolve_bracket_hit(stop_hit[k], target_hit[k], fav_open[k], stop_level[k], fav_target[k], rule)
+    fav_fill = np.where(
+        at_stop, np.minimum(fav_open[k], stop_level[k]), np.maximum(fav_open[k], fav_target[k])
+    )
+    trailing = np.isnan(fav_stop[k]) | (trail_level[k] > fav_stop[k])
+    reason = np.where(at_stop, np.where(trailing, EXIT_TRAIL, EXIT_STOP), EXIT_TARGET).astype(np.int8)
+    return trade_index, bars[k].astype(np.int64), d[k] * fav_fill, reason
+
+
+def _simulate_trades_vectorized(df: pd.DataFrame, cost_model: dict) -> TradeBatch:
+    """Event-driven NumPy simulation.
+
+    The position held during bar ``i`` is the signal of bar ``i - 1`` (bar 0
+    is always flat), so every position change is found by diffing the lagged
+    signal array. Only change events are touched; MFE/MAE come from segment
+    reductions over highs and lows. Bracket exits (see ``simulate_trades``)
+    only shorten a trade, so they are applied per trade afterwards.
+    """
+    signals = df["signal"].values
+    opens = df["open"].values
+    highs = df["high"].values
+    lows = df["low"].values
+    closes = df["close"].values
+    n = len(df)
+    levels = _bracket_levels(df)
+    rule = _same_bar_rule(cost_model) if levels is not None else DEFAULT_SAME_BAR_RULE
+
+    if n < 2:
+        return TradeBatch.empty()
+
+    position = np.empty(n, dtype=np.result_type(signals.dtype, np.int8))
+    position[0] = 0
+    position[1:] = signals[:-1]
+
+    events = np.flatnonzero(position[1:] != position[:-1]) + 1
+    entries = events[position[events] != 0]
+    if len(entries) == 0:
+        return TradeBatch.empty()
+
+    # Each position is closed by the next change event, or at the last bar's
+    # close if it is still open at the end of the data.
+    next_event = np.searchsorted(events, entries, side="right")
+    has_exit = next_event < len(events)
+    exit_bars = np.where(has_exit, events[np.minimum(next_event, len(events) - 1)], n - 1)
+
+    sides = position[entries]
+    is_long = sides == 1
+    entry_prices = opens[entries]
+    exit_prices = np.where(has_exit, opens[exit_bars], closes[-1])
+    exit_reason = np.where(has_exit, EXIT_SIGNAL, EXIT_END).astype(np.int8)
+
+    # Excursions cover [entry_bar, exit_bar) for signal exits and run through
+    # the final bar for positions closed at the end. fmax/fmin skip NaNs the
+    # same way the reference loop's max()/min() do.
+    segment_end = np.where(has_exit, exit_bars, n)
+
+    bracketed = np.empty(0, dtype=np.int64)
+    if levels is not None:
+        bracketed, hit_bars, hit_prices, hit_reasons = _bracket_exits(
+            opens, highs, lows, entries, segment_end, sides, levels, rule
+        )
+        exit_bars = exit_bars.copy()
+        exit_prices = exit_prices.astype(np.float64)
+        exit_bars[bracketed] = hit_bars
+        exit_prices[bracketed] = hit_prices
+        exit_reason[bracketed] = hit_reasons
+        # Intrabar exits count the bars before the exit bar plus the fill.
+        segment_end[bracketed] = hit_bars
+
+    raw_pnl = np.where(is_long, exit_prices - entry_prices, entry_prices - exit_prices)
+    rt_cost = compute_round_trip_cost(cost_model, np.abs(entry_prices))
+    net_pnl = raw_pnl - rt_cost
+
+    bounds = np.empty(2 * len(entries), dtype=np.intp)
+    bounds[0::2] = entries
+    bounds[1::2] = segment_end
+    if segment_end[-1] == n:
+        bounds = bounds[:-1]
+    seg_high = np.fmax.reduceat(highs, bounds)[0::2]
+    seg_low = np.fmin.reduceat(lows, bounds)[0::2]
+    if len(bracketed):
+        # reduceat returns the start element for empty ranges (exit on the entry bar).
+        empty_range = segment_end[bracketed] == entries[bracketed]
+        seg_high[bracketed] = np.fmax(np.where(empty_range, np.nan, seg_high[bracketed]), hit_prices)
+        seg_low[bracketed] = np.fmin(np.where(empty_range, np.nan, seg_low[bracketed]), hit_prices)
+
+    mfe = np.fmax(np.where(is_long, seg_high - entry_prices, entry_prices - seg_low), 0.0)
+    mae = np.fmin(np.where(is_long, seg_low - entry_prices, entry_prices - seg_high), 0.0)
+
+    return TradeBatch(
+        entry_bar=entries.astype(np.int64),
+        exit_bar=exit_bars.astype(np.int64),
+        side=np.where(is_long, 1, -1).astype(np.int8),
+        entry_price=entry_prices.astype(np.float64),
+        exit_price=exit_prices.astype(np.float64),
+        pnl=net_pnl.astype(np.float64),
+        mfe=mfe.astype(np.float64),
+        mae=mae.astype(np.float64),
+        exit_reason=exit_reason,
+    )
+
+
+def _simulate_trades_loop(df: pd.DataFrame, cost_model: dict) -> list[Trade]:
+    """Per-bar reference simulation, kept as the oracle for the vectorized engine."""
     signals = df["signal"].values
     opens = df["open"].values
     highs = df["high"].values
     lows = df["low"].values
     closes = df["close"].values
+    levels = _bracket_levels(df)
+    rule = _same_bar_rule(cost_model) if levels is not None else DEFAULT_SAME_BAR_RULE
 
     trades: list[Trade] = []
     n = len(df)
 
+    held = 0  # lagged signal; a bracket exit goes flat until it changes
     position = 0  # 0=flat, 1=long, -1=short
     entry_bar = 0
     entry_price = 0.0
     running_mfe = 0.0
     running_mae = 0.0
+    stop = target = trail = peak = math.nan
+
+    def close(exit_bar: int, exit_price: float, reason: str) -> None:
+        if position == 1:
+            raw_pnl = exit_price - entry_price
+        else:
+            raw_pnl = entry_price - exit_price
+
+        notional = abs(entry_price)
+        rt_cost = compute_round_trip_cost(cost_model, notional)
+        net_pnl = raw_pnl - rt_cost
+
+        trades.append(Trade(
+            entry_bar=entry_bar,
+            exit_bar=exit_bar,
+            side="long" if position == 1 else "short",
+            entry_price=entry_price,
+            exit_price=exit_price,
+            pnl=net_pnl,
+            mfe=running_mfe,
+            mae=running_mae,
+            exit_reason=reason,
+        ))
 
     for i in range(1, n):
         sig = signals[i - 1]  # signal from previous bar determines action on this bar
 
         # Check for signal change
-        if sig != position:
+        if sig != held:
+            held = sig
             # Close existing position
             if position != 0:
-                exit_price = opens[i]
-                if position == 1:
-                    raw_pnl = exit_price - entry_price
-                else:
-                    raw_pnl = entry_price - exit_price
-
-                notional = abs(entry_price)
-                rt_cost = compute_round_trip_cost(cost_model, notional)
-                net_pnl = raw_pnl - rt_cost
-
-                trades.append(Trade(
-                    entry_bar=entry_bar,
-                    exit_bar=i,
-                    side="long" if position == 1 else "short",
-                    entry_price=entry_price,
-                    exit_price=exit_price,
-                    pnl=net_pnl,
-                    mfe=running_mfe,
-                    mae=running_mae,
-                ))
+                close(i, opens[i], "signal")
 
             # Open new position
             if sig != 0:
@@ -283,9 +870,49 @@ def simulate_trades(
                 entry_price = opens[i]
                 running_mfe = 0.0
                 running_mae = 0.0
+                if levels is not None:
+                    # Levels in the trade's favourable direction (negated for shorts).
+                    stop, target = position * levels[0][i - 1], position * levels[1][i - 1]
+                    trail = levels[2][i - 1]
+                    peak = position * entry_price
             else:
                 position = 0
 
+        # Intrabar stop / target
+        if position != 0 and levels is not None:
+            fav_open = position * opens[i]
+            fav_high = highs[i] if position == 1 else -lows[i]
+            fav_low = lows[i] if position == 1 else -highs[i]
+            trail_level = peak - trail
+            stop_level = np.fmax(stop, trail_level)
+            stop_hit = bool(fav_low <= stop_level)
+            target_hit = bool(fav_high >= target)
+            if stop_hit or target_hit:
+                if stop_hit and target_hit:
+                    if fav_open <= stop_level:
+                        at_stop = True
+                    elif fav_open >= target:
+                        at_stop = False
+                    elif rule == "nearest_to_open":
+                        at_stop = bool(fav_open - stop_level <= target - fav_open)
+                    else:
+                        at_stop = rule == "stop_first"
+                else:
+                    at_stop = stop_hit
+                if at_stop:
+                    fill = min(fav_open, stop_level)
+                    reason = "trail" if math.isnan(stop) or trail_level > stop else "stop"
+                else:
+                    fill = max(fav_open, target)
+                    reason = "target"
+                exit_price = position * fill
+                excursion = exit_price - entry_price if position == 1 else entry_price - exit_price
+                running_mfe = max(running_mfe, excursion)
+                running_mae = min(running_mae, excursion)
+                close(i, exit_price, reason)
+                position = 0
+                continue
+
         # Update MFE / MAE for open position
         if position != 0:
             if position == 1:
@@ -297,29 +924,12 @@ def simulate_trades(
 
             running_mfe = max(running_mfe, excursion_high)
             running_mae = min(running_mae, excursion_low)
+            if levels is not None and not math.isnan(fav_high):
+                peak = max(peak, fav_high)
 
     # Close any open position at the last bar's close
     if position != 0:
-        exit_price = closes[-1]
-        if position == 1:
-            raw_pnl = exit_price - entry_price
-        else:
-            raw_pnl = entry_price - exit_price
-
-        notional = abs(entry_price)
-        rt_cost = compute_round_trip_cost(cost_model, notional)
-        net_pnl = raw_pnl - rt_cost
-
-        trades.append(Trade(
-            entry_bar=entry_bar,
-            exit_bar=n - 1,
-            side="long" if position == 1 else "short",
-            entry_price=entry_price,
-            exit_price=exit_price,
-            pnl=net_pnl,
-            mfe=running_mfe,
-            mae=running_mae,
-        ))
+        close(n - 1, closes[-1], "end_of_data")
 
     return trades
 
@@ -345,16 +955,26 @@ class BacktestMetrics:
     avg_holding_bars: float = 0.0
     expectancy: float = 0.0
     calmar_ratio: float = 0.0
+    daily_sharpe_ratio: float = 0.0
+    daily_sortino_ratio: float = 0.0
 
 
-def compute_metrics(trades: list[Trade]) -> BacktestMetrics:
-    """Compute performance metrics from a list of trades."""
-    if not trades:
+def compute_metrics(
+    trades: TradeBatch | Sequence[Trade], calendar: TradeCalendar | None = None
+) -> BacktestMetrics:
+    """Compute performance metrics from a trade batch (or list of trades).
+
+    ``sharpe_ratio`` is per trade. With ``calendar`` (the trading days of
+    the tested bars and of each exit), the time-based daily Sharpe and
+    Sortino ratios are filled in as well.
+    """
+    batch = as_trade_batch(trades)
+    if len(batch) == 0:
         return BacktestMetrics()
 
-    pnls = np.array([t.pnl for t in trades])
+    pnls = batch.pnl
     total_pnl = float(pnls.sum())
-    total_trades = len(trades)
+    total_trades = len(batch)
 
     winners = pnls[pnls > 0]
     losers = pnls[pnls < 0]
@@ -382,23 +1002,21 @@ def compute_metrics(trades: list[Trade]) -> BacktestMetrics:
     peak = float(running_max.max()) if len(running_max) > 0 else 0.0
     max_dd_pct = max_dd_dollars / peak if peak > 0 else 0.0
 
-    # Max consecutive losses
-    max_consec = 0
-    current_consec = 0
-    for p in pnls:
-        if p < 0:
-            current_consec += 1
-            max_consec = max(max_consec, current_consec)
-        else:
-            current_consec = 0
+    # Max consecutive losses (longest run of losing trades)
+    losing = np.concatenate(([0], (pnls < 0).view(np.int8), [0]))
+    run_edges = np.flatnonzero(np.diff(losing))
+    max_consec = int((run_edges[1::2] - run_edges[0::2]).max()) if len(run_edges) else 0
 
     # Average holding period
-    holding_bars = [t.exit_bar - t.entry_bar for t in trades]
-    avg_holding = float(np.mean(holding_bars)) if holding_bars else 0.0
+    holding_bars = batch.exit_bar - batch.entry_bar
+    avg_holding = float(holding_bars.mean())
 
     # Calmar ratio (annual return / max drawdown)
     calmar = abs(total_pnl / max_dd_dollars) if max_dd_dollars > 0 else 0.0
 
+    # Daily-returns Sharpe/Sortino (days without exits count as flat)
+    daily_sharpe, daily_sortino = daily_ratios(calendar, pnls) if calendar is not None else (0.0, 0.0)
+
     return BacktestMetrics(
         total_pnl=round(total_pnl, 2),
         sharpe_ratio=round(sharpe_ratio, 4),
@@ -414,30 +1032,45 @@ def compute_metrics(trades: list[Trade]) -> BacktestMetrics:
         avg_holding_bars=round(avg_holding, 2),
         expectancy=round(avg_trade_pnl, 2),
         calmar_ratio=round(calmar, 4),
+        daily_sharpe_ratio=round(daily_sharpe, 4),
+        daily_sortino_ratio=round(daily_sortino, 4),
     )
 
 
 # ---------------------------------------------------------------------------
-# Monthly returns
+# Calendar attribution (monthly / weekly / daily)
 # ---------------------------------------------------------------------------
 
 
+def build_calendar(df: pd.DataFrame, session: Session | None = None) -> CalendarIndex | None:
+    """Trading-day index of ``df``'s bars, or ``None`` without timestamps."""
+    if "timestamp" not in df.columns:
+        return None
+    return CalendarIndex.from_timestamps(df["timestamp"], resolve_session(session))
+
+
 def compute_monthly_returns(
-    trades: list[Trade], df: pd.DataFrame
+    trades: TradeBatch | Sequence[Trade],
+    df: pd.DataFrame,
+    calendar: CalendarIndex | None = None,
 ) -> list[dict]:
-    """Compute monthly PnL from trades using the dataframe timestamps."""
-    if not trades or "timestamp" not in df.columns:
-        return []
+    """Compute monthly PnL from trades, attributed to the month of the exit bar.
 
-    monthly: dict[str, float] = {}
-    for t in trades:
-        # Use exit bar timestamp for month attribution
-        idx = min(t.exit_bar, len(df) - 1)
-        ts = df["timestamp"].iloc[idx]
-        key = ts.strftime("%Y-%m")
-        monthly[key] = monthly.get(key, 0.0) + t.pnl
-
-    return [{"month": k, "pnl": round(v, 2)} for k, v in sorted(monthly.items())]
+    Pass the dataset's ``CalendarIndex`` when calling this repeatedly on the
+    same bars; otherwise only the exit bars' timestamps are converted.
+    """
+    batch = as_trade_batch(trades)
+    if len(batch) == 0:
+        return []
+    if calendar is None:
+        if "timestamp" not in df.columns:
+            return []
+        idx = np.minimum(batch.exit_bar, len(df) - 1)
+        exit_days = day_ids(df["timestamp"].iloc[idx])
+        trade_calendar = TradeCalendar(resolve_session(None), distinct_days(exit_days), exit_days)
+    else:
+        trade_calendar = calendar.for_trades(batch.exit_bar)
+    return monthly_returns(trade_calendar, batch.pnl)
 
 
 # ---------------------------------------------------------------------------
@@ -446,24 +1079,36 @@ def compute_monthly_returns(
 
 
 def compute_equity_curve(
-    trades: list[Trade], total_bars: int, sample_every: int = 100
+    trades: TradeBatch | Sequence[Trade], total_bars: int, sample_every: int = 100
 ) -> list[dict]:
-    """Build a sampled equity curve from trade list."""
-    # Build bar-level PnL attribution
-    bar_pnl = np.zeros(total_bars)
-    for t in trades:
-        if t.exit_bar < total_bars:
-            bar_pnl[t.exit_bar] += t.pnl
-
-    equity = np.cumsum(bar_pnl)
-    points = []
-    for i in range(0, total_bars, sample_every):
-        points.append({"bar": int(i), "equity": round(float(equity[i]), 2)})
+    """Build a sampled equity curve from trade exits."""
+    batch = as_trade_batch(trades)
+
+    # PnL per exit bar (summed in trade order), then a running total over
+    # those bars only. Bars without exits add nothing, so this equals a
+    # per-bar cumsum while staying O(trades) instead of O(bars).
+    in_range = batch.exit_bar < total_bars
+    exit_bars, inverse = np.unique(batch.exit_bar[in_range], return_inverse=True)
+    equity_at_exits = np.cumsum(
+        np.bincount(inverse, weights=batch.pnl[in_range], minlength=len(exit_bars))
+    )
+
+    def equity_at(bars: np.ndarray) -> list[float]:
+        if len(exit_bars) == 0:
+            return [0.0] * len(bars)
+        last_exit = np.searchsorted(exit_bars, bars, side="right") - 1
+        return np.where(last_exit >= 0, equity_at_exits[np.maximum(last_exit, 0)], 0.0).tolist()
+
+    bars = list(range(0, total_bars, sample_every))
+    points = [
+        {"bar": i, "equity": round(v, 2)}
+        for i, v in zip(bars, equity_at(np.array(bars, dtype=np.int64)))
+    ]
     # Always include the last bar
     if total_bars > 0 and (total_bars - 1) % sample_every != 0:
         points.append({
             "bar": total_bars - 1,
-            "equity": round(float(equity[-1]), 2),
+            "equity": round(equity_at(np.array([total_bars - 1]))[0], 2),
         })
     return points
 
@@ -473,16 +1118,25 @@ def compute_equity_curve(
 # ---------------------------------------------------------------------------
 
 
+# Monte Carlo flags: the 5th-percentile resampled Sharpe is negative, or more
+# than this share of resampled paths reach the ruin drawdown.
+MC_RUIN_PROBABILITY_LIMIT = 0.05
+
+
 @dataclass
 class AntiOverfitFlags:
     sharpe_above_3: bool = False
     win_rate_above_80: bool = False
     trades_below_100: bool = False
     no_losing_months: bool = False
+    mc_sharpe_p5_negative: bool = False
+    mc_ruin_risk: bool = False
 
 
 def check_overfit_flags(
-    metrics: BacktestMetrics, monthly_returns: list[dict]
+    metrics: BacktestMetrics,
+    monthly_returns: list[dict],
+    monte_carlo: MonteCarloSummary | None = None,
 ) -> AntiOverfitFlags:
     flags = AntiOverfitFlags()
     flags.sharpe_above_3 = metrics.sharpe_ratio > 3.0
@@ -491,6 +1145,9 @@ def check_overfit_flags(
     if monthly_returns:
         losing_months = sum(1 for m in monthly_returns if m["pnl"] < 0)
         flags.no_losing_months = losing_months == 0 and len(monthly_returns) > 3
+    if monte_carlo is not None:
+        flags.mc_sharpe_p5_negative = monte_carlo.percentiles["sharpe"]["p5"] < 0
+        flags.mc_ruin_risk = monte_carlo.ruin_probability > MC_RUIN_PROBABILITY_LIMIT
     return flags
 
 
@@ -519,6 +1176,8 @@ def grade_result(
         return True, "under_review"
     if 30 <= metrics.total_trades <= 100:
         return True, "under_review"
+    if flags.mc_sharpe_p5_negative or flags.mc_ruin_risk:
+        return True, "under_review"
 
     # GOOD conditions
     if (
@@ -538,176 +1197,1819 @@ def grade_result(
 # ---------------------------------------------------------------------------
 
 
+def strategy_warmup_bars(strategy: Any) -> int:
+    """Bars of history a strategy's indicators need before they are valid.
+
+    Strategies declare this with a ``warmup_bars`` attribute or method;
+    undeclared strategies are treated as needing no history.
+    """
+    warmup = getattr(strategy, "warmup_bars", 0)
+    if callable(warmup):
+        warmup = warmup()
+    return int(warmup or 0)
+
+
+def _verify_no_leakage(
+    strategy: Any,
+    df: pd.DataFrame,
+    full: pd.DataFrame,
+    start: int,
+    end: int,
+    warmup: int,
+    label: str,
+) -> None:
+    """Check that bars [start, end) only depend on [start - warmup, end).
+
+    Recomputes indicators and signals on exactly that history and compares
+    them with the full-series values. Any difference means the window used
+    bars after ``end`` (look-ahead across the train/test boundary) or more
+    history than the declared warm-up.
+    """
+    hist_start = max(0, start - warmup)
+    local = df.iloc[hist_start:end].copy().reset_index(drop=True)
+    local = strategy.signals(strategy.indicators(local))
+    local = local.iloc[start - hist_start:].reset_index(drop=True)
+    window = full.iloc[start:end].reset_index(drop=True)
+
+    for col in full.columns:
+        if col not in local.columns:
+            raise ValueError(f"Look-ahead check failed in {label}: column '{col}' missing on truncated data")
+        expected = window[col].to_numpy()
+        actual = local[col].to_numpy()
+        if expected.dtype.kind in "fiub" and actual.dtype.kind in "fiub" and col != "signal":
+            same = np.isclose(actual, expected, rtol=1e-9, atol=0.0, equal_nan=True)
+        else:
+            same = (actual == expected) | (pd.isna(actual) & pd.isna(expected))
+        if not same.all():
+            first = int(np.argmin(same)) + start
+            raise ValueError(
+                f"Look-ahead leakage in {label}: column '{col}' at bar {first} changes when bars "
+                f"outside [{hist_start}, {end}) are removed. Declare a larger warmup_bars or remove "
+                f"references to future bars."
+            )
+
+
+# Per-process walk-forward state, set once by _init_fold_worker (or directly
+# in-process when running sequentially).
+_FOLD_STATE: dict[str, Any] = {}
+
+
+def _attach_if_shared(data: pd.DataFrame | SharedFrameHandle | None) -> pd.DataFrame | None:
+    """Return ``data`` as a DataFrame, attaching to shared memory if needed."""
+    if isinstance(data, SharedFrameHandle):
+        attached = attach_frame(data)
+        _FOLD_STATE.setdefault("attached", []).append(attached)  # keeps blocks mapped
+        return attached.df
+    return data
+
+
+def _init_fold_worker(
+    full: pd.DataFrame | SharedFrameHandle,
+    raw: pd.DataFrame | SharedFrameHandle | None,
+    strategy_path: str,
+    params: dict | None,
+    cost_model: dict,
+    engine: str,
+    warmup: int,
+    strategy: Any = None,
+    session: Session | None = None,
+) -> None:
+    _FOLD_STATE["full"] = _attach_if_shared(full)
+    _FOLD_STATE["calendar"] = build_calendar(_FOLD_STATE["full"], session)
+    _FOLD_STATE["raw"] = _attach_if_shared(raw)
+    _FOLD_STATE["cost_model"] = cost_model
+    _FOLD_STATE["engine"] = engine
+    _FOLD_STATE["warmup"] = warmup
+    # Only strict mode re-runs the strategy inside folds.
+    if raw is not None and strategy is None:
+        strategy = load_strategy(strategy_path, params)
+    _FOLD_STATE["strategy"] = strategy
+
+
+def _run_fold(fold_num: int, train_start: int, train_end: int, test_start: int, test_end: int) -> dict:
+    """Evaluate one walk-forward fold on views of the precomputed frame."""
+    full = _FOLD_STATE["full"]
+    cost_model = _FOLD_STATE["cost_model"]
+    engine = _FOLD_STATE["engine"]
+    timer = _FOLD_STATE.get("timer")
+
+    if _FOLD_STATE["raw"] is not None:
+        strategy, raw, warmup = _FOLD_STATE["strategy"], _FOLD_STATE["raw"], _FOLD_STATE["warmup"]
+        with optional_stage(timer, "leakage_check", test_end - train_start, profile=True):
+            _verify_no_leakage(strategy, raw, full, train_start, train_end, warmup, f"fold {fold_num} train")
+            _verify_no_leakage(strategy, raw, full, test_start, test_end, warmup, f"fold {fold_num} test")
+
+    with optional_stage(timer, "simulate_trades", test_end - train_start):
+        # In-sample (train)
+        is_trades = simulate_trades(full.iloc[train_start:train_end], cost_model, engine)
+        # Out-of-sample (test)
+        oos_trades = simulate_trades(full.iloc[test_start:test_end], cost_model, engine)
+
+    with optional_stage(timer, "metrics", len(is_trades) + len(oos_trades)):
+        calendar = _FOLD_STATE["calendar"]
+        is_calendar = oos_calendar = None
+        if calendar is not None:
+            is_calendar = calendar.slice(train_start, train_end).for_trades(is_trades.exit_bar)
+            oos_calendar = calendar.slice(test_start, test_end).for_trades(oos_trades.exit_bar)
+        is_metrics = compute_metrics(is_trades, is_calendar)
+        oos_metrics = compute_metrics(oos_trades, oos_calendar)
+
+    # OOS decay
+    if is_metrics.sharpe_ratio != 0:
+        oos_decay = 1.0 - (oos_metrics.sharpe_ratio / is_metrics.sharpe_ratio)
+    else:
+        oos_decay = 0.0
+
+    return {
+        "fold": fold_num,
+        "train_range": [train_start, train_end],
+        "test_range": [test_start, test_end],
+        "in_sample": asdict(is_metrics),
+        "out_of_sample": asdict(oos_metrics),
+        "oos_decay_pct": round(oos_decay * 100, 2),
+    }
+
+
 def run_walk_forward(
     strategy_path: str,
     df: pd.DataFrame,
     cost_model: dict,
     wf_config: dict,
     params: dict | None = None,
+    engine: str = "vectorized",
+    strict: bool = False,
+    jobs: int = 1,
+    fold_stream: TextIO | None = None,
+    use_shared_memory: bool = False,
+    indicator_cache: IndicatorCache | None = None,
+    timer: StageTimer | None = None,
+    session: Session | str | None = None,
 ) -> dict:
     """Run walk-forward analysis with rolling train/test windows.
 
+    The strategy is loaded once and its indicators and signals are computed
+    once on the full series; every fold then simulates on zero-copy views of
+    that frame. Indicators must therefore be causal with a bounded look-back,
+    declared through the strategy's ``warmup_bars`` (or ``warmup_bars`` in
+    ``wf_config``).
+
     Args:
         strategy_path: Path to strategy .py file.
         df: Full OHLCV dataframe.
         cost_model: Cost model dict.
-        wf_config: Dict with train_bars, test_bars, step_bars.
+        wf_config: Dict with train_bars, test_bars, step_bars and optional
+            warmup_bars.
         params: Optional strategy parameters.
+        engine: Trade simulation engine (see ``simulate_trades``).
+        strict: Recompute every train and test window from only its own
+            bars plus the warm-up and fail if any indicator or signal
+            differs, proving there is no look-ahead across fold boundaries.
+        jobs: Number of processes evaluating folds in parallel.
+        fold_stream: Optional text stream that receives each fold as one
+            JSON line, in fold order, as soon as it and all earlier folds
+            have finished.
+        use_shared_memory: With ``jobs > 1``, hand workers the frames via
+            shared memory instead of pickled copies.
+        indicator_cache: Optional cache used for the full-series indicator
+            pass, so repeated walk-forward runs on the same data reuse
+            columns.
+        timer: Optional ``StageTimer``; the full-series indicator/signal
+            passes, the fold loop and the aggregation are recorded on it
+            and returned under ``timings``. Per-fold simulate/metrics time
+            is only split out when folds run in-process (``jobs=1``).
+        session: Trading-day session for the folds' daily Sharpe/Sortino
+            (see ``run_backtest``).
 
     Returns:
-        Walk-forward results dict with per-fold and aggregate metrics.
+        Walk-forward results dict with per-fold and aggregate metrics. The
+        result is identical for any ``jobs`` value.
     """
     train_bars = wf_config["train_bars"]
     test_bars = wf_config["test_bars"]
     step_bars = wf_config.get("step_bars", test_bars)
     total_bars = len(df)
-
-    folds = []
-    fold_num = 0
+    session = resolve_session(session)
+
+    with optional_stage(timer, "load_strategy", profile=True):
+        strategy = load_strategy(strategy_path, params)
+    warmup = int(wf_config.get("warmup_bars", strategy_warmup_bars(strategy)))
+
+    attach_indicator_cache(strategy, indicator_cache, strategy_path)
+    with optional_stage(timer, "indicators", total_bars, profile=True):
+        full = strategy.indicators(df.copy())
+    with optional_stage(timer, "signals", total_bars, profile=True):
+        full = strategy.signals(full)
+    if indicator_cache is not None:
+        # Strict-mode windows are all different slices; caching them would
+        # only evict the full-series columns.
+        del strategy.indicator_cache
+
+    fold_ranges = []
     start = 0
-
     while start + train_bars + test_bars <= total_bars:
-        fold_num += 1
-        train_start = start
         train_end = start + train_bars
-        test_start = train_end
-        test_end = min(train_end + test_bars, total_bars)
-
-        # In-sample (train)
-        train_df = df.iloc[train_start:train_end].copy().reset_index(drop=True)
-        strategy_is = load_strategy(strategy_path, params)
-        train_df = strategy_is.indicators(train_df)
-        train_df = strategy_is.signals(train_df)
-        is_trades = simulate_trades(train_df, cost_model)
-        is_metrics = compute_metrics(is_trades)
-
-        # Out-of-sample (test)
-        test_df = df.iloc[test_start:test_end].copy().reset_index(drop=True)
-        strategy_oos = load_strategy(strategy_path, params)
-        test_df = strategy_oos.indicators(test_df)
-        test_df = strategy_oos.signals(test_df)
-        oos_trades = simulate_trades(test_df, cost_model)
-        oos_metrics = compute_metrics(oos_trades)
-
-        # OOS decay
-        if is_metrics.sharpe_ratio != 0:
-            oos_decay = 1.0 - (oos_metrics.sharpe_ratio / is_metrics.sharpe_ratio)
-        else:
-            oos_decay = 0.0
-
-        folds.append({
-            "fold": fold_num,
-            "train_range": [train_start, train_end],
-            "test_range": [test_start, test_end],
-            "in_sample": asdict(is_metrics),
-            "out_of_sample": asdict(oos_metrics),
-            "oos_decay_pct": round(oos_decay * 100, 2),
-        })
-
+        fold_ranges.append((len(fold_ranges) + 1, start, train_end, train_end, min(train_end + test_bars, total_bars)))
         start += step_bars
 
-    # Aggregate OOS metrics
-    all_oos_sharpes = [f["out_of_sample"]["sharpe_ratio"] for f in folds]
-    all_oos_pnls = [f["out_of_sample"]["total_pnl"] for f in folds]
-    all_decay = [f["oos_decay_pct"] for f in folds]
+    folds: list[dict] = []
+    finished: dict[int, dict] = {}
+
+    def _collect(fold: dict) -> None:
+        # Emit folds strictly in order; later folds wait for earlier ones.
+        finished[fold["fold"]] = fold
+        while len(folds) + 1 in finished:
+            ready = finished.pop(len(folds) + 1)
+            folds.append(ready)
+            if fold_stream is not None:
+                fold_stream.write(json.dumps(ready, default=str) + "\n")
+                fold_stream.flush()
+
+    raw = df if strict else None
+    if jobs <= 1 or len(fold_ranges) <= 1:
+        _init_fold_worker(full, raw, strategy_path, params, cost_model, engine, warmup, strategy, session)
+        _FOLD_STATE["timer"] = timer
+        try:
+            for fold_range in fold_ranges:
+                _collect(_run_fold(*fold_range))
+        finally:
+            _FOLD_STATE.clear()
+    else:
+        with contextlib.ExitStack() as stack:
+            full_data: pd.DataFrame | SharedFrameHandle = full
+            raw_data: pd.DataFrame | SharedFrameHandle | None = raw
+            if use_shared_memory:
+                full_data = stack.enter_context(share_frame(full)).handle
+                if raw is not None:
+                    raw_data = stack.enter_context(share_frame(raw)).handle
+            pool = stack.enter_context(ProcessPoolExecutor(
+                max_workers=min(jobs, len(fold_ranges)),
+                initializer=_init_fold_worker,
+                initargs=(full_data, raw_data, strategy_path, params, cost_model, engine, warmup, None, session),
+            ))
+            # Worker stages are not visible here; time the pool as a whole.
+            fold_bars = sum(test_end - train_start for _, train_start, _, _, test_end in fold_ranges)
+            with optional_stage(timer, "folds", fold_bars):
+                futures = [pool.submit(_run_fold, *fold_range) for fold_range in fold_ranges]
+                for future in as_completed(futures):
+                    _collect(future.result())
 
-    return {
-        "mode": "walk_forward",
-        "config": wf_config,
-        "total_folds": len(folds),
-        "folds": folds,
-        "aggregate": {
-            "avg_oos_sharpe": round(float(np.mean(all_oos_sharpes)), 4) if all_oos_sharpes else 0.0,
-            "avg_oos_pnl": round(float(np.mean(all_oos_pnls)), 2) if all_oos_pnls else 0.0,
-            "total_oos_pnl": round(float(np.sum(all_oos_pnls)), 2) if all_oos_pnls else 0.0,
-            "avg_oos_decay_pct": round(float(np.mean(all_decay)), 2) if all_decay else 0.0,
-            "max_oos_decay_pct": round(float(np.max(all_decay)), 2) if all_decay else 0.0,
-        },
-    }
+    # Aggregate OOS metrics
+    with optional_stage(timer, "aggregate", len(folds)):
+        all_oos_sharpes = [f["out_of_sample"]["sharpe_ratio"] for f in folds]
+        all_oos_pnls = [f["out_of_sample"]["total_pnl"] for f in folds]
+        all_decay = [f["oos_decay_pct"] for f in folds]
+
+        results = {
+            "mode": "walk_forward",
+            "config": wf_config,
+            "warmup_bars": warmup,
+            "leakage_check": "passed" if strict else "skipped",
+            "total_folds": len(folds),
+            "folds": folds,
+            "aggregate": {
+                "avg_oos_sharpe": round(float(np.mean(all_oos_sharpes)), 4) if all_oos_sharpes else 0.0,
+                "avg_oos_pnl": round(float(np.mean(all_oos_pnls)), 2) if all_oos_pnls else 0.0,
+                "total_oos_pnl": round(float(np.sum(all_oos_pnls)), 2) if all_oos_pnls else 0.0,
+                "avg_oos_decay_pct": round(float(np.mean(all_decay)), 2) if all_decay else 0.0,
+                "max_oos_decay_pct": round(float(np.max(all_decay)), 2) if all_decay else 0.0,
+            },
+        }
+    if indicator_cache is not None:
+        results["indicator_cache"] = indicator_cache.stats.to_dict()
+    if timer is not None:
+        results["timings"] = timer.to_dict()
+    return results
 
 
 # ---------------------------------------------------------------------------
-# Main backtest runner
+# Parameter sweeps
 # ---------------------------------------------------------------------------
 
 
-def run_backtest(
-    strategy_path: str,
-    data_path: str,
+def expand_param_grid(grid: dict) -> list[dict]:
+    """Expand ``{"name": [v1, v2], ...}`` into the cartesian product of combos.
+
+    Scalar values are treated as a single-element list.
+    """
+    keys = list(grid.keys())
+    values = [v if isinstance(v, list) else [v] for v in grid.values()]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def load_param_list(path: str) -> list[dict]:
+    """Read one JSON params object per line from a JSONL file."""
+    combos = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            combo = json.loads(line)
+            if not isinstance(combo, dict):
+                raise ValueError(f"{path}:{line_no}: expected a JSON object, got {type(combo).__name__}")
+            combos.append(combo)
+    return combos
+
+
+def _params_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _sweep_header(
+    strategy_path: str,
+    df: pd.DataFrame,
     cost_model: dict,
-    start_bar: int = 0,
-    end_bar: int = -1,
+    engine: str,
+    session: Session | None,
+) -> dict:
+    """Everything a sweep row depends on besides its params.
+
+    Written as the first line of the results JSONL; a rerun only resumes
+    from rows produced under the same header.
+    """
+    header = {
+        "strategy_sha256": file_sha256(Path(strategy_path)),
+        "data": data_fingerprint(df),
+        "cost_model": cost_model,
+        "engine": engine,
+        "session": asdict(session) if session is not None else None,
+    }
+    # Normalised the way it reads back from disk.
+    return {"sweep": json.loads(json.dumps(header, sort_keys=True, default=str))}
+
+
+def _load_finished_combos(results_path: Path, header: dict) -> dict[str, dict]:
+    """Read completed rows from a (possibly truncated) sweep results JSONL.
+
+    Raises:
+        ValueError: The file holds rows of a sweep run against different
+            data, costs, engine, session or strategy code.
+    """
+    finished: dict[str, dict] = {}
+    if not results_path.exists():
+        return finished
+    found: dict | None = None
+    with open(results_path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from an interrupted run
+            if isinstance(row, dict) and "sweep" in row and found is None:
+                found = row
+            elif isinstance(row, dict) and "params" in row and "error" not in row:
+                finished[_params_key(row["params"])] = row
+    if found is None and finished:
+        raise ValueError(
+            f"{results_path} has no sweep header, so its rows cannot be checked against this run; "
+            "use a new results file"
+        )
+    if found is not None and found["sweep"] != header["sweep"]:
+        changed = sorted(k for k in header["sweep"] if found["sweep"].get(k) != header["sweep"][k])
+        raise ValueError(
+            f"{results_path} was written by a sweep with a different {', '.join(changed)}; "
+            "use a new results file to avoid mixing in stale rows"
+        )
+    return finished
+
+
+def _ends_mid_line(path: Path) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+# Per-process sweep state, populated once by _init_sweep_worker so each combo
+# only pays for instantiating the strategy and running it.
+_SWEEP_STATE: dict[str, Any] = {}
+
+
+def _init_sweep_worker(
+    strategy_path: str,
+    data: pd.DataFrame | SharedFrameHandle,
+    cost_model: dict,
+    engine: str,
+    indicator_cache: IndicatorCache | None = None,
+    session: Session | None = None,
+) -> None:
+    _SWEEP_STATE["strategy_cls"] = load_strategy_class(strategy_path)
+    _SWEEP_STATE["strategy_path"] = strategy_path
+    if isinstance(data, SharedFrameHandle):
+        attached = attach_frame(data)
+        _SWEEP_STATE["attached"] = attached  # keeps the blocks mapped
+        _SWEEP_STATE["df"] = attached.df
+        _SWEEP_STATE["shared"] = True
+    else:
+        _SWEEP_STATE["df"] = data
+        _SWEEP_STATE["shared"] = False
+    _SWEEP_STATE["cost_model"] = cost_model
+    _SWEEP_STATE["engine"] = engine
+    _SWEEP_STATE["calendar"] = build_calendar(_SWEEP_STATE["df"], session)
+    if indicator_cache is not None:
+        # Every combo sees a copy of the same data: hash it once per worker.
+        indicator_cache.bind(data_fingerprint(_SWEEP_STATE["df"]))
+    _SWEEP_STATE["indicator_cache"] = indicator_cache
+
+
+def _run_sweep_combo(combo_id: int, params: dict) -> dict:
+    """Backtest one parameter combo against the worker's preloaded data."""
+    row: dict[str, Any] = {"combo_id": combo_id, "params": params}
+    cache = _SWEEP_STATE.get("indicator_cache")
+    before = asdict(cache.stats) if cache is not None else None
+    try:
+        strategy = instantiate_strategy(_SWEEP_STATE["strategy_cls"], params)
+        attach_indicator_cache(strategy, cache, _SWEEP_STATE["strategy_path"])
+        # Shared columns are read-only, so a shallow copy is enough to keep
+        # each combo's indicator columns private without duplicating OHLCV.
+        df = _SWEEP_STATE["df"].copy(deep=not _SWEEP_STATE["shared"])
+        df = strategy.indicators(df)
+        df = strategy.signals(df)
+        trades = simulate_trades(df, _SWEEP_STATE["cost_model"], _SWEEP_STATE["engine"])
+        calendar = _SWEEP_STATE["calendar"]
+        trade_calendar = calendar.for_trades(trades.exit_bar) if calendar is not None else None
+        metrics = compute_metrics(trades, trade_calendar)
+        flags = check_overfit_flags(
+            metrics, monthly_returns(trade_calendar, trades.pnl) if trade_calendar is not None else []
+        )
+        passed, grade = grade_result(metrics, flags)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+
+    row["metrics"] = asdict(metrics)
+    row["pass"] = passed
+    row["grade"] = grade
+    if cache is not None:
+        after = asdict(cache.stats)
+        row["indicator_cache"] = {k: after[k] - before[k] for k in ("hits", "disk_hits", "misses")}
+    return row
+
+
+def run_param_sweep(
+    strategy_path: str,
+    df: pd.DataFrame,
+    cost_model: dict,
+    combos: list[dict],
     params: dict | None = None,
+    workers: int | None = None,
+    results_path: str | None = None,
+    engine: str = "vectorized",
+    use_shared_memory: bool = False,
+    indicator_cache: IndicatorCache | None = None,
+    session: Session | str | None = None,
 ) -> dict:
-    """Run a full backtest and return results as a dict.
+    """Backtest many parameter combos against one loaded dataset.
+
+    Combos are spread across a process pool whose workers receive the data
+    and strategy class once. Each finished combo is appended to
+    ``results_path`` (JSONL) as soon as it completes; rerunning with the same
+    file skips combos that already finished, so a crashed sweep resumes
+    where it stopped. The file starts with a header recording the strategy
+    source hash, data fingerprint, cost model, engine and session, and a
+    rerun that differs in any of them is refused instead of resumed.
+
+    Args:
+        strategy_path: Path to strategy .py file.
+        df: OHLCV dataframe shared by every combo.
+        cost_model: Cost model dict.
+        combos: Parameter overrides, one dict per combo.
+        params: Base parameters the overrides are merged into (defaults to
+            the strategy's ``default_params()``).
+        workers: Process count (default: CPU count). ``1`` runs in-process.
+        results_path: Optional JSONL file for streaming and resuming.
+        engine: Trade simulation engine (see ``simulate_trades``).
+        use_shared_memory: Place the OHLCV columns in shared memory once
+            and let workers attach zero-copy instead of each receiving a
+            pickled copy of ``df``.
+        indicator_cache: Optional cache shared by the combos of each worker.
+            Workers each get their own in-memory tier with the same budget;
+            set ``spill_dir`` on it to also share columns across workers
+            and runs.
+        session: Trading-day session for monthly returns and daily ratios
+            (see ``run_backtest``); each worker builds the calendar once.
 
-    This is the main entry point for programmatic use.
+    Returns:
+        Sweep results dict with one compact row per combo.
     """
-    # Load data
-    df = load_data(data_path, start_bar, end_bar)
-    total_bars = len(df)
+    session = resolve_session(session)
+    strategy_cls = load_strategy_class(strategy_path)
+    base_params = dict(getattr(instantiate_strategy(strategy_cls, params), "params", None) or params or {})
+    full_combos = [{**base_params, **combo} for combo in combos]
+
+    finished: dict[str, dict] = {}
+    stream = None
+    if results_path:
+        out_path = Path(results_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        header = _sweep_header(strategy_path, df, cost_model, engine, session)
+        finished = _load_finished_combos(out_path, header)
+        fresh = not out_path.exists() or out_path.stat().st_size == 0
+        torn = not fresh and _ends_mid_line(out_path)
+        stream = open(out_path, "a")
+        if fresh:
+            stream.write(json.dumps(header) + "\n")
+            stream.flush()
+        elif torn:
+            # Terminate an interrupted run's partial line so the next row
+            # is not glued onto it and lost.
+            stream.write("\n")
+            stream.flush()
+
+    rows: dict[int, dict] = {}
+    pending: list[tuple[int, dict]] = []
+    for combo_id, combo in enumerate(full_combos):
+        done = finished.get(_params_key(combo))
+        if done is not None:
+            rows[combo_id] = {**done, "combo_id": combo_id}
+        else:
+            pending.append((combo_id, combo))
+
+    if finished:
+        logger.info("Resuming sweep: %d/%d combos already finished", len(rows), len(full_combos))
+
+    def _record(row: dict) -> None:
+        rows[row["combo_id"]] = row
+        if stream is not None:
+            stream.write(json.dumps(row, default=str) + "\n")
+            stream.flush()
+        logger.info(
+            "Combo %d finished (%d/%d): %s",
+            row["combo_id"], len(rows), len(full_combos), row.get("grade", row.get("error")),
+        )
 
-    # Load and run strategy
-    strategy = load_strategy(strategy_path, params)
-    strategy_name = getattr(strategy, "name", Path(strategy_path).stem)
+    try:
+        n_workers = workers or os.cpu_count() or 1
+        if n_workers == 1 or len(pending) <= 1:
+            _init_sweep_worker(strategy_path, df, cost_model, engine, indicator_cache, session)
+            try:
+                for combo_id, combo in pending:
+                    _record(_run_sweep_combo(combo_id, combo))
+            finally:
+                _SWEEP_STATE.clear()
+                if indicator_cache is not None:
+                    indicator_cache.bind(None)
+        elif pending:
+            with contextlib.ExitStack() as stack:
+                data: pd.DataFrame | SharedFrameHandle = df
+                if use_shared_memory:
+                    data = stack.enter_context(share_frame(df)).handle
+                pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=min(n_workers, len(pending)),
+                    initializer=_init_sweep_worker,
+                    initargs=(strategy_path, data, cost_model, engine, indicator_cache, session),
+                ))
+                futures = [pool.submit(_run_sweep_combo, cid, combo) for cid, combo in pending]
+                for future in as_completed(futures):
+                    _record(future.result())
+    finally:
+        if stream is not None:
+            stream.close()
+
+    results = [rows[i] for i in range(len(full_combos))]
+    summary = {
+        "mode": "param_sweep",
+        "base_params": base_params,
+        "total_combos": len(full_combos),
+        "resumed_combos": len(full_combos) - len(pending),
+        "failed_combos": sum(1 for r in results if "error" in r),
+        "results": results,
+    }
+    if indicator_cache is not None:
+        totals = {"hits": 0, "disk_hits": 0, "misses": 0}
+        for row in results:
+            for k, v in row.get("indicator_cache", {}).items():
+                totals[k] += v
+        lookups = sum(totals.values())
+        totals["hit_rate"] = round((totals["hits"] + totals["disk_hits"]) / lookups, 4) if lookups else 0.0
+        summary["indicator_cache"] = totals
+    return summary
 
-    df = strategy.indicators(df)
-    df = strategy.signals(df)
+
+# ---------------------------------------------------------------------------
+# Main backtest runner
+# ---------------------------------------------------------------------------
+
+
+def backtest_frame(
+    strategy: Any,
+    df: pd.DataFrame,
+    cost_model: dict,
+    data_path: str = "",
+    engine: str = "vectorized",
+    strategy_name: str | None = None,
+    timer: StageTimer | None = None,
+    calendar: CalendarIndex | None = None,
+    session: Session | None = None,
+    monte_carlo: MonteCarloConfig | None = None,
+    prop_firm: PropFirmConfig | None = None,
+) -> dict:
+    """Run an already-instantiated strategy on a loaded frame.
+
+    ``df`` is modified in place by the strategy's ``indicators``/``signals``
+    hooks; pass a copy when the frame is reused. With ``timer``, each stage
+    is recorded on it (strategy hooks under cProfile if it profiles code).
+    Callers running many strategies on the same bars pass their
+    ``calendar`` once; otherwise one is built for ``session``.
+    ``monte_carlo`` adds a resampling robustness block and ``prop_firm`` a
+    prop-firm validation report (see ``summarize_backtest``).
+    """
+    total_bars = len(df)
+    strategy_name = strategy_name or getattr(strategy, "name", type(strategy).__name__)
+
+    with optional_stage(timer, "indicators", total_bars, profile=True):
+        df = strategy.indicators(df)
+    with optional_stage(timer, "signals", total_bars, profile=True):
+        df = strategy.signals(df)
 
     # Simulate trades
-    trades = simulate_trades(df, cost_model)
+    with optional_stage(timer, "simulate_trades", total_bars):
+        trades = simulate_trades(df, cost_model, engine)
+
+    with optional_stage(timer, "metrics", len(trades)):
+        if calendar is None:
+            calendar = build_calendar(df, session)
+        trade_calendar = calendar.for_trades(trades.exit_bar) if calendar is not None else None
+
+        # Date range
+        date_range = {}
+        if "timestamp" in df.columns and len(df) > 0:
+            date_range = {
+                "start": str(df["timestamp"].iloc[0].date()),
+                "end": str(df["timestamp"].iloc[-1].date()),
+            }
+
+        return summarize_backtest(
+            strategy_name, data_path, cost_model, trades, total_bars, date_range, trade_calendar,
+            monte_carlo, prop_firm,
+        )
 
-    # Compute metrics
-    metrics = compute_metrics(trades)
 
-    # Monthly returns
-    monthly_returns = compute_monthly_returns(trades, df)
+def summarize_backtest(
+    strategy_name: str,
+    data_path: str,
+    cost_model: dict,
+    trades: TradeBatch,
+    total_bars: int,
+    date_range: dict,
+    calendar: TradeCalendar | None,
+    monte_carlo: MonteCarloConfig | None = None,
+    prop_firm: PropFirmConfig | None = None,
+) -> dict:
+    """Assemble the standard results dict from simulated trades.
+
+    ``calendar`` attributes the trades to trading days (``None`` when the
+    data has no timestamps: no period returns or daily ratios then). With
+    ``monte_carlo``, the trade PnL is resampled into that many paths; the
+    distribution percentiles are added under ``"monte_carlo"`` and feed the
+    ``mc_*`` anti-overfit flags. With ``prop_firm``, the trades are validated
+    against the prop-firm rules in process (each trade counting towards its
+    exit's trading day, its PnL converted to dollars with the cost model's
+    ``point_value``) and the report is added under ``"prop_firm"``
+    (``None`` without timestamps). A cost model without a point value is
+    refused then, since the rules' limits are in dollars.
+    """
+    # Compute metrics
+    metrics = compute_metrics(trades, calendar)
+
+    # Period returns by exit bar
+    periods: dict[str, list[dict]] = {"monthly_returns": [], "weekly_returns": [], "daily_returns": []}
+    if calendar is not None:
+        periods = {
+            "monthly_returns": monthly_returns(calendar, trades.pnl),
+            "weekly_returns": weekly_returns(calendar, trades.pnl),
+            "daily_returns": daily_returns(calendar, trades.pnl),
+        }
 
     # Equity curve (sample every ~1% of total bars, min 10)
     sample_interval = max(10, total_bars // 100)
     equity_curve = compute_equity_curve(trades, total_bars, sample_interval)
 
     # Trade log
-    trade_log = [
-        {
-            "entry_bar": t.entry_bar,
-            "exit_bar": t.exit_bar,
-            "side": t.side,
-            "entry_price": round(t.entry_price, 4),
-            "exit_price": round(t.exit_price, 4),
-            "pnl": round(t.pnl, 2),
-            "mfe": round(t.mfe, 2),
-            "mae": round(t.mae, 2),
-        }
-        for t in trades
-    ]
-
-    # Date range
-    date_range = {}
-    if "timestamp" in df.columns and len(df) > 0:
-        date_range = {
-            "start": str(df["timestamp"].iloc[0].date()),
-            "end": str(df["timestamp"].iloc[-1].date()),
-        }
+    trade_log = trades.to_records()
 
     # Anti-overfit checks
-    flags = check_overfit_flags(metrics, monthly_returns)
+    robustness = run_monte_carlo(trades.pnl, monte_carlo) if monte_carlo is not None else None
+    flags = check_overfit_flags(metrics, periods["monthly_returns"], robustness)
     passed, grade = grade_result(metrics, flags)
 
-    return {
+    results = {
         "strategy_name": strategy_name,
         "data_file": str(data_path),
         "bars_tested": total_bars,
         "date_range": date_range,
         "cost_model": cost_model,
         "metrics": asdict(metrics),
-        "monthly_returns": monthly_returns,
+        "session": calendar.session.name if calendar is not None else None,
+        **periods,
         "equity_curve": equity_curve,
         "trade_log": trade_log,
         "anti_overfit_flags": asdict(flags),
         "pass": passed,
         "grade": grade,
     }
+    if monte_carlo is not None:
+        results["monte_carlo"] = robustness.to_dict() if robustness is not None else None
+    if prop_firm is not None:
+        results["prop_firm"] = (
+            validate_prop_firms(
+                TradeSeries.from_day_ids(_prop_firm_pnl(trades, cost_model), calendar.exit_days), prop_firm
+            )
+            if calendar is not None
+            else None
+        )
+    return results
+
+
+def _prop_firm_pnl(trades: TradeBatch, cost_model: dict) -> np.ndarray:
+    """Trade PnL in dollars for the prop-firm rules, whose limits are dollar amounts."""
+    multiplier = point_value(cost_model)
+    if multiplier is None:
+        raise ValueError(PROP_FIRM_POINT_VALUE_ERROR)
+    return pnl_in_dollars(trades, cost_model, multiplier)
+
+
+def run_backtest(
+    strategy_path: str,
+    data_path: str,
+    cost_model: dict,
+    start_bar: int = 0,
+    end_bar: int = -1,
+    params: dict | None = None,
+    engine: str = "vectorized",
+    use_cache: bool = True,
+    indicator_cache: IndicatorCache | None = None,
+    checkpoint: str | None = None,
+    timer: StageTimer | None = None,
+    session: Session | str | None = None,
+    monte_carlo: MonteCarloConfig | None = None,
+    prop_firm: PropFirmConfig | None = None,
+) -> dict:
+    """Run a full backtest and return results as a dict.
+
+    This is the main entry point for programmatic use. Pass an
+    ``IndicatorCache`` to let opted-in strategies reuse indicator columns
+    across calls on the same data; its stats are added to the result.
+    With ``checkpoint``, only bars appended since the previous call are
+    processed (see ``run_backtest_incremental``). With ``timer``, every
+    stage is timed and the result gains a ``timings`` block. ``session``
+    (a ``lib.calendar_index`` preset such as ``"CME"``) decides which
+    trading day, week and month each exit counts towards. ``monte_carlo``
+    adds a trade-resampling robustness block (see ``lib.monte_carlo``) and
+    ``prop_firm`` a prop-firm validation of the trades (see
+    ``lib.prop_firm.validate_prop_firms``), without a trades file round trip.
+    """
+    session = resolve_session(session)
+    if checkpoint is not None:
+        if end_bar != -1:
+            raise ValueError("Checkpointed backtests always run through the end of the data (end_bar=-1)")
+        if timer is not None:
+            raise ValueError("Checkpointed backtests do not support per-stage timings")
+        return run_backtest_incremental(
+            strategy_path, data_path, cost_model, checkpoint, start_bar, params,
+            use_cache=use_cache, session=session, monte_carlo=monte_carlo, prop_firm=prop_firm,
+        )
+
+    # Load data
+    with optional_stage(timer, "load_data") as stage:
+        df = load_data(data_path, start_bar, end_bar, use_cache)
+        stage.rows = len(df)
+
+    # Load and run strategy
+    with optional_stage(timer, "load_strategy", profile=True):
+        strategy = attach_indicator_cache(load_strategy(strategy_path, params), indicator_cache, strategy_path)
+    strategy_name = getattr(strategy, "name", Path(strategy_path).stem)
+
+    results = backtest_frame(
+        strategy, df, cost_model, data_path, engine, strategy_name, timer, session=session,
+        monte_carlo=monte_carlo, prop_firm=prop_firm,
+    )
+    if indicator_cache is not None:
+        results["indicator_cache"] = indicator_cache.stats.to_dict()
+    if timer is not None:
+        results["timings"] = timer.to_dict()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Chunked (out-of-core) backtests
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class SimulatorState:
+    """Trade-simulator state carried from one chunk of bars to the next.
+
+    ``position`` is the position held during the last bar seen and
+    ``last_signal`` that bar's signal (the position for the next bar).
+    While a position is open, ``seg_high``/``seg_low`` hold the NaN-skipping
+    extremes of its bars so far; MFE/MAE are derived from them on exit.
+    """
+
+    bars_seen: int = 0
+    position: Any = 0
+    last_signal: Any = 0
+    entry_bar: int = 0
+    entry_price: Any = 0.0
+    seg_high: float = math.nan
+    seg_low: float = math.nan
+
+    @property
+    def in_position(self) -> bool:
+        return bool(self.position != 0)
+
+
+def _seg_extremes(highs: np.ndarray, lows: np.ndarray, start: int, end: int) -> tuple[float, float]:
+    if end <= start:
+        return math.nan, math.nan
+    return np.fmax.reduce(highs[start:end]), np.fmin.reduce(lows[start:end])
+
+
+def simulate_chunk(
+    state: SimulatorState,
+    chunk: pd.DataFrame,
+    cost_model: dict,
+    final: bool = False,
+) -> TradeBatch:
+    """Advance ``state`` over ``chunk`` and return the trades it closes.
+
+    Feeding a series through consecutive chunks (``final=True`` on the last
+    one) yields exactly the trades ``simulate_trades`` produces for the whole
+    series, with global bar indices; a position still open at the end of a
+    non-final chunk is carried in ``state``. Intrabar bracket exits
+    (``BRACKET_COLUMNS``) are not supported here.
+    """
+    if any(col in chunk.columns for col in BRACKET_COLUMNS):
+        raise ValueError(
+            f"Chunked and incremental backtests do not support {'/'.join(BRACKET_COLUMNS)} exits; "
+            "run the in-memory backtest instead"
+        )
+    signals = chunk["signal"].values
+    opens = chunk["open"].values
+    highs = chunk["high"].values
+    lows = chunk["low"].values
+    closes = chunk["close"].values
+    m = len(chunk)
+    offset = state.bars_seen
+    if m == 0:
+        return TradeBatch.empty()
+
+    # pos[0] is the position during the previous chunk's last bar, pos[1:]
+    # the (lagged-signal) position during each bar of this chunk.
+    pos = np.empty(m + 1, dtype=np.result_type(signals.dtype, np.int8))
+    pos[0] = state.position
+    pos[1] = state.last_signal
+    pos[2:] = signals[:-1]
+    held = pos[1:]
+    events = np.flatnonzero(pos[1:] != pos[:-1])
+
+    entries = events[held[events] != 0]
+    next_event = np.searchsorted(events, entries, side="right")
+    has_exit = next_event < len(events)
+    # A position left open by a non-final chunk is carried, not closed.
+    closing = has_exit | final
+    carry_entry = entries[~closing]
+    entries, has_exit, next_event = entries[closing], has_exit[closing], next_event[closing]
+    exit_local = np.where(has_exit, events[np.minimum(next_event, len(events) - 1)], m - 1)
+
+    segment_end = np.where(has_exit, exit_local, m)
+    seg_high = np.empty(len(entries), dtype=np.float64)
+    seg_low = np.empty(len(entries), dtype=np.float64)
+    if len(entries):
+        bounds = np.empty(2 * len(entries), dtype=np.intp)
+        bounds[0::2] = entries
+        bounds[1::2] = segment_end
+        if segment_end[-1] == m:
+            bounds = bounds[:-1]
+        seg_high = np.fmax.reduceat(highs, bounds)[0::2]
+        seg_low = np.fmin.reduceat(lows, bounds)[0::2]
+
+    entry_bars = entries + offset
+    exit_bars = exit_local + offset
+    sides = held[entries]
+    entry_prices = opens[entries]
+    exit_prices = np.where(has_exit, opens[exit_local], closes[-1])
+    exit_reason = np.where(has_exit, EXIT_SIGNAL, EXIT_END)
+
+    # The position carried in from the previous chunk closes at this chunk's
+    # first event (or at the end of the data on the final chunk).
+    carried_in = state.in_position
+    if carried_in and (len(events) or final):
+        end = events[0] if len(events) else m
+        high, low = _seg_extremes(highs, lows, 0, end)
+        entry_bars = np.concatenate(([state.entry_bar], entry_bars))
+        exit_bars = np.concatenate(([offset + end if len(events) else offset + m - 1], exit_bars))
+        sides = np.concatenate(([state.position], sides))
+        entry_prices = np.concatenate(([state.entry_price], entry_prices))
+        exit_prices = np.concatenate(([opens[end] if len(events) else closes[-1]], exit_prices))
+        exit_reason = np.concatenate(([EXIT_SIGNAL if len(events) else EXIT_END], exit_reason))
+        seg_high = np.concatenate(([np.fmax(state.seg_high, high)], seg_high))
+        seg_low = np.concatenate(([np.fmin(state.seg_low, low)], seg_low))
+    elif carried_in:
+        high, low = _seg_extremes(highs, lows, 0, m)
+        state.seg_high = np.fmax(state.seg_high, high)
+        state.seg_low = np.fmin(state.seg_low, low)
+
+    if len(carry_entry):
+        e = int(carry_entry[0])
+        state.entry_bar = offset + e
+        state.entry_price = opens[e]
+        state.seg_high, state.seg_low = _seg_extremes(highs, lows, e, m)
+    state.position = held[-1]
+    state.last_signal = signals[-1]
+    state.bars_seen += m
+
+    if len(entry_bars) == 0:
+        return TradeBatch.empty()
+
+    is_long = sides == 1
+    raw_pnl = np.where(is_long, exit_prices - entry_prices, entry_prices - exit_prices)
+    rt_cost = compute_round_trip_cost(cost_model, np.abs(entry_prices))
+    net_pnl = raw_pnl - rt_cost
+    mfe = np.fmax(np.where(is_long, seg_high - entry_prices, entry_prices - seg_low), 0.0)
+    mae = np.fmin(np.where(is_long, seg_low - entry_prices, entry_prices - seg_high), 0.0)
+
+    return TradeBatch(
+        entry_bar=entry_bars.astype(np.int64),
+        exit_bar=exit_bars.astype(np.int64),
+        side=np.where(is_long, 1, -1).astype(np.int8),
+        entry_price=entry_prices.astype(np.float64),
+        exit_price=exit_prices.astype(np.float64),
+        pnl=net_pnl.astype(np.float64),
+        mfe=mfe.astype(np.float64),
+        mae=mae.astype(np.float64),
+        exit_reason=exit_reason.astype(np.int8),
+    )
+
+
+class TradeAccumulator:
+    """Collects closed trades (and their exit days) chunk by chunk.
+
+    Metrics are computed from the accumulated trade arrays with the same
+    functions as the in-memory path, so results match it exactly; memory
+    grows with the number of trades and trading days, not bars.
+    """
+
+    def __init__(self, session: Session | None = None) -> None:
+        self.session = resolve_session(session)
+        self.parts: list[TradeBatch] = []
+        self.day_ids: list[np.ndarray] = []
+        self.session_days: list[np.ndarray] = []
+        self.has_timestamp = True
+
+    def add(self, trades: TradeBatch, chunk: pd.DataFrame, offset: int) -> None:
+        if "timestamp" not in chunk.columns:
+            self.has_timestamp = False
+        if self.has_timestamp and len(chunk):
+            calendar = CalendarIndex.from_timestamps(chunk["timestamp"], self.session)
+            self.session_days.append(calendar.session_days)
+            if len(trades):
+                self.day_ids.append(calendar.for_trades(trades.exit_bar - offset).exit_days)
+        if len(trades):
+            self.parts.append(trades)
+
+    def batch(self) -> TradeBatch:
+        if not self.parts:
+            return TradeBatch.empty()
+        return TradeBatch(*(
+            np.concatenate([getattr(part, name) for part in self.parts])
+            for name in TradeBatch.__dataclass_fields__
+        ))
+
+    def exit_days(self) -> np.ndarray:
+        if not self.day_ids:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(self.day_ids)
+
+    def days_seen(self) -> np.ndarray:
+        if not self.session_days:
+            return np.empty(0, dtype=np.int64)
+        return distinct_days(np.concatenate(self.session_days))
+
+    def calendar(self) -> TradeCalendar | None:
+        """Calendar of everything added so far (``None`` without timestamps)."""
+        if not self.has_timestamp or not self.session_days:
+            return None
+        return TradeCalendar(self.session, self.days_seen(), self.exit_days())
+
+
+def _run_strategy_on_chunk(
+    strategy: Any,
+    tail: pd.DataFrame | None,
+    chunk: pd.DataFrame,
+    offset: int,
+    keep: int,
+) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    """Run the strategy on ``chunk`` prefixed with the raw look-back ``tail``.
+
+    Returns the chunk's own rows (indexed by global bar, with indicator and
+    signal columns) and the last ``keep`` raw bars to prefix the next chunk.
+    """
+    frame = chunk if tail is None else pd.concat([tail, chunk], ignore_index=True)
+    lead = len(frame) - len(chunk)
+    frame.index = pd.RangeIndex(offset - lead, offset + len(chunk))
+    # Keep the raw look-back before the strategy adds columns in place.
+    next_tail = frame.iloc[max(len(frame) - keep, 0):].copy() if keep > 0 else None
+
+    frame = strategy.indicators(frame)
+    frame = strategy.signals(frame)
+    if "signal" not in frame.columns:
+        raise ValueError("DataFrame must have a 'signal' column after strategy.signals()")
+    return frame.iloc[lead:], next_tail
+
+
+def iter_data_chunks(
+    data_path: str,
+    chunk_bars: int,
+    start_bar: int = 0,
+    end_bar: int = -1,
+    use_cache: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """Yield normalized ``[start_bar:end_bar]`` bars in chunks of ``chunk_bars``.
+
+    Slices come from the memory-mapped data cache when a valid entry
+    already exists; otherwise the CSV is read incrementally, so the full
+    file is never held in memory.
+    """
+    rows = cached_rows(data_path) if use_cache else None
+    if rows is not None:
+        stop = rows if end_bar == -1 else min(end_bar, rows)
+        for start in range(start_bar, stop, chunk_bars):
+            yield load_cached(data_path, parse_csv, start, min(start + chunk_bars, stop))
+        return
+
+    if not Path(data_path).exists():
+        raise FileNotFoundError(f"Data file not found: {data_path}")
+    row = 0
+    pending: list[pd.DataFrame] = []
+    pending_rows = 0
+    with pd.read_csv(data_path, chunksize=chunk_bars) as reader:
+        for raw in reader:
+            lo, hi = row, row + len(raw)
+            row = hi
+            if hi <= start_bar:
+                continue
+            if end_bar != -1 and lo >= end_bar:
+                break
+            raw = raw.iloc[max(start_bar - lo, 0):(len(raw) if end_bar == -1 else min(end_bar - lo, len(raw)))]
+            pending.append(raw)
+            pending_rows += len(raw)
+            # Slicing at start_bar can leave short pieces; regroup them so
+            # every chunk but the last has exactly chunk_bars rows.
+            while pending_rows >= chunk_bars:
+                joined = pd.concat(pending, ignore_index=True)
+                yield normalize_ohlcv(joined.iloc[:chunk_bars].reset_index(drop=True))
+                pending = [joined.iloc[chunk_bars:]]
+                pending_rows -= chunk_bars
+    if pending_rows:
+        yield normalize_ohlcv(pd.concat(pending, ignore_index=True))
+
+
+def run_backtest_chunked(
+    strategy_path: str,
+    data_path: str,
+    cost_model: dict,
+    chunk_bars: int = 1_000_000,
+    start_bar: int = 0,
+    end_bar: int = -1,
+    params: dict | None = None,
+    warmup_bars: int | None = None,
+    use_cache: bool = True,
+    session: Session | str | None = None,
+    monte_carlo: MonteCarloConfig | None = None,
+    prop_firm: PropFirmConfig | None = None,
+) -> dict:
+    """Backtest a dataset too large for memory, one chunk of bars at a time.
+
+    Each chunk is prefixed with the previous ``warmup_bars`` raw bars before
+    the strategy's ``indicators``/``signals`` run, and the simulator carries
+    any open position across chunk boundaries. For strategies whose
+    indicators are causal with a bounded look-back (declared through
+    ``warmup_bars``, as for walk-forward), the results equal
+    ``run_backtest`` on the same bars. Peak memory is bounded by the chunk
+    size plus the closed trades.
+
+    Args:
+        strategy_path: Path to strategy .py file.
+        data_path: Path to OHLCV CSV data file.
+        cost_model: Cost model dict.
+        chunk_bars: Bars per chunk.
+        start_bar: First bar to test.
+        end_bar: Bar to stop before (``-1`` = through the end).
+        params: Optional strategy parameters.
+        warmup_bars: Look-back carried between chunks (default: the
+            strategy's declared ``warmup_bars``).
+        use_cache: Read chunks from the data cache when it is already built.
+        session: Trading-day session for period returns (see ``run_backtest``).
+        monte_carlo: Optional trade-resampling settings (see ``run_backtest``).
+        prop_firm: Optional prop-firm validation settings (see ``run_backtest``).
+
+    Returns:
+        The same results dict as ``run_backtest``, plus a ``chunking`` block.
+    """
+    if chunk_bars < 1:
+        raise ValueError(f"chunk_bars must be positive, got {chunk_bars}")
+
+    strategy = load_strategy(strategy_path, params)
+    strategy_name = getattr(strategy, "name", Path(strategy_path).stem)
+    warmup = strategy_warmup_bars(strategy) if warmup_bars is None else int(warmup_bars)
+    if warmup == 0:
+        logger.warning(
+            "%s declares no warmup_bars; indicators restart at every chunk boundary", strategy_name
+        )
+
+    state = SimulatorState()
+    accumulator = TradeAccumulator(session)
+    tail: pd.DataFrame | None = None
+    first_ts = last_ts = None
+    n_chunks = 0
+
+    chunks = iter_data_chunks(data_path, chunk_bars, start_bar, end_bar, use_cache)
+    chunk = next(chunks, None)
+    while chunk is not None:
+        following = next(chunks, None)
+        n_chunks += 1
+        offset = state.bars_seen
+
+        bars, tail = _run_strategy_on_chunk(strategy, tail, chunk, offset, warmup)
+        trades = simulate_chunk(state, bars, cost_model, final=following is None)
+        accumulator.add(trades, bars, offset)
+
+        if "timestamp" in bars.columns:
+            first_ts = bars["timestamp"].iloc[0] if first_ts is None else first_ts
+            last_ts = bars["timestamp"].iloc[-1]
+        chunk = following
+
+    trades = accumulator.batch()
+    date_range = {}
+    if first_ts is not None:
+        date_range = {"start": str(first_ts.date()), "end": str(last_ts.date())}
+
+    results = summarize_backtest(
+        strategy_name,
+        data_path,
+        cost_model,
+        trades,
+        state.bars_seen,
+        date_range,
+        accumulator.calendar(),
+        monte_carlo,
+        prop_firm,
+    )
+    results["chunking"] = {"chunk_bars": chunk_bars, "chunks": n_chunks, "warmup_bars": warmup}
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Incremental (append-bars) backtests
+# ---------------------------------------------------------------------------
+
+# Bump when the checkpoint layout changes; older checkpoints then trigger a
+# full replay instead of being misread.
+CHECKPOINT_VERSION = 4
+
+
+@dataclass
+class BacktestCheckpoint:
+    """Everything needed to extend a backtest with newly appended bars.
+
+    ``trades``/``exit_days`` hold the closed trades and ``session_days`` the
+    trading days seen so far (the metric inputs); ``open_trade`` is the
+    still-open position as it would be reported if closed at the last bar. ``tail`` is the raw look-back the indicators
+    need, and doubles as a check that the old bars were not rewritten.
+    ``data_mark`` records how far the CSV was read, so the next call reads
+    only the bytes after it (``None`` when the file had no clean line end).
+    """
+
+    identity: dict
+    state: SimulatorState
+    trades: TradeBatch
+    exit_days: np.ndarray
+    session_days: np.ndarray
+    has_timestamp: bool
+    open_trade: TradeBatch
+    open_exit_days: np.ndarray
+    tail: pd.DataFrame
+    first_ts: Any = None
+    last_ts: Any = None
+    data_mark: FileMark | None = None
+    version: int = CHECKPOINT_VERSION
+
+    def save(self, path: str) -> None:
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, out)
+
+    @classmethod
+    def load(cls, path: str) -> BacktestCheckpoint | None:
+        """Read a checkpoint, or ``None`` if it is missing, unreadable or stale."""
+        try:
+            with open(path, "rb") as f:
+                checkpoint = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+            return None
+        if not isinstance(checkpoint, cls) or checkpoint.version != CHECKPOINT_VERSION:
+            return None
+        return checkpoint
+
+
+def _checkpoint_identity(
+    strategy_path: str,
+    strategy: Any,
+    data_path: str,
+    cost_model: dict,
+    start_bar: int,
+    warmup: int,
+    session: Session,
+) -> dict:
+    """What a checkpoint was computed from; any change forces a replay."""
+    return {
+        "strategy_sha256": file_sha256(Path(strategy_path)),
+        "params": json.loads(json.dumps(getattr(strategy, "params", None), sort_keys=True, default=str)),
+        "data_file": str(Path(data_path).resolve()),
+        "cost_model": json.loads(json.dumps(cost_model, sort_keys=True, default=str)),
+        "start_bar": start_bar,
+        "warmup_bars": warmup,
+        "session": asdict(session),
+    }
+
+
+def _slice_batch(batch: TradeBatch, start: int) -> TradeBatch:
+    return TradeBatch(*(getattr(batch, name)[start:] for name in TradeBatch.__dataclass_fields__))
+
+
+def run_backtest_incremental(
+    strategy_path: str,
+    data_path: str,
+    cost_model: dict,
+    checkpoint_path: str,
+    start_bar: int = 0,
+    params: dict | None = None,
+    warmup_bars: int | None = None,
+    use_cache: bool = True,
+    session: Session | str | None = None,
+    monte_carlo: MonteCarloConfig | None = None,
+    prop_firm: PropFirmConfig | None = None,
+) -> dict:
+    """Backtest through the end of the data, resuming from a checkpoint.
+
+    The first call replays the full history and saves ``checkpoint_path``.
+    Later calls read only the bytes appended to the CSV since the recorded
+    offset, append those bars to the data cache, run the strategy (on the
+    saved look-back plus the new bars) and simulator on them, and save the
+    updated checkpoint, so revalidating after a data refresh costs O(new
+    bars) of I/O, strategy and simulation work. Results equal
+    ``run_backtest`` on the full data.
+
+    A replay from bar zero happens instead when the checkpoint is missing,
+    was made for a different strategy file, parameters, cost model, session
+    or start bar, or when the header line or the bytes just before the
+    recorded offset changed (the file was rewritten rather than appended
+    to). A checkpoint without an offset (the file did not end on a line
+    break) resumes from a full load checked against the saved look-back.
+
+    Args:
+        strategy_path: Path to strategy .py file.
+        data_path: Path to OHLCV CSV data file (grows over time).
+        cost_model: Cost model dict.
+        checkpoint_path: Checkpoint file to resume from and update.
+        start_bar: First bar to test.
+        params: Optional strategy parameters.
+        warmup_bars: Look-back kept for the indicators (default: the
+            strategy's declared ``warmup_bars``).
+        use_cache: Load data through the memory-mapped cache.
+        session: Trading-day session for period returns (see ``run_backtest``).
+        monte_carlo: Optional trade-resampling settings (see ``run_backtest``).
+        prop_firm: Optional prop-firm validation settings (see ``run_backtest``).
+
+    Returns:
+        The ``run_backtest`` results dict plus an ``incremental`` block.
+    """
+    session = resolve_session(session)
+    strategy = load_strategy(strategy_path, params)
+    strategy_name = getattr(strategy, "name", Path(strategy_path).stem)
+    warmup = strategy_warmup_bars(strategy) if warmup_bars is None else int(warmup_bars)
+    # Keep at least one bar so the append check has something to compare.
+    keep = max(warmup, 1)
+    identity = _checkpoint_identity(strategy_path, strategy, data_path, cost_model, start_bar, warmup, session)
+
+    checkpoint = BacktestCheckpoint.load(checkpoint_path)
+    if checkpoint is not None and checkpoint.identity != identity:
+        logger.info("Checkpoint %s was made for a different run; replaying", checkpoint_path)
+        checkpoint = None
+
+    new_bars = None
+    mark = None
+    if checkpoint is not None and checkpoint.data_mark is not None:
+        appended = read_appended(data_path, checkpoint.data_mark, parse_csv)
+        if appended is None:
+            logger.warning("%s was rewritten since checkpoint %s; replaying", data_path, checkpoint_path)
+            checkpoint = None
+        else:
+            rows, mark = appended
+            if rows is None:
+                new_bars = checkpoint.tail.iloc[:0]
+            else:
+                if use_cache:
+                    extend_cached(data_path, rows, checkpoint.data_mark, mark)
+                skip = max(start_bar - checkpoint.data_mark.rows, 0)
+                new_bars = rows.iloc[skip:].reset_index(drop=True)
+    elif checkpoint is not None:
+        lead = len(checkpoint.tail)
+        df = load_data(data_path, start_bar + checkpoint.state.bars_seen - lead, -1, use_cache)
+        head = df.iloc[:lead].reset_index(drop=True)
+        if len(df) >= lead and head.equals(checkpoint.tail.reset_index(drop=True)):
+            new_bars = df.iloc[lead:].reset_index(drop=True)
+        else:
+            logger.warning("Bars before checkpoint %s changed; replaying", checkpoint_path)
+            checkpoint = None
+
+    if checkpoint is None:
+        new_bars = load_data(data_path, start_bar, -1, use_cache)
+        state = SimulatorState()
+        accumulator = TradeAccumulator(session)
+        tail = None
+        open_trade, open_days = TradeBatch.empty(), np.empty(0, dtype=np.int64)
+        first_ts = last_ts = None
+    else:
+        state = checkpoint.state
+        accumulator = TradeAccumulator(session)
+        accumulator.parts = [checkpoint.trades]
+        accumulator.day_ids = [checkpoint.exit_days]
+        accumulator.session_days = [checkpoint.session_days]
+        accumulator.has_timestamp = checkpoint.has_timestamp
+        tail = checkpoint.tail.iloc[max(len(checkpoint.tail) - warmup, 0):] if warmup > 0 else None
+        open_trade, open_days = checkpoint.open_trade, checkpoint.open_exit_days
+        first_ts, last_ts = checkpoint.first_ts, checkpoint.last_ts
+    resumed_from = state.bars_seen
+
+    next_tail = checkpoint.tail if checkpoint is not None else None
+    if len(new_bars) > 0:
+        offset = state.bars_seen
+        bars, next_tail = _run_strategy_on_chunk(strategy, tail, new_bars, offset, keep)
+
+        # The reported result closes any open position at the last bar; the
+        # checkpoint keeps it open so the next call can extend it.
+        reported = simulate_chunk(replace(state), bars, cost_model, final=True)
+        closed = simulate_chunk(state, bars, cost_model, final=False)
+        accumulator.add(closed, bars, offset)
+        pending = TradeAccumulator(session)
+        pending.add(_slice_batch(reported, len(closed)), bars, offset)
+        open_trade, open_days = pending.batch(), pending.exit_days()
+        accumulator.has_timestamp = accumulator.has_timestamp and pending.has_timestamp
+
+        if "timestamp" in bars.columns:
+            first_ts = bars["timestamp"].iloc[0] if first_ts is None else first_ts
+            last_ts = bars["timestamp"].iloc[-1]
+
+    if mark is None:
+        # Full read: one pass over the file to find a resume offset.
+        mark = mark_file(data_path, start_bar + state.bars_seen)
+
+    closed_trades = accumulator.batch()
+    BacktestCheckpoint(
+        identity=identity,
+        state=state,
+        trades=closed_trades,
+        exit_days=accumulator.exit_days(),
+        session_days=accumulator.days_seen(),
+        has_timestamp=accumulator.has_timestamp,
+        open_trade=open_trade,
+        open_exit_days=open_days,
+        tail=next_tail if next_tail is not None else new_bars.iloc[:0],
+        first_ts=first_ts,
+        last_ts=last_ts,
+        data_mark=mark,
+    ).save(checkpoint_path)
+
+    accumulator.parts.append(open_trade)
+    accumulator.day_ids.append(open_days)
+    trades = accumulator.batch()
+    date_range = {}
+    if first_ts is not None:
+        date_range = {"start": str(first_ts.date()), "end": str(last_ts.date())}
+
+    results = summarize_backtest(
+        strategy_name,
+        data_path,
+        cost_model,
+        trades,
+        state.bars_seen,
+        date_range,
+        accumulator.calendar(),
+        monte_carlo,
+        prop_firm,
+    )
+    results["incremental"] = {
+        "checkpoint": str(checkpoint_path),
+        "resumed_from_bar": resumed_from,
+        "bars_processed": state.bars_seen - resumed_from,
+    }
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Multi-strategy batches
+# ---------------------------------------------------------------------------
+
+# Leaderboard order: best grade first, failed strategies last.
+GRADE_RANK = {"good": 0, "under_review": 1, "rejected": 2}
+
+LEADERBOARD_METRICS = (
+    "sharpe_ratio",
+    "total_pnl",
+    "max_drawdown",
+    "win_rate",
+    "profit_factor",
+    "total_trades",
+)
+
+
+def resolve_strategy_paths(spec: str) -> list[str]:
+    """Expand a directory (its ``*.py`` files) or a glob into strategy paths.
+
+    Files starting with an underscore (``__init__.py``, helpers) are skipped.
+    """
+    path = Path(spec)
+    candidates = path.glob("*.py") if path.is_dir() else (Path(p) for p in glob.glob(spec, recursive=True))
+    return sorted(str(p) for p in candidates if p.is_file() and p.suffix == ".py" and not p.name.startswith("_"))
+
+
+def _batch_output_names(strategy_paths: Sequence[str]) -> list[str]:
+    """One results filename per strategy, suffixing repeated stems."""
+    names: list[str] = []
+    seen: dict[str, int] = {}
+    for path in strategy_paths:
+        stem = Path(path).stem
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(f"{stem}.json" if seen[stem] == 1 else f"{stem}-{seen[stem]}.json")
+    return names
+
+
+# Per-process batch state, populated once by _init_batch_worker.
+_BATCH_STATE: dict[str, Any] = {}
+
+
+def _init_batch_worker(
+    data: pd.DataFrame | SharedFrameHandle,
+    data_path: str,
+    cost_model: dict,
+    params: dict | None,
+    engine: str,
+    output_dir: str | None,
+    indicator_cache: IndicatorCache | None = None,
+    output_format: str = "json",
+    session: Session | None = None,
+    monte_carlo: MonteCarloConfig | None = None,
+    prop_firm: PropFirmConfig | None = None,
+) -> None:
+    if isinstance(data, SharedFrameHandle):
+        attached = attach_frame(data)
+        _BATCH_STATE["attached"] = attached  # keeps the blocks mapped
+        _BATCH_STATE["df"] = attached.df
+        _BATCH_STATE["shared"] = True
+    else:
+        _BATCH_STATE["df"] = data
+        _BATCH_STATE["shared"] = False
+    _BATCH_STATE["data_path"] = data_path
+    _BATCH_STATE["cost_model"] = cost_model
+    _BATCH_STATE["params"] = params
+    _BATCH_STATE["engine"] = engine
+    _BATCH_STATE["output_dir"] = output_dir
+    _BATCH_STATE["output_format"] = output_format
+    _BATCH_STATE["calendar"] = build_calendar(_BATCH_STATE["df"], session)
+    _BATCH_STATE["monte_carlo"] = monte_carlo
+    _BATCH_STATE["prop_firm"] = prop_firm
+    if indicator_cache is not None:
+        indicator_cache.bind(data_fingerprint(_BATCH_STATE["df"]))
+    _BATCH_STATE["indicator_cache"] = indicator_cache
+
+
+def _run_batch_strategy(strategy_path: str, output_name: str) -> tuple[dict, dict | None]:
+    """Backtest one strategy file against the worker's preloaded data.
+
+    Returns the leaderboard row and, when no output directory is set, the
+    full result (otherwise it is written to disk here, in the worker).
+    """
+    row: dict[str, Any] = {"strategy_path": strategy_path, "strategy_name": Path(strategy_path).stem}
+    try:
+        strategy = load_strategy(strategy_path, _BATCH_STATE["params"])
+        attach_indicator_cache(strategy, _BATCH_STATE["indicator_cache"], strategy_path)
+        row["strategy_name"] = getattr(strategy, "name", row["strategy_name"])
+        df = _BATCH_STATE["df"].copy(deep=not _BATCH_STATE["shared"])
+        result = backtest_frame(
+            strategy, df, _BATCH_STATE["cost_model"], _BATCH_STATE["data_path"],
+            _BATCH_STATE["engine"], row["strategy_name"], calendar=_BATCH_STATE["calendar"],
+            monte_carlo=_BATCH_STATE["monte_carlo"], prop_firm=_BATCH_STATE["prop_firm"],
+        )
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row, None
+
+    row["grade"] = result["grade"]
+    row["pass"] = result["pass"]
+    row.update({k: result["metrics"][k] for k in LEADERBOARD_METRICS})
+
+    if _BATCH_STATE["output_dir"] is None:
+        return row, result
+    out_path = Path(_BATCH_STATE["output_dir"]) / output_name
+    write_result(result, out_path, _BATCH_STATE["output_format"])
+    row["output"] = str(out_path)
+    return row, None
+
+
+def _leaderboard_key(row: dict) -> tuple:
+    if "error" in row:
+        return (len(GRADE_RANK) + 1, 0.0, row["strategy_path"])
+    return (GRADE_RANK.get(row["grade"], len(GRADE_RANK)), -row["sharpe_ratio"], row["strategy_path"])
+
+
+def run_strategy_batch(
+    strategy_paths: Sequence[str],
+    df: pd.DataFrame,
+    cost_model: dict,
+    data_path: str = "",
+    params: dict | None = None,
+    workers: int | None = None,
+    output_dir: str | None = None,
+    engine: str = "vectorized",
+    use_shared_memory: bool = False,
+    indicator_cache: IndicatorCache | None = None,
+    output_format: str = "json",
+    session: Session | str | None = None,
+    monte_carlo: MonteCarloConfig | None = None,
+    prop_firm: PropFirmConfig | None = None,
+) -> dict:
+    """Backtest many strategy files against one loaded dataset.
+
+    Workers receive the data once and run strategies in parallel. A
+    strategy that raises is recorded as a failed row without affecting the
+    others; if a strategy takes its worker process down, the unfinished
+    strategies are retried one process each so only the culprit fails.
+
+    Args:
+        strategy_paths: Strategy .py files (see ``resolve_strategy_paths``).
+        df: OHLCV dataframe shared by every strategy.
+        cost_model: Cost model dict.
+        data_path: Source of ``df``, recorded in each result.
+        params: Optional parameter override passed to every strategy.
+        workers: Process count (default: CPU count). ``1`` runs in-process.
+        output_dir: Directory receiving one results JSON per strategy. When
+            unset, full results are returned under ``"results"`` instead.
+        engine: Trade simulation engine (see ``simulate_trades``).
+        use_shared_memory: Share the OHLCV columns with workers instead of
+            pickling ``df`` to each of them.
+        indicator_cache: Optional indicator cache for opted-in strategies;
+            each strategy file reads and writes its own namespace in it.
+        output_format: Format of the per-strategy files (see
+            ``lib.result_io.OUTPUT_FORMATS``).
+        session: Trading-day session for period returns (see
+            ``run_backtest``); each worker builds the calendar once.
+        monte_carlo: Optional trade-resampling settings applied to every
+            strategy (see ``run_backtest``).
+        prop_firm: Optional prop-firm validation applied to every strategy
+            (see ``run_backtest``).
+
+    Returns:
+        Batch summary with a leaderboard sorted by grade, then Sharpe.
+    """
+    strategy_paths = list(strategy_paths)
+    names = _batch_output_names(strategy_paths)
+    if output_dir is not None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    rows: dict[int, dict] = {}
+    full_results: dict[int, dict] = {}
+
+    def _record(index: int, outcome: tuple[dict, dict | None]) -> None:
+        row, result = outcome
+        rows[index] = row
+        if result is not None:
+            full_results[index] = result
+        logger.info(
+            "Strategy %s finished (%d/%d): %s",
+            row["strategy_path"], len(rows), len(strategy_paths), row.get("grade", row.get("error")),
+        )
+
+    init_args = (
+        df, str(data_path), cost_model, params, engine, output_dir, indicator_cache, output_format,
+        resolve_session(session), monte_carlo, prop_firm,
+    )
+    n_workers = workers or os.cpu_count() or 1
+    if n_workers == 1 or len(strategy_paths) <= 1:
+        _init_batch_worker(*init_args)
+        try:
+            for i, path in enumerate(strategy_paths):
+                _record(i, _run_batch_strategy(path, names[i]))
+        finally:
+            _BATCH_STATE.clear()
+            if indicator_cache is not None:
+                indicator_cache.bind(None)
+    elif strategy_paths:
+        with contextlib.ExitStack() as stack:
+            if use_shared_memory:
+                init_args = (stack.enter_context(share_frame(df)).handle, *init_args[1:])
+
+            crashed: list[int] = []
+            with ProcessPoolExecutor(
+                max_workers=min(n_workers, len(strategy_paths)),
+                initializer=_init_batch_worker,
+                initargs=init_args,
+            ) as pool:
+                futures = {
+                    pool.submit(_run_batch_strategy, path, names[i]): i
+                    for i, path in enumerate(strategy_paths)
+                }
+                for future in as_completed(futures):
+                    try:
+                        _record(futures[future], future.result())
+                    except BrokenProcessPool:
+                        crashed.append(futures[future])
+
+            if crashed:
+                logger.warning("A worker process died; retrying %d strategies in isolation", len(crashed))
+            for i in sorted(crashed):
+                # One process per strategy so only the culprit fails.
+                with ProcessPoolExecutor(max_workers=1, initializer=_init_batch_worker, initargs=init_args) as pool:
+                    try:
+                        _record(i, pool.submit(_run_batch_strategy, strategy_paths[i], names[i]).result())
+                    except BrokenProcessPool:
+                        row = {
+                            "strategy_path": strategy_paths[i],
+                            "strategy_name": Path(strategy_paths[i]).stem,
+                            "error": "BrokenProcessPool: worker process died",
+                        }
+                        _record(i, (row, None))
+
+    leaderboard = sorted((rows[i] for i in range(len(strategy_paths))), key=_leaderboard_key)
+    for rank, row in enumerate(leaderboard, 1):
+        row["rank"] = rank
+
+    summary: dict[str, Any] = {
+        "mode": "strategy_batch",
+        "data_file": str(data_path),
+        "bars_tested": len(df),
+        "total_strategies": len(strategy_paths),
+        "failed_strategies": sum(1 for r in leaderboard if "error" in r),
+        "leaderboard": leaderboard,
+    }
+    if output_dir is None:
+        summary["results"] = [full_results[i] for i in sorted(full_results)]
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Multi-asset portfolios
+# ---------------------------------------------------------------------------
+
+# Per-symbol result keys kept in a portfolio result (trade logs stay out).
+PORTFOLIO_SYMBOL_KEYS = ("data_file", "bars_tested", "date_range", "metrics", "anti_overfit_flags", "pass", "grade")
+
+
+def parse_portfolio_spec(specs: Sequence[str]) -> dict[str, str]:
+    """Map ``SYMBOL=path`` (or bare ``path``, named by its file stem) entries to paths."""
+    portfolio: dict[str, str] = {}
+    for spec in specs:
+        symbol, sep, path = spec.partition("=")
+        if not sep:
+            symbol, path = Path(spec).stem, spec
+        if symbol in portfolio:
+            raise ValueError(f"Duplicate portfolio symbol {symbol!r}; name files as SYMBOL=path")
+        portfolio[symbol] = path
+    return portfolio
+
+
+def _run_portfolio_symbol(
+    symbol: str,
+    strategy_path: str,
+    data_path: str,
+    cost_model: dict,
+    params: dict | None,
+    engine: str,
+    use_cache: bool,
+    session: Session,
+) -> tuple[str, dict, SymbolEquity]:
+    """Backtest one symbol; returns the strategy name, its summary and per-bar equity, all in dollars."""
+    df = load_data(data_path, use_cache=use_cache)
+    if "timestamp" not in df.columns:
+        raise ValueError(f"{symbol}: portfolio mode needs timestamps to align symbols ({data_path})")
+    stamps = timestamps_ns(df["timestamp"])
+    closes = df["close"].to_numpy(dtype=np.float64)
+    calendar = build_calendar(df, session)
+
+    strategy = load_strategy(strategy_path, params)
+    df = strategy.signals(strategy.indicators(df))
+    trades = simulate_trades(df, cost_model, engine)
+    date_range = {
+        "start": str(df["timestamp"].iloc[0].date()),
+        "end": str(df["timestamp"].iloc[-1].date()),
+    } if len(df) else {}
+    strategy_name = getattr(strategy, "name", Path(strategy_path).stem)
+    multiplier = point_value(cost_model)
+    dollar_trades = replace(trades, pnl=pnl_in_dollars(trades, cost_model, multiplier))
+    result = summarize_backtest(
+        strategy_name, data_path, cost_model, dollar_trades, len(df), date_range,
+        calendar.for_trades(dollar_trades.exit_bar),
+    )
+    summary = {key: result[key] for key in PORTFOLIO_SYMBOL_KEYS}
+    equity = mark_to_market(dollar_trades, closes, multiplier)
+    return strategy_name, summary, SymbolEquity(symbol, stamps, equity, calendar.day)
+
+
+def run_portfolio(
+    strategy_path: str,
+    data_paths: dict[str, str],
+    cost_model: dict,
+    params: dict | None = None,
+    engine: str = "vectorized",
+    workers: int | None = None,
+    use_cache: bool = True,
+    session: Session | str | None = None,
+    symbol_cost_models: dict[str, dict] | None = None,
+) -> dict:
+    """Run one strategy on several symbols and aggregate them as a portfolio.
+
+    Each symbol is backtested in its own process. Per-bar mark-to-market
+    equity is converted to dollars with the symbol's point value (see
+    ``point_value``) and summed on the union of the symbols' timestamps (see
+    ``lib.portfolio``), and daily PnL is attributed to ``session`` trading
+    days, so symbols with different hours line up without a dense
+    symbols x timestamps frame. Every symbol's cost model must give a point
+    value; points of different contracts are never summed.
+
+    Args:
+        strategy_path: Path to strategy .py file.
+        data_paths: ``{symbol: data file}`` (see ``parse_portfolio_spec``).
+        cost_model: Cost model dict for every symbol without an override.
+        params: Optional strategy parameters.
+        engine: Trade simulation engine (see ``simulate_trades``).
+        workers: Process count (default: one per symbol, up to CPU count).
+        use_cache: Load data through the memory-mapped cache.
+        session: Trading-day session for daily PnL (see ``run_backtest``).
+        symbol_cost_models: Optional ``{symbol: cost model}`` overrides.
+
+    Returns:
+        Portfolio metrics (daily Sharpe/Sortino, mark-to-market drawdown),
+        the daily-PnL correlation matrix, per-symbol contribution and
+        summaries, daily returns and a sampled equity curve, all in dollars,
+        plus the ``point_values`` used per symbol.
+    """
+    if not data_paths:
+        raise ValueError("Portfolio mode needs at least one data file")
+    session = resolve_session(session)
+    symbol_cost_models = symbol_cost_models or {}
+    unknown = set(symbol_cost_models) - set(data_paths)
+    if unknown:
+        raise ValueError(f"Cost models given for symbols not in the portfolio: {sorted(unknown)}")
+    symbols = list(data_paths)
+    point_values = {symbol: point_value(symbol_cost_models.get(symbol, cost_model)) for symbol in symbols}
+    missing = [symbol for symbol, value in point_values.items() if value is None]
+    if missing:
+        raise ValueError(
+            f"No point value for {missing}: set \"point_value\" (or \"tick_value\" and \"tick_size\") "
+            "in their cost models so the portfolio can be summed in dollars"
+        )
+    jobs = [
+        (symbol, strategy_path, data_paths[symbol], symbol_cost_models.get(symbol, cost_model),
+         params, engine, use_cache, session)
+        for symbol in symbols
+    ]
+
+    outcomes: dict[str, tuple[str, dict, SymbolEquity]] = {}
+    n_workers = min(workers or os.cpu_count() or 1, len(symbols))
+    if n_workers == 1:
+        for job in jobs:
+            outcomes[job[0]] = _run_portfolio_symbol(*job)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {pool.submit(_run_portfolio_symbol, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                outcomes[futures[future]] = future.result()
+                logger.info("Symbol %s finished (%d/%d)", futures[future], len(outcomes), len(symbols))
+
+    streams = [outcomes[symbol][2] for symbol in symbols]
+    summaries = {symbol: outcomes[symbol][1] for symbol in symbols}
+    report = portfolio_report(streams, session.periods_per_year)
+    report["metrics"]["total_trades"] = sum(summary["metrics"]["total_trades"] for summary in summaries.values())
+    for symbol, summary in summaries.items():
+        report["contribution"][symbol]["total_trades"] = summary["metrics"]["total_trades"]
+
+    return {
+        "mode": "portfolio",
+        "strategy_name": outcomes[symbols[0]][0],
+        "symbols": symbols,
+        "cost_model": cost_model,
+        "symbol_cost_models": symbol_cost_models,
+        "point_values": point_values,
+        "session": session.name,
+        **report,
+        "symbol_results": summaries,
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -733,18 +3035,63 @@ Examples:
     --data data/samples/ES_5min_sample.csv \\
     --walk-forward '{"train_bars": 300, "test_bars": 100, "step_bars": 100}' \\
     --cost-model '{"type": "futures", "commission_per_side": 2.50, "slippage_ticks": 0.5, "tick_value": 12.50}'
+
+  # Parameter sweep across 4 worker processes (resumable)
+  python lib/backtest_runner.py \\
+    --strategy seed/sample_strategy.py \\
+    --data data/samples/ES_5min_sample.csv \\
+    --param-grid '{"fast_period": [5, 10], "slow_period": [20, 30, 50]}' \\
+    --workers 4 --sweep-results output/sweeps/sma.jsonl
+
+  # Every strategy in a directory against one dataset, ranked
+  python lib/backtest_runner.py \\
+    --strategies seed/ \\
+    --data data/samples/ES_5min_sample.csv \\
+    --batch-dir output/backtests/batch
+
+  # Per-stage timings plus a cProfile dump of the strategy code
+  python lib/backtest_runner.py \\
+    --strategy seed/sample_strategy.py \\
+    --data data/samples/ES_5min_sample.csv \\
+    --profile-dump output/profiles/sample.pstats
         """,
     )
     parser.add_argument(
         "--strategy",
-        required=True,
+        default=None,
         help="Path to strategy .py file defining a Strategy class",
     )
+    parser.add_argument(
+        "--strategies",
+        default=None,
+        help="Batch mode: directory or glob of strategy .py files to run against the same data",
+    )
+    parser.add_argument(
+        "--batch-dir",
+        type=str,
+        default="output/backtests/batch",
+        help="Batch mode: directory receiving one results JSON per strategy (default: output/backtests/batch)",
+    )
     parser.add_argument(
         "--data",
-        required=True,
+        default=None,
         help="Path to OHLCV CSV data file",
     )
+    parser.add_argument(
+        "--portfolio",
+        nargs="+",
+        default=None,
+        metavar="[SYMBOL=]PATH",
+        help="Portfolio mode (instead of --data): run the strategy on each data file in parallel and "
+             "aggregate mark-to-market equity on the union of their timestamps",
+    )
+    parser.add_argument(
+        "--symbol-cost-models",
+        type=str,
+        default=None,
+        help='Portfolio mode: per-symbol cost model overrides as JSON, e.g. \'{"BTCUSDT": {"type": "crypto_cex"}}\'; '
+        'futures models need "point_value" (or "tick_value" and "tick_size") to sum symbols in dollars',
+    )
     parser.add_argument(
         "--cost-model",
         type=str,
@@ -769,18 +3116,187 @@ Examples:
         default=None,
         help="Output file path for JSON results (default: stdout)",
     )
+    parser.add_argument(
+        "--session",
+        type=str,
+        default=None,
+        help="Trading-day session for monthly/weekly/daily returns and daily Sharpe/Sortino: "
+             "'calendar' (default, the timestamps' own dates), '24/7', 'CME' (17:00 Chicago "
+             'open rolls into the next day) or JSON {"tz": ..., "start": "HH:MM", "periods_per_year": N}',
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="Result layout: 'json' (pretty, per-trade dicts), 'compact' (minified, trade log and "
+             "equity curve as columns) or 'npz' (summary JSON plus a compressed .trades.npz sidecar; "
+             "needs --output or --batch-dir) (default: json)",
+    )
+    parser.add_argument(
+        "--chunk-bars",
+        type=int,
+        default=None,
+        help="Stream the data in chunks of N bars instead of loading it all (standard backtests only)",
+    )
+    parser.add_argument(
+        "--warmup-bars",
+        type=int,
+        default=None,
+        help="Chunked mode: look-back bars carried between chunks (default: the strategy's warmup_bars)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Resume from / update this checkpoint so only newly appended bars are processed",
+    )
     parser.add_argument(
         "--walk-forward",
         type=str,
         default=None,
         help='JSON walk-forward config: {"train_bars": N, "test_bars": M, "step_bars": S}',
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Walk-forward: number of processes evaluating folds in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--fold-stream",
+        type=str,
+        default=None,
+        help="Walk-forward: write each fold as an NDJSON line, in order, as it finishes ('-' for stdout)",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Walk-forward: prove each fold's indicators/signals use no bars beyond its window (plus warm-up)",
+    )
     parser.add_argument(
         "--params",
         type=str,
         default=None,
         help="JSON string with strategy parameters override",
     )
+    parser.add_argument(
+        "--param-grid",
+        type=str,
+        default=None,
+        help='JSON parameter grid to sweep: {"name": [v1, v2], ...} (cartesian product)',
+    )
+    parser.add_argument(
+        "--param-list",
+        type=str,
+        default=None,
+        help="JSONL file with one parameter override object per line to sweep",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for sweeps, batches and portfolios (default: CPU count)",
+    )
+    parser.add_argument(
+        "--sweep-results",
+        type=str,
+        default=None,
+        help="JSONL file that streams finished sweep combos and enables resume",
+    )
+    parser.add_argument(
+        "--shared-memory",
+        action="store_true",
+        help="Share OHLCV columns with worker processes via shared memory instead of copying",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse the CSV directly instead of using the memory-mapped data cache",
+    )
+    parser.add_argument(
+        "--indicator-cache-mb",
+        type=int,
+        default=0,
+        help="Memoize indicator columns with this in-memory budget per worker process in MB, for sweeps and "
+             "walk-forward runs that recompute the same indicators (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--indicator-cache-dir",
+        type=str,
+        default=None,
+        help="Directory to spill cached indicator columns to, shared across workers and runs "
+             "(needs --indicator-cache-mb)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=SIMULATION_ENGINES,
+        default="vectorized",
+        help="Trade simulation engine; 'loop' is the per-bar reference oracle (default: vectorized)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record wall/CPU time, peak memory and rows per stage in a 'timings' output block "
+             "(standard and walk-forward backtests)",
+    )
+    parser.add_argument(
+        "--profile-dump",
+        type=str,
+        default=None,
+        help="Also run the strategy code under cProfile and write pstats data here (implies --profile)",
+    )
+    parser.add_argument(
+        "--monte-carlo",
+        type=int,
+        default=0,
+        metavar="PATHS",
+        help="Resample the trade PnL into PATHS paths and report drawdown, Sharpe, recovery and ruin "
+             "percentiles (feeds the mc_* anti-overfit flags; 0 = off). Not for sweeps or walk-forward",
+    )
+    parser.add_argument(
+        "--mc-method",
+        choices=MONTE_CARLO_METHODS,
+        default="bootstrap",
+        help="Monte Carlo resampling: bootstrap (with replacement) or permutation (reorder only)",
+    )
+    parser.add_argument(
+        "--mc-seed",
+        type=int,
+        default=0,
+        help="Monte Carlo random seed",
+    )
+    parser.add_argument(
+        "--mc-ruin-dd",
+        type=float,
+        default=None,
+        help="Drawdown in dollars counted as ruin (default: twice the backtest's max drawdown)",
+    )
+    parser.add_argument(
+        "--prop-firm",
+        action="store_true",
+        help="Validate the trades against the prop-firm rules in process and add the report under "
+             "'prop_firm' (trading days follow --session; PnL is converted to dollars, so the cost model needs "
+             "\"point_value\" or \"tick_value\" and \"tick_size\"). Not for sweeps, walk-forward or portfolios",
+    )
+    parser.add_argument(
+        "--prop-firm-rules",
+        type=str,
+        default=None,
+        help="Prop-firm rules JSON (default: docs/prop-firms/prop-firm-rules.json)",
+    )
+    parser.add_argument(
+        "--prop-firm-account-sizes",
+        type=str,
+        default=None,
+        help="Comma-separated account sizes to test where firms offer them (default: 50000,100000)",
+    )
+    parser.add_argument(
+        "--prop-firm-mc",
+        type=int,
+        default=0,
+        metavar="PATHS",
+        help="Also estimate evaluation pass probabilities over PATHS bootstrapped windows (0 = off)",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -821,8 +3337,181 @@ def main(argv: list[str] | None = None) -> int:
             print(f"Error: Invalid --params JSON: {e}", file=sys.stderr)
             return 1
 
+    if bool(args.strategy) == bool(args.strategies):
+        print("Error: Pass exactly one of --strategy or --strategies", file=sys.stderr)
+        return 1
+    if bool(args.data) == bool(args.portfolio):
+        print("Error: Pass exactly one of --data or --portfolio", file=sys.stderr)
+        return 1
+    if args.portfolio and (args.strategies or args.param_grid or args.param_list or args.walk_forward
+                           or args.chunk_bars is not None or args.checkpoint or args.monte_carlo):
+        print("Error: --portfolio only applies to standard single-strategy backtests", file=sys.stderr)
+        return 1
+    if args.symbol_cost_models and not args.portfolio:
+        print("Error: --symbol-cost-models needs --portfolio", file=sys.stderr)
+        return 1
+    if args.strategies and (args.param_grid or args.param_list or args.walk_forward):
+        print("Error: --strategies cannot be combined with sweeps or walk-forward", file=sys.stderr)
+        return 1
+
+    if args.param_grid and args.param_list:
+        print("Error: Use either --param-grid or --param-list, not both", file=sys.stderr)
+        return 1
+    if args.chunk_bars is not None and (args.strategies or args.param_grid or args.param_list or args.walk_forward):
+        print("Error: --chunk-bars only applies to standard single-strategy backtests", file=sys.stderr)
+        return 1
+    if args.checkpoint and (args.chunk_bars is not None or args.strategies or args.param_grid
+                            or args.param_list or args.walk_forward):
+        print("Error: --checkpoint only applies to standard single-strategy backtests", file=sys.stderr)
+        return 1
+
     try:
-        if args.walk_forward:
+        session = resolve_session(args.session)
+    except (TypeError, ValueError) as e:
+        print(f"Error: Invalid --session: {e}", file=sys.stderr)
+        return 1
+
+    if args.output_format == "npz" and not (args.output or args.strategies):
+        print("Error: --output-format npz writes a sidecar file and needs --output", file=sys.stderr)
+        return 1
+
+    profile = args.profile or bool(args.profile_dump)
+    if profile and (args.strategies or args.param_grid or args.param_list
+                    or args.chunk_bars is not None or args.checkpoint or args.portfolio):
+        print("Error: --profile only applies to standard and walk-forward backtests", file=sys.stderr)
+        return 1
+    timer = StageTimer(profile_code=bool(args.profile_dump)) if profile else None
+
+    monte_carlo = None
+    if args.monte_carlo < 0:
+        print("Error: --monte-carlo must be a non-negative path count", file=sys.stderr)
+        return 1
+    if args.monte_carlo:
+        if args.param_grid or args.param_list or args.walk_forward:
+            print("Error: --monte-carlo does not apply to sweeps or walk-forward", file=sys.stderr)
+            return 1
+        monte_carlo = MonteCarloConfig(
+            paths=args.monte_carlo, method=args.mc_method, seed=args.mc_seed, ruin_drawdown=args.mc_ruin_dd
+        )
+
+    prop_firm = None
+    if args.prop_firm:
+        if args.portfolio or args.param_grid or args.param_list or args.walk_forward:
+            print("Error: --prop-firm does not apply to sweeps, walk-forward or portfolios", file=sys.stderr)
+            return 1
+        if args.prop_firm_mc < 0:
+            print("Error: --prop-firm-mc must be a non-negative path count", file=sys.stderr)
+            return 1
+        if point_value(cost_model) is None:
+            print(f"Error: {PROP_FIRM_POINT_VALUE_ERROR}", file=sys.stderr)
+            return 1
+        try:
+            account_sizes = tuple(
+                int(size) for size in (args.prop_firm_account_sizes or "").split(",") if size.strip()
+            )
+        except ValueError:
+            print("Error: --prop-firm-account-sizes must be comma-separated integers", file=sys.stderr)
+            return 1
+        prop_firm = PropFirmConfig(
+            rules_path=args.prop_firm_rules or str(DEFAULT_RULES_FILE),
+            account_sizes=account_sizes or DEFAULT_ACCOUNT_SIZES,
+            pass_probability=(
+                PassProbabilityConfig(paths=args.prop_firm_mc, seed=args.mc_seed) if args.prop_firm_mc else None
+            ),
+        )
+        try:
+            # Fail before the backtest rather than after it (and warm the rules cache).
+            load_compiled_rules(prop_firm.rules_path)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    elif args.prop_firm_rules or args.prop_firm_account_sizes or args.prop_firm_mc:
+        print("Error: --prop-firm-* options need --prop-firm", file=sys.stderr)
+        return 1
+
+    if args.indicator_cache_mb < 0:
+        print("Error: --indicator-cache-mb must be non-negative", file=sys.stderr)
+        return 1
+    if args.indicator_cache_dir and not args.indicator_cache_mb:
+        print("Error: --indicator-cache-dir needs --indicator-cache-mb", file=sys.stderr)
+        return 1
+    indicator_cache = None
+    if args.indicator_cache_mb > 0:
+        indicator_cache = IndicatorCache(args.indicator_cache_mb * 1024 * 1024, args.indicator_cache_dir)
+
+    try:
+        if args.portfolio:
+            # Multi-asset portfolio mode
+            try:
+                data_paths = parse_portfolio_spec(args.portfolio)
+                symbol_cost_models = json.loads(args.symbol_cost_models) if args.symbol_cost_models else None
+            except (ValueError, json.JSONDecodeError) as e:
+                print(f"Error: Invalid portfolio spec: {e}", file=sys.stderr)
+                return 1
+            results = run_portfolio(
+                args.strategy,
+                data_paths,
+                cost_model,
+                params=params,
+                engine=args.engine,
+                workers=args.workers,
+                use_cache=not args.no_cache,
+                session=session,
+                symbol_cost_models=symbol_cost_models,
+            )
+        elif args.strategies:
+            # Multi-strategy batch mode
+            strategy_paths = resolve_strategy_paths(args.strategies)
+            if not strategy_paths:
+                print(f"Error: No strategy files match {args.strategies}", file=sys.stderr)
+                return 1
+            df = load_data(args.data, args.start_bar, args.end_bar, not args.no_cache)
+            results = run_strategy_batch(
+                strategy_paths,
+                df,
+                cost_model,
+                data_path=args.data,
+                params=params,
+                workers=args.workers,
+                output_dir=args.batch_dir,
+                engine=args.engine,
+                use_shared_memory=args.shared_memory,
+                indicator_cache=indicator_cache,
+                output_format=args.output_format,
+                session=session,
+                monte_carlo=monte_carlo,
+                prop_firm=prop_firm,
+            )
+        elif args.param_grid or args.param_list:
+            # Parameter sweep mode
+            if args.param_grid:
+                try:
+                    grid = json.loads(args.param_grid)
+                except json.JSONDecodeError as e:
+                    print(f"Error: Invalid --param-grid JSON: {e}", file=sys.stderr)
+                    return 1
+                if not isinstance(grid, dict):
+                    print("Error: --param-grid must be a JSON object", file=sys.stderr)
+                    return 1
+                combos = expand_param_grid(grid)
+            else:
+                combos = load_param_list(args.param_list)
+
+            df = load_data(args.data, args.start_bar, args.end_bar, not args.no_cache)
+            results = run_param_sweep(
+                args.strategy,
+                df,
+                cost_model,
+                combos,
+                params=params,
+                workers=args.workers,
+                results_path=args.sweep_results,
+                engine=args.engine,
+                use_shared_memory=args.shared_memory,
+                indicator_cache=indicator_cache,
+                session=session,
+            )
+        elif args.walk_forward:
             # Walk-forward mode
             try:
                 wf_config = json.loads(args.walk_forward)
@@ -838,9 +3527,47 @@ def main(argv: list[str] | None = None) -> int:
                 )
                 return 1
 
-            df = load_data(args.data, args.start_bar, args.end_bar)
-            results = run_walk_forward(
-                args.strategy, df, cost_model, wf_config, params
+            with optional_stage(timer, "load_data") as stage:
+                df = load_data(args.data, args.start_bar, args.end_bar, not args.no_cache)
+                stage.rows = len(df)
+            with contextlib.ExitStack() as stack:
+                fold_stream = None
+                if args.fold_stream == "-":
+                    fold_stream = sys.stdout
+                elif args.fold_stream:
+                    stream_path = Path(args.fold_stream)
+                    stream_path.parent.mkdir(parents=True, exist_ok=True)
+                    fold_stream = stack.enter_context(open(stream_path, "w"))
+                results = run_walk_forward(
+                    args.strategy,
+                    df,
+                    cost_model,
+                    wf_config,
+                    params,
+                    engine=args.engine,
+                    strict=args.strict,
+                    jobs=args.jobs,
+                    fold_stream=fold_stream,
+                    use_shared_memory=args.shared_memory,
+                    indicator_cache=indicator_cache,
+                    timer=timer,
+                    session=session,
+                )
+        elif args.chunk_bars is not None:
+            # Out-of-core standard backtest
+            results = run_backtest_chunked(
+                strategy_path=args.strategy,
+                data_path=args.data,
+                cost_model=cost_model,
+                chunk_bars=args.chunk_bars,
+                start_bar=args.start_bar,
+                end_bar=args.end_bar,
+                params=params,
+                warmup_bars=args.warmup_bars,
+                use_cache=not args.no_cache,
+                session=session,
+                monte_carlo=monte_carlo,
+                prop_firm=prop_firm,
             )
         else:
             # Standard backtest
@@ -851,17 +3578,37 @@ def main(argv: list[str] | None = None) -> int:
                 start_bar=args.start_bar,
                 end_bar=args.end_bar,
                 params=params,
+                engine=args.engine,
+                use_cache=not args.no_cache,
+                indicator_cache=indicator_cache,
+                checkpoint=args.checkpoint,
+                timer=timer,
+                session=session,
+                monte_carlo=monte_carlo,
+                prop_firm=prop_firm,
             )
 
-        # Output
-        output_json = json.dumps(results, indent=2, default=str)
+        # Output (kept to a single line when stdout is already an NDJSON fold stream)
+        indent = None if args.fold_stream == "-" and not args.output else 2
+        if timer is None:
+            encoded = encode_result(results, args.output_format, indent)
+        else:
+            # Serialization is timed on the results as they stand, then the
+            # final timings block (including it) is added and re-serialized.
+            with timer.stage("serialize"):
+                encode_result(results, args.output_format, indent)
+            results["timings"] = timer.to_dict()
+            if args.profile_dump:
+                dump_path = Path(args.profile_dump)
+                dump_path.parent.mkdir(parents=True, exist_ok=True)
+                timer.dump_profile(str(dump_path))
+                results["timings"]["profile_dump"] = str(dump_path)
+            encoded = encode_result(results, args.output_format, indent)
         if args.output:
-            out_path = Path(args.output)
-            out_path.parent.mkdir(parents=True, exist_ok=True)
-            out_path.write_text(output_json)
+            write_encoded(encoded, args.output)
             print(f"Results written to {args.output}", file=sys.stderr)
         else:
-            print(output_json)
+            print(encoded[".json"].decode())
 
         return 0
 
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmarks for the backtest runner.
+
+Generates seeded synthetic OHLCV (see ``lib/synthetic_data.py``) at one or
+more sizes and times every stage of a backtest: CSV parsing, the binary
+cache, the strategy's ``indicators()``/``signals()``, ``simulate_trades``,
+``compute_metrics`` and ``run_walk_forward``. Each stage reports wall and
+CPU time, bars/sec and peak RSS; results are saved as JSON so a later run
+can be compared against them.
+
+Usage::
+
+    # Record a baseline
+    python lib/benchmark.py --bars 10000,1000000 --output output/benchmarks/baseline.json
+
+    # Compare the working tree against it (exit code 1 on regressions)
+    python lib/benchmark.py --bars 10000,1000000 --compare output/benchmarks/baseline.json
+
+Fixtures are the SMA crossover demo (``seed/sample_strategy.py``) and a
+high-turnover strategy (``seed/high_turnover_strategy.py``) whose look-back
+``--turnover-period`` controls how often it trades.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime as dt
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+if __package__ in (None, ""):
+    # Executed as ``python lib/benchmark.py``: make ``lib.*`` importable.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib import backtest_runner as runner  # noqa: E402
+from lib.data_cache import invalidate  # noqa: E402
+from lib.profiling import StageTimer  # noqa: E402
+from lib.synthetic_data import write_ohlcv_csv  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+FIXTURES = {
+    "sma": PROJECT_ROOT / "seed" / "sample_strategy.py",
+    "high_turnover": PROJECT_ROOT / "seed" / "high_turnover_strategy.py",
+}
+
+# ``generate_csv`` is fixture setup: reported, never compared.
+SETUP_STAGES = ("generate_csv",)
+DATA_STAGES = ("load_data", "cache_build", "load_data_cached")
+STRATEGY_STAGES = ("indicators", "signals", "simulate_trades", "compute_metrics", "run_walk_forward")
+
+# Stages faster than this in the baseline are too noisy to flag.
+MIN_COMPARE_SECONDS = 0.05
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment_info() -> dict:
+    return {
+        "commit": _git_commit(),
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+@contextlib.contextmanager
+def _isolated_cache(directory: Path) -> Iterator[None]:
+    """Point the data cache at ``directory`` for the duration of the block."""
+    previous = os.environ.get("SIGMA_QUANT_DATA_CACHE")
+    os.environ["SIGMA_QUANT_DATA_CACHE"] = str(directory)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("SIGMA_QUANT_DATA_CACHE", None)
+        else:
+            os.environ["SIGMA_QUANT_DATA_CACHE"] = previous
+
+
+def benchmark_data(n_bars: int, seed: int, workdir: Path, stages: set[str]) -> tuple[pd.DataFrame, dict]:
+    """Time writing, parsing and caching ``n_bars`` synthetic bars.
+
+    Returns the loaded frame (used by the strategy stages) and the timings.
+    """
+    timer = StageTimer()
+    csv_path = workdir / f"synthetic_{n_bars}_{seed}.csv"
+
+    if not csv_path.exists():
+        with timer.stage("generate_csv", rows=n_bars):
+            write_ohlcv_csv(csv_path, n_bars, seed)
+
+    df = None
+    if "load_data" in stages:
+        with timer.stage("load_data", rows=n_bars):
+            df = runner.load_data(str(csv_path), use_cache=False)
+
+    with _isolated_cache(workdir / "cache"):
+        if "cache_build" in stages or "load_data_cached" in stages:
+            invalidate(str(csv_path))  # time a real build, not a hit from an earlier repeat
+            with timer.stage("cache_build", rows=n_bars):
+                runner.load_data(str(csv_path))
+        if "load_data_cached" in stages or df is None:
+            with timer.stage("load_data_cached", rows=n_bars):
+                df = runner.load_data(str(csv_path))
+                # Touch every column so lazily mapped pages count too.
+                for col in ("open", "high", "low", "close"):
+                    float(df[col].to_numpy().sum())
+
+    timings = timer.to_dict()
+    timings["stages"] = {k: v for k, v in timings["stages"].items() if k in stages or k in SETUP_STAGES}
+    return df, timings
+
+
+def benchmark_strategy(
+    df: pd.DataFrame,
+    strategy_path: Path,
+    params: dict | None,
+    cost_model: dict,
+    stages: set[str],
+) -> dict:
+    """Time each backtest stage of one strategy on a loaded frame."""
+    timer = StageTimer()
+    n_bars = len(df)
+    strategy = runner.load_strategy(str(strategy_path), params)
+    frame = df.copy()
+
+    with timer.stage("indicators", rows=n_bars):
+        frame = strategy.indicators(frame)
+    with timer.stage("signals", rows=n_bars):
+        frame = strategy.signals(frame)
+    with timer.stage("simulate_trades", rows=n_bars):
+        trades = runner.simulate_trades(frame, cost_model)
+    with timer.stage("compute_metrics", rows=n_bars):
+        runner.compute_metrics(trades)
+        runner.compute_monthly_returns(trades, frame)
+        runner.compute_equity_curve(trades, n_bars, max(10, n_bars // 100))
+    del frame
+
+    if "run_walk_forward" in stages and n_bars >= 100:
+        wf_config = {"train_bars": n_bars // 5, "test_bars": n_bars // 10, "step_bars": n_bars // 10}
+        with timer.stage("run_walk_forward", rows=n_bars):
+            runner.run_walk_forward(str(strategy_path), df, cost_model, wf_config, params)
+
+    timings = timer.to_dict()
+    timings["stages"] = {k: v for k, v in timings["stages"].items() if k in stages}
+    timings["total_trades"] = len(trades)
+    return timings
+
+
+def run_benchmarks(
+    sizes: list[int],
+    strategies: list[str],
+    seed: int = 0,
+    stages: set[str] | None = None,
+    turnover_period: int = 3,
+    cost_model: dict | None = None,
+    data_dir: str | None = None,
+    repeat: int = 1,
+) -> dict:
+    """Run the suite and return the JSON-serializable report.
+
+    With ``repeat > 1`` every size is measured that many times and each
+    stage keeps its fastest run, which steadies comparisons on noisy hosts.
+    """
+    stages = set(stages or (*DATA_STAGES, *STRATEGY_STAGES))
+    cost_model = cost_model or runner.DEFAULT_FUTURES_COST
+    params = {"high_turnover": {"period": turnover_period}}
+
+    report: dict = {
+        "meta": {**environment_info(), "seed": seed, "turnover_period": turnover_period, "repeat": repeat},
+        "results": [],
+    }
+    with contextlib.ExitStack() as stack:
+        if data_dir:
+            workdir = Path(data_dir)
+            workdir.mkdir(parents=True, exist_ok=True)
+        else:
+            workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="sq-bench-")))
+
+        for n_bars in sizes:
+            best: dict[str, dict] = {}
+            for attempt in range(max(repeat, 1)):
+                logger.info("Benchmarking %d bars (run %d/%d)", n_bars, attempt + 1, repeat)
+                df, timings = benchmark_data(n_bars, seed, workdir, stages)
+                _keep_fastest(best, "data", timings)
+                for name in strategies:
+                    timings = benchmark_strategy(df, FIXTURES[name], params.get(name), cost_model, stages)
+                    _keep_fastest(best, name, timings)
+                del df
+            for scope in ("data", *strategies):
+                report["results"].append({"bars": n_bars, "scope": scope, **best[scope]})
+    return report
+
+
+def _keep_fastest(best: dict[str, dict], scope: str, timings: dict) -> None:
+    if scope not in best:
+        best[scope] = timings
+        return
+    stages = best[scope]["stages"]
+    for stage, stats in timings["stages"].items():
+        if stage not in stages or stats["wall_s"] < stages[stage]["wall_s"]:
+            stages[stage] = stats
+
+
+def compare_reports(current: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """Pair up stages present in both reports and flag slowdowns.
+
+    A stage regresses when its wall time exceeds the baseline's by more
+    than ``tolerance`` (a fraction, e.g. ``0.2`` = 20%).
+    """
+    base_index = {
+        (r["bars"], r["scope"], stage): stats
+        for r in baseline.get("results", [])
+        for stage, stats in r["stages"].items()
+    }
+    rows = []
+    for r in current["results"]:
+        for stage, stats in r["stages"].items():
+            base = base_index.get((r["bars"], r["scope"], stage))
+            if base is None or stage in SETUP_STAGES:
+                continue
+            ratio = stats["wall_s"] / base["wall_s"] if base["wall_s"] > 0 else None
+            rows.append({
+                "bars": r["bars"],
+                "scope": r["scope"],
+                "stage": stage,
+                "baseline_s": base["wall_s"],
+                "current_s": stats["wall_s"],
+                "ratio": round(ratio, 3) if ratio is not None else None,
+                "regression": bool(
+                    ratio is not None
+                    and base["wall_s"] >= MIN_COMPARE_SECONDS
+                    and ratio > 1 + tolerance
+                ),
+            })
+    return rows
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{'bars':>12} {'scope':<14} {'stage':<18} {'wall s':>9} {'cpu s':>9} {'bars/s':>14} {'peak MB':>9}"]
+    for r in report["results"]:
+        for stage, s in r["stages"].items():
+            rate = s.get("rows_per_sec")
+            lines.append(
+                f"{r['bars']:>12,} {r['scope']:<14} {stage:<18} {s['wall_s']:>9.3f} {s['cpu_s']:>9.3f} "
+                f"{(f'{rate:,}' if rate else '-'):>14} {s['peak_rss_mb']:>9.1f}"
+            )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: list[dict]) -> str:
+    lines = [f"{'bars':>12} {'scope':<14} {'stage':<18} {'base s':>9} {'now s':>9} {'ratio':>7}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        lines.append(
+            f"{row['bars']:>12,} {row['scope']:<14} {row['stage']:<18} "
+            f"{row['baseline_s']:>9.3f} {row['current_s']:>9.3f} {ratio:>7}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_sizes(text: str) -> list[int]:
+    sizes = []
+    for part in text.split(","):
+        part = part.strip().lower().replace("_", "")
+        scale = {"k": 1_000, "m": 1_000_000}.get(part[-1:], 1)
+        sizes.append(int(float(part[:-1] if scale > 1 else part) * scale))
+    return sizes
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="SigmaQuantStream backtest benchmark suite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Quick run on small and medium data
+  python lib/benchmark.py --bars 10k,1m
+
+  # Simulator and metrics only, 100M bars, high-turnover fixture
+  python lib/benchmark.py --bars 100m --strategies high_turnover \\
+    --stages load_data_cached,simulate_trades,compute_metrics
+        """,
+    )
+    parser.add_argument("--bars", default="10k,100k,1m", help="Comma-separated sizes, e.g. 10k,1m,100m (default: 10k,100k,1m)")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data seed (default: 7)")
+    parser.add_argument(
+        "--strategies",
+        default=",".join(FIXTURES),
+        help=f"Comma-separated fixtures to run: {', '.join(FIXTURES)} (default: all)",
+    )
+    parser.add_argument(
+        "--stages",
+        default=None,
+        help=f"Comma-separated stages to time (default: all): {', '.join((*DATA_STAGES, *STRATEGY_STAGES))}",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Measure each size N times and keep the fastest run per stage (default: 1)")
+    parser.add_argument("--turnover-period", type=int, default=3, help="Look-back of the high-turnover fixture (default: 3)")
+    parser.add_argument("--data-dir", default=None, help="Keep the generated CSVs and cache here instead of a temp dir")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--compare", default=None, help="Baseline JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging a regression (default: 0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    try:
+        sizes = _parse_sizes(args.bars)
+    except ValueError:
+        print(f"Error: Invalid --bars value: {args.bars}", file=sys.stderr)
+        return 1
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in FIXTURES]
+    if unknown:
+        print(f"Error: Unknown strategies {unknown}; choose from {list(FIXTURES)}", file=sys.stderr)
+        return 1
+    stages = None
+    if args.stages:
+        stages = {s.strip() for s in args.stages.split(",") if s.strip()}
+        unknown = stages - {*DATA_STAGES, *STRATEGY_STAGES}
+        if unknown:
+            print(f"Error: Unknown stages {sorted(unknown)}", file=sys.stderr)
+            return 1
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(Path(args.compare).read_text())
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error: Cannot read baseline {args.compare}: {e}", file=sys.stderr)
+            return 1
+
+    report = run_benchmarks(
+        sizes, strategies, args.seed, stages, args.turnover_period,
+        data_dir=args.data_dir, repeat=args.repeat,
+    )
+    print(format_report(report))
+
+    if args.output:
+        out_path = Path(args.output)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    if baseline is not None:
+        rows = compare_reports(report, baseline, args.tolerance)
+        print()
+        print(f"Compared with {args.compare} (commit {baseline.get('meta', {}).get('commit')}):")
+        print(format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
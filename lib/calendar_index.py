@@ -0,0 +1,243 @@
+"""
+Integer calendar ids per bar for monthly, weekly and daily attribution.
+
+``CalendarIndex`` maps every bar to the trading day it belongs to (days since
+1970-01-01) once per dataset; month and week ids derive from the day id with
+integer arithmetic. Period PnL is then an ``np.bincount`` over the exit bars
+of the trades instead of formatting a timestamp per trade.
+
+A ``Session`` decides which day a bar belongs to. Sessions that open in the
+evening (CME Globex opens 17:00 Chicago time) roll bars at or after the open
+into the next trading day, so Sunday-evening bars count towards Monday and a
+month's last evening session towards the next month.
+
+Usage::
+
+    from lib.calendar_index import CalendarIndex, daily_ratios, monthly_returns, resolve_session
+
+    calendar = CalendarIndex.from_timestamps(df["timestamp"], resolve_session("CME"))
+    trade_calendar = calendar.for_trades(trades.exit_bar)
+    monthly = monthly_returns(trade_calendar, trades.pnl)
+    sharpe, sortino = daily_ratios(trade_calendar, trades.pnl)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+_DAY_NS = 86_400 * 10**9
+
+
+@dataclass(frozen=True)
+class Session:
+    """How bars are assigned to trading days.
+
+    Attributes:
+        name: Label recorded in results.
+        tz: Timezone the session clock runs in; ``None`` uses the
+            timestamps' own wall clock (UTC for naive timestamps).
+        start: Local ``HH:MM`` at which a trading day opens. Bars at or
+            after it belong to the next calendar date unless it is 00:00.
+        periods_per_year: Trading days per year, used to annualize the
+            daily Sharpe/Sortino ratios.
+    """
+
+    name: str
+    tz: str | None = None
+    start: str = "00:00"
+    periods_per_year: int = 252
+
+    @property
+    def start_ns(self) -> int:
+        hours, minutes = (int(part) for part in self.start.split(":"))
+        if not (0 <= hours < 24 and 0 <= minutes < 60):
+            raise ValueError(f"Invalid session start {self.start!r}; expected HH:MM")
+        return (hours * 60 + minutes) * 60 * 10**9
+
+
+SESSIONS = {
+    # Calendar days of the data's own timestamps (the historical behaviour).
+    "calendar": Session("calendar"),
+    "24/7": Session("24/7", tz="UTC", periods_per_year=365),
+    # CME Globex: the trading day opens at 17:00 Chicago time the evening before.
+    "CME": Session("CME", tz="America/Chicago", start="17:00"),
+}
+
+DEFAULT_SESSION = SESSIONS["calendar"]
+
+
+def resolve_session(spec: str | dict | Session | None) -> Session:
+    """Accept a preset name, a JSON object/string of ``Session`` fields, or a ``Session``."""
+    if spec is None:
+        return DEFAULT_SESSION
+    if isinstance(spec, Session):
+        return spec
+    if isinstance(spec, str):
+        if spec in SESSIONS:
+            return SESSIONS[spec]
+        try:
+            spec = json.loads(spec)
+        except json.JSONDecodeError:
+            raise ValueError(
+                f"Unknown session {spec!r}; expected one of {sorted(SESSIONS)} or a JSON object"
+            ) from None
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid session spec: {spec!r}")
+    session = Session(**{"name": "custom", **spec})
+    session.start_ns  # validate early
+    return session
+
+
+def day_ids(timestamps: pd.Series, session: Session = DEFAULT_SESSION) -> np.ndarray:
+    """Trading day (days since 1970-01-01) of each timestamp under ``session``."""
+    ts = pd.Series(timestamps)
+    if isinstance(ts.dtype, pd.DatetimeTZDtype):
+        local = ts.dt.tz_convert(session.tz) if session.tz else ts
+        local = local.dt.tz_localize(None)
+    elif session.tz:
+        local = pd.to_datetime(ts).dt.tz_localize("UTC").dt.tz_convert(session.tz).dt.tz_localize(None)
+    else:
+        local = pd.to_datetime(ts)
+    ns = local.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    shift = (_DAY_NS - session.start_ns) % _DAY_NS
+    return (ns + shift) // _DAY_NS
+
+
+def month_ids(days: np.ndarray) -> np.ndarray:
+    """``year * 100 + month`` of each day id."""
+    months = np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return (months // 12 + 1970) * 100 + months % 12 + 1
+
+
+def week_ids(days: np.ndarray) -> np.ndarray:
+    """Monday-based week number of each day id (1970-01-01 was a Thursday)."""
+    return (np.asarray(days, dtype=np.int64) + 3) // 7
+
+
+def _day_labels(days: np.ndarray) -> list[str]:
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype(str).tolist()
+
+
+@dataclass(frozen=True)
+class TradeCalendar:
+    """Calendar inputs of one run's metrics.
+
+    ``session_days`` are the sorted distinct trading days that have bars
+    (days without exits count as zero PnL); ``exit_days`` is the trading day
+    of each trade's exit, aligned with the trade arrays.
+    """
+
+    session: Session
+    session_days: np.ndarray
+    exit_days: np.ndarray
+
+
+@dataclass(frozen=True)
+class CalendarIndex:
+    """Trading-day id of every bar of a dataset."""
+
+    day: np.ndarray
+    session: Session = DEFAULT_SESSION
+
+    @classmethod
+    def from_timestamps(cls, timestamps: pd.Series, session: Session = DEFAULT_SESSION) -> CalendarIndex:
+        return cls(day_ids(timestamps, session), session)
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @cached_property
+    def week(self) -> np.ndarray:
+        return week_ids(self.day)
+
+    @cached_property
+    def month(self) -> np.ndarray:
+        return month_ids(self.day)
+
+    @cached_property
+    def session_days(self) -> np.ndarray:
+        return distinct_days(self.day)
+
+    def slice(self, start: int, end: int) -> CalendarIndex:
+        """View of bars ``[start, end)``, for frames sliced the same way."""
+        return CalendarIndex(self.day[start:end], self.session)
+
+    def for_trades(self, exit_bars: np.ndarray) -> TradeCalendar:
+        """Attribute trades (by exit bar, relative to this index) to trading days."""
+        if len(self.day) == 0:
+            return TradeCalendar(self.session, self.day, np.empty(0, dtype=np.int64))
+        idx = np.minimum(exit_bars, len(self.day) - 1)
+        return TradeCalendar(self.session, self.session_days, self.day[idx])
+
+
+def distinct_days(days: np.ndarray) -> np.ndarray:
+    """Sorted distinct day ids (cheap for the usual time-ordered bars)."""
+    days = np.asarray(days, dtype=np.int64)
+    if len(days) and np.all(days[1:] >= days[:-1]):
+        return days[np.concatenate(([True], days[1:] != days[:-1]))]
+    return np.unique(days)
+
+
+def _period_sums(ids: np.ndarray, pnl: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    periods, inverse = np.unique(ids, return_inverse=True)
+    return periods, np.bincount(inverse, weights=pnl, minlength=len(periods))
+
+
+def monthly_returns(calendar: TradeCalendar, pnl: np.ndarray) -> list[dict]:
+    """Trade PnL per month of exit, in calendar order (months with exits only)."""
+    if len(pnl) == 0:
+        return []
+    months, totals = _period_sums(month_ids(calendar.exit_days), pnl)
+    return [
+        {"month": f"{m // 100:04d}-{m % 100:02d}", "pnl": round(v, 2)}
+        for m, v in zip(months.tolist(), totals.tolist())
+    ]
+
+
+def weekly_returns(calendar: TradeCalendar, pnl: np.ndarray) -> list[dict]:
+    """Trade PnL per week of exit, labelled by the week's Monday."""
+    if len(pnl) == 0:
+        return []
+    weeks, totals = _period_sums(week_ids(calendar.exit_days), pnl)
+    return [
+        {"week": label, "pnl": round(v, 2)}
+        for label, v in zip(_day_labels(weeks * 7 - 3), totals.tolist())
+    ]
+
+
+def daily_returns(calendar: TradeCalendar, pnl: np.ndarray) -> list[dict]:
+    """Trade PnL per trading day of exit (days with exits only)."""
+    if len(pnl) == 0:
+        return []
+    days, totals = _period_sums(calendar.exit_days, pnl)
+    return [{"date": label, "pnl": round(v, 2)} for label, v in zip(_day_labels(days), totals.tolist())]
+
+
+def daily_pnl(calendar: TradeCalendar, pnl: np.ndarray) -> np.ndarray:
+    """PnL of every trading day with bars, zero on days without exits."""
+    positions = np.searchsorted(calendar.session_days, calendar.exit_days)
+    return np.bincount(positions, weights=pnl, minlength=len(calendar.session_days)).astype(np.float64)
+
+
+def daily_ratios(calendar: TradeCalendar, pnl: np.ndarray) -> tuple[float, float]:
+    """Annualized Sharpe and Sortino ratios of daily PnL."""
+    return annualized_ratios(daily_pnl(calendar, pnl), calendar.session.periods_per_year)
+
+
+def annualized_ratios(daily: np.ndarray, periods_per_year: int) -> tuple[float, float]:
+    """Sharpe and Sortino ratios of a daily PnL series, annualized."""
+    if len(daily) < 2:
+        return 0.0, 0.0
+    annualize = math.sqrt(periods_per_year)
+    mean = float(daily.mean())
+    std = float(daily.std(ddof=1))
+    downside = float(np.sqrt(np.mean(np.minimum(daily, 0.0) ** 2)))
+    sharpe = mean / std * annualize if std > 0 else 0.0
+    sortino = mean / downside * annualize if downside > 0 else 0.0
+    return sharpe, sortino
@@ -0,0 +1,474 @@
+"""
+Binary, memory-mapped cache for OHLCV CSV files.
+
+The first load of a CSV parses and normalizes it as usual, then writes every
+column to its own ``.npy`` file (timestamps as int64 UTC ticks plus unit and
+timezone in the manifest). Later loads memory-map those files, so a
+``start_bar``/``end_bar`` slice only touches the pages it covers and the
+CSV parse is skipped entirely.
+
+Cache entries are keyed by the resolved source path and validated against
+the file's size, mtime and SHA-256 content hash. Size/mtime are checked on
+every load; the hash is only recomputed when they change, so touching a
+file without editing it keeps the cache, while any content change rebuilds
+it. When the cache directory cannot be written or read (a read-only
+checkout, a sandboxed CI runner), loads fall back to parsing the CSV.
+
+Files that only ever grow at the end (bar feeds) can be followed without
+re-reading them: ``mark_file`` records how far a file has been consumed,
+``read_appended`` parses only the rows written after that mark, and
+``extend_cached`` appends those rows to the cache entry in place.
+
+Usage::
+
+    from lib.data_cache import load_cached
+
+    df = load_cached("data/ES_1m.csv", parse=my_csv_parser, start_bar=0, end_bar=50_000)
+
+Set ``SIGMA_QUANT_DATA_CACHE`` to move the cache directory (default:
+``data/.cache`` in the project root).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / ".cache"
+
+# Bump whenever the on-disk layout or the parser's normalization changes so
+# stale entries are rebuilt instead of silently reused.
+CACHE_FORMAT_VERSION = 2
+
+_HASH_CHUNK = 1 << 20
+
+# Bytes just before a mark that must be unchanged for the rows after it to
+# count as appended (a cheap check the file was not rewritten).
+MARK_CHECK_BYTES = 64 * 1024
+
+
+def cache_root() -> Path:
+    """Return the cache directory, honouring ``SIGMA_QUANT_DATA_CACHE``."""
+    override = os.environ.get("SIGMA_QUANT_DATA_CACHE")
+    return Path(override) if override else DEFAULT_CACHE_DIR
+
+
+def _entry_dir(source: Path) -> Path:
+    key = hashlib.sha1(str(source).encode()).hexdigest()[:16]
+    return cache_root() / f"{source.stem}-{key}"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(entry: Path) -> dict | None:
+    try:
+        manifest = json.loads((entry / "manifest.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+    if manifest.get("format_version") != CACHE_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(entry: Path, manifest: dict) -> None:
+    tmp = entry / f".manifest.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, entry / "manifest.json")
+
+
+def _validate(source: Path, entry: Path, manifest: dict | None) -> tuple[dict | None, str | None]:
+    """Check a manifest against ``source``.
+
+    Returns ``(manifest, None)`` when the entry is still valid, otherwise
+    ``(None, sha256)`` where the hash is passed on to the rebuild if it was
+    already computed.
+    """
+    if manifest is None or not (entry / manifest["version_dir"]).is_dir():
+        return None, None
+
+    stat = source.stat()
+    if manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+        return manifest, None
+    if manifest["size"] != stat.st_size:
+        return None, None
+
+    # Only mtime moved: a touched-but-unchanged file keeps its entry.
+    sha256 = file_sha256(source)
+    if manifest["sha256"] == sha256:
+        manifest["mtime_ns"] = stat.st_mtime_ns
+        _write_manifest(entry, manifest)
+        return manifest, None
+    return None, sha256
+
+
+def _build(source: Path, entry: Path, df: pd.DataFrame, stat: os.stat_result, sha256: str) -> dict:
+    """Write one ``.npy`` per column of the parsed ``df`` plus the manifest.
+
+    ``stat`` and ``sha256`` describe ``source`` as it was before parsing.
+    """
+    entry.mkdir(parents=True, exist_ok=True)
+    version_dir = sha256[:16]
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".build-", dir=entry))
+    columns = []
+    try:
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            col: dict = {"name": name, "file": f"{i}.npy", "tz": None, "unit": None, "pandas_dtype": None}
+            if isinstance(series.dtype, pd.DatetimeTZDtype):
+                col["tz"] = str(series.dtype.tz)
+                values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+            else:
+                values = series.to_numpy()
+                # Extension dtypes (``str`` and friends) are stored as object
+                # arrays; the dtype is restored when the column is loaded.
+                col["pandas_dtype"] = str(series.dtype)
+            if values.dtype.kind == "M":
+                col["unit"] = np.datetime_data(values.dtype)[0]
+                values = values.view(np.int64)
+            col["dtype"] = values.dtype.str
+            # Object columns (symbols etc.) cannot be memory-mapped and are
+            # loaded eagerly; numeric and timestamp columns are mapped.
+            col["mmap"] = values.dtype != object
+            np.save(tmp_dir / col["file"], values, allow_pickle=not col["mmap"])
+            columns.append(col)
+
+        final_dir = entry / version_dir
+        if final_dir.exists():
+            shutil.rmtree(tmp_dir)  # another process built identical content
+        else:
+            os.replace(tmp_dir, final_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    manifest = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source": str(source),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+        "rows": len(df),
+        "version_dir": version_dir,
+        "columns": columns,
+    }
+    _write_manifest(entry, manifest)
+
+    # Drop superseded versions; already-mapped files stay readable until
+    # their readers release them.
+    for child in entry.iterdir():
+        if child.is_dir() and child.name != version_dir and not child.name.startswith(".build-"):
+            shutil.rmtree(child, ignore_errors=True)
+
+    logger.info("Cached %s (%d rows) in %s", source, len(df), final_dir)
+    return manifest
+
+
+def _materialize(entry: Path, manifest: dict, start_bar: int, end_bar: int) -> pd.DataFrame:
+    """Map every cached column and slice it without reading the rest."""
+    version_dir = entry / manifest["version_dir"]
+    rows = slice(start_bar, None) if end_bar == -1 else slice(start_bar, end_bar)
+
+    data: dict[str, object] = {}
+    for col in manifest["columns"]:
+        path = version_dir / col["file"]
+        if col["mmap"]:
+            # Copy-on-write mapping: strategies may still edit columns in
+            # place without touching the cache file.
+            values = np.load(path, mmap_mode="c")[rows]
+        else:
+            values = np.load(path, allow_pickle=True)[rows]
+
+        if col["unit"] is not None:
+            values = np.asarray(values).view(f"M8[{col['unit']}]")
+            series = pd.Series(values)
+            if col["tz"] is not None:
+                series = series.dt.tz_localize("UTC").dt.tz_convert(col["tz"])
+            data[col["name"]] = series
+        else:
+            series = pd.Series(values, copy=False)
+            if col["pandas_dtype"] is not None and str(series.dtype) != col["pandas_dtype"]:
+                series = series.astype(col["pandas_dtype"])
+            data[col["name"]] = series
+
+    return pd.DataFrame(data, copy=False)
+
+
+def load_cached(
+    data_path: str,
+    parse: Callable[[str], pd.DataFrame],
+    start_bar: int = 0,
+    end_bar: int = -1,
+) -> pd.DataFrame:
+    """Load ``data_path`` through the cache, building it with ``parse`` if needed.
+
+    Args:
+        data_path: Source CSV path.
+        parse: Function returning the fully normalized DataFrame for a path;
+            only called when the cache is missing or stale.
+        start_bar: First row to return.
+        end_bar: Row to stop before (``-1`` = through the end).
+
+    Returns:
+        The ``[start_bar:end_bar]`` slice with a fresh RangeIndex.
+    """
+    source = Path(data_path).resolve()
+    if not source.exists():
+        raise FileNotFoundError(f"Data file not found: {source}")
+
+    entry = _entry_dir(source)
+    df = None
+    try:
+        manifest, sha256 = _validate(source, entry, _read_manifest(entry))
+        if manifest is None:
+            logger.debug("Data cache miss for %s", source)
+            stat = source.stat()
+            sha256 = sha256 or file_sha256(source)
+            df = parse(str(source))
+            manifest = _build(source, entry, df, stat, sha256)
+        else:
+            logger.debug("Data cache hit for %s", source)
+        return _materialize(entry, manifest, start_bar, end_bar)
+    except OSError as e:
+        logger.warning("Data cache unavailable for %s (%s); parsing the CSV directly", source, e)
+
+    if df is None:
+        df = parse(str(source))
+    rows = slice(start_bar, None) if end_bar == -1 else slice(start_bar, end_bar)
+    return df.iloc[rows].reset_index(drop=True)
+
+
+def cached_rows(data_path: str) -> int | None:
+    """Row count of a valid cache entry for ``data_path``, or ``None``.
+
+    Never parses or builds anything, so callers streaming files too large
+    to load at once can use the cache when it exists and fall back to
+    reading the CSV in chunks otherwise.
+    """
+    source = Path(data_path).resolve()
+    if not source.exists():
+        return None
+    entry = _entry_dir(source)
+    try:
+        manifest, _ = _validate(source, entry, _read_manifest(entry))
+    except OSError:
+        return None
+    return None if manifest is None else int(manifest["rows"])
+
+
+# ---------------------------------------------------------------------------
+# Append-only files
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class FileMark:
+    """How far a CSV has been consumed.
+
+    Attributes:
+        size: Bytes consumed, always ending on a line break.
+        rows: Data rows in those bytes (as parsed).
+        header: The header line, which must not change.
+        digest: Hash of the ``MARK_CHECK_BYTES`` before ``size``.
+    """
+
+    size: int
+    rows: int
+    header: bytes
+    digest: str
+
+
+def _digest_before(f: BinaryIO, end: int) -> str:
+    start = max(end - MARK_CHECK_BYTES, 0)
+    f.seek(start)
+    return hashlib.blake2b(f.read(end - start), digest_size=16).hexdigest()
+
+
+def mark_file(data_path: str, rows: int) -> FileMark | None:
+    """Mark the end of ``data_path`` after it was parsed into ``rows`` rows.
+
+    Returns ``None`` when the file does not end on a line break or holds a
+    different number of lines (blank lines, quoted line breaks, or rows
+    appended since it was parsed): the caller then has no safe resume point
+    and reads the file in full next time.
+    """
+    with open(data_path, "rb") as f:
+        header = f.readline()
+        lines = 0
+        last = b""
+        while chunk := f.read(_HASH_CHUNK):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+        size = f.tell()
+        if not header.endswith(b"\n") or (lines and last != b"\n") or lines != rows:
+            return None
+        return FileMark(size, rows, header, _digest_before(f, size))
+
+
+def read_appended(
+    data_path: str,
+    mark: FileMark,
+    parse: Callable[[BinaryIO], pd.DataFrame],
+) -> tuple[pd.DataFrame | None, FileMark] | None:
+    """Parse only the complete lines written after ``mark``.
+
+    Args:
+        data_path: Source CSV path.
+        mark: Where the previous read stopped.
+        parse: Parser for a CSV byte stream (header line plus the new rows).
+
+    Returns:
+        ``(rows, new_mark)``, with ``rows`` ``None`` when nothing complete
+        was appended. ``None`` when the file shrank or the bytes before the
+        mark changed, i.e. it was rewritten rather than appended to.
+    """
+    with open(data_path, "rb") as f:
+        if f.readline() != mark.header:
+            return None
+        size = f.seek(0, os.SEEK_END)
+        if size < mark.size or _digest_before(f, mark.size) != mark.digest:
+            return None
+        f.seek(mark.size)
+        data = f.read()
+        # A writer may be mid-line; leave the partial line for next time.
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return None, mark
+        digest = _digest_before(f, mark.size + end)
+
+    rows = parse(io.BytesIO(mark.header + data[:end]))
+    return rows, FileMark(mark.size + end, mark.rows + len(rows), mark.header, digest)
+
+
+def _append_values(series: pd.Series, col: dict) -> np.ndarray | None:
+    """``series`` in the stored layout of ``col``, or ``None`` if it does not fit."""
+    if col["unit"] is not None:
+        tz_aware = isinstance(series.dtype, pd.DatetimeTZDtype)
+        if tz_aware != (col["tz"] is not None):
+            return None
+        values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy() if tz_aware else series.to_numpy()
+        if values.dtype.kind != "M":
+            return None
+        return values.astype(f"M8[{col['unit']}]").view(np.int64)
+    values = series.to_numpy()
+    stored = np.dtype(col["dtype"])
+    if str(series.dtype) == col["pandas_dtype"] and values.dtype == stored:
+        return values
+    # A chunk of whole numbers parses as int; a full parse of the file would
+    # still give the stored float column.
+    if col["pandas_dtype"] == str(stored) and stored != object and np.can_cast(values.dtype, stored, "safe"):
+        return values.astype(stored)
+    return None
+
+
+def _append_npy(path: Path, values: np.ndarray) -> None:
+    """Append rows to a 1-D ``.npy`` file and rewrite its shape in place.
+
+    NumPy pads headers so the length of the first axis can grow without
+    moving the data; anything else is refused before the file is touched.
+    """
+    fmt = np.lib.format
+    with open(path, "r+b") as f:
+        version = fmt.read_magic(f)
+        if version != (1, 0):
+            raise ValueError(f"{path}: unsupported .npy version {version}")
+        shape, fortran_order, dtype = fmt.read_array_header_1_0(f)
+        data_start = f.tell()
+        header = io.BytesIO()
+        fmt.write_array_header_1_0(
+            header, {"descr": fmt.dtype_to_descr(dtype), "fortran_order": fortran_order, "shape": (shape[0] + len(values),)}
+        )
+        if len(shape) != 1 or dtype != values.dtype or header.tell() != data_start:
+            raise ValueError(f"{path}: cannot append in place")
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values).tobytes())
+        f.flush()
+        # Readers mapping the file see the new length only once the data is there.
+        f.seek(0)
+        f.write(header.getvalue())
+
+
+def extend_cached(data_path: str, rows: pd.DataFrame, before: FileMark, after: FileMark) -> bool:
+    """Append ``rows`` (the lines between two marks) to the cache entry.
+
+    Only an entry holding exactly the file up to ``before`` is extended;
+    any other entry is left for the next ``load_cached`` to rebuild. The
+    extended version directory gets a new name, so mappings of the old
+    manifest fail over to a CSV parse instead of seeing extra rows.
+
+    Returns:
+        True when the entry was extended.
+    """
+    source = Path(data_path).resolve()
+    entry = _entry_dir(source)
+    manifest = _read_manifest(entry)
+    if manifest is None or (manifest["size"], manifest["rows"]) != (before.size, before.rows):
+        return False
+    if [col["name"] for col in manifest["columns"]] != list(rows.columns):
+        return False
+    values = [_append_values(rows[col["name"]], col) for col in manifest["columns"]]
+    if any(v is None for v in values):
+        return False
+
+    try:
+        version_dir = entry / manifest["version_dir"]
+        for col, column_values in zip(manifest["columns"], values):
+            path = version_dir / col["file"]
+            if col["mmap"]:
+                _append_npy(path, column_values)
+            else:
+                # Object columns are pickled whole; rewrite them.
+                tmp = version_dir / f".{col['file']}.{os.getpid()}.tmp.npy"
+                np.save(tmp, np.concatenate([np.load(path, allow_pickle=True), column_values]), allow_pickle=True)
+                os.replace(tmp, path)
+        renamed = f"{manifest['version_dir'].split('+')[0]}+{after.rows}"
+        os.replace(version_dir, entry / renamed)
+
+        stat = source.stat()
+        manifest.update(
+            size=after.size,
+            # The file may have grown past ``after`` already; its size then
+            # no longer matches and the next load rebuilds.
+            mtime_ns=stat.st_mtime_ns,
+            # The content hash is not maintained across appends: a touched
+            # file with this entry is rebuilt rather than rehashed.
+            sha256=None,
+            rows=after.rows,
+            version_dir=renamed,
+        )
+        _write_manifest(entry, manifest)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not extend data cache for %s (%s); it will be rebuilt", source, e)
+        shutil.rmtree(entry, ignore_errors=True)
+        return False
+    logger.debug("Extended data cache for %s by %d rows", source, len(rows))
+    return True
+
+
+def invalidate(data_path: str) -> bool:
+    """Delete the cache entry for ``data_path``. Returns True if one existed."""
+    entry = _entry_dir(Path(data_path).resolve())
+    if not entry.exists():
+        return False
+    shutil.rmtree(entry, ignore_errors=True)
+    return True
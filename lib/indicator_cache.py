@@ -0,0 +1,256 @@
+"""
+Indicator memoization for parameter sweeps and repeated backtests.
+
+Strategies opt in by routing indicator columns through the cache the runner
+attaches as ``strategy.indicator_cache``. Entries are keyed by a fingerprint
+of the input data, the indicator name, the bar count and only the parameters
+that indicator depends on, so a sweep over ``fast_period`` reuses the
+``sma_slow`` and ATR columns computed for the first combo. The key also
+holds a hash of the source file defining the compute function: editing an
+indicator (or anything else in its strategy file) never reuses columns an
+older version wrote to disk, and strategies whose files differ never share
+an ``"sma"`` entry. The runner hands each strategy a ``ScopedIndicatorCache``
+named after its file, so strategies in one batch stay apart even when they
+compute through a shared helper module.
+
+Usage inside a strategy::
+
+    def indicators(self, df):
+        p = self.params
+        cache = getattr(self, "indicator_cache", None)
+        compute = lambda: df["close"].rolling(p["slow_period"]).mean()
+        df["sma_slow"] = (
+            cache.get_or_compute(df, "sma", {"period": p["slow_period"]}, compute)
+            if cache is not None
+            else compute()
+        )
+        return df
+
+The in-process tier is an LRU bounded by ``max_bytes``. With ``spill_dir``
+set, every computed column is also written to disk, so evicted entries,
+other worker processes and later runs can load it instead of recomputing.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import marshal
+import os
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Columns that identify the market data itself; indicator columns added by
+# the strategy are deliberately excluded from the fingerprint.
+FINGERPRINT_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Hash the raw OHLCV(+timestamp) bytes of ``df``."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(df)).encode())
+    for col in FINGERPRINT_COLUMNS:
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+        else:
+            values = series.to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        digest.update(col.encode())
+        digest.update(np.ascontiguousarray(values).view(np.uint8))
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=256)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    return hashlib.blake2b(Path(path).read_bytes(), digest_size=16).hexdigest()
+
+
+def code_fingerprint(compute: Callable) -> str:
+    """Identify the code behind ``compute`` by the file that defines it.
+
+    The hash covers the whole source file, so helpers the compute function
+    calls from the same file are included. Code without a readable file
+    (``exec``'d strings) is identified by its bytecode instead.
+    """
+    func = compute
+    while isinstance(func, functools.partial):
+        func = func.func
+    code = getattr(func, "__code__", None) or getattr(getattr(func, "__call__", None), "__code__", None)
+    if code is None:
+        # Builtins and C extensions: versioned with their package.
+        return f"{getattr(func, '__module__', None)}.{getattr(func, '__qualname__', type(func).__qualname__)}"
+    try:
+        stat = os.stat(code.co_filename)
+        return _file_digest(code.co_filename, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return hashlib.blake2b(marshal.dumps(code), digest_size=16).hexdigest()
+
+
+@dataclass
+class IndicatorCacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    bytes_cached: int = 0
+
+    def to_dict(self) -> dict:
+        stats = asdict(self)
+        lookups = self.hits + self.disk_hits + self.misses
+        stats["hit_rate"] = round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+class IndicatorCache:
+    """LRU cache of indicator columns with an optional on-disk tier."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, spill_dir: str | Path | None = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = IndicatorCacheStats()
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._fingerprint: str | None = None
+        self._last_df: tuple[weakref.ref, int, str] | None = None
+
+    def __getstate__(self) -> dict:
+        # Worker processes get the configuration only: an empty in-memory
+        # tier that shares the same disk tier.
+        return {"max_bytes": self.max_bytes, "spill_dir": self.spill_dir}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["max_bytes"], state["spill_dir"])
+
+    def bind(self, fingerprint: str | None) -> None:
+        """Use a precomputed data fingerprint for the following lookups.
+
+        The sweep runner binds the fingerprint of the loaded dataset once so
+        each combo (a copy of the same data) does not rehash it. Only bind
+        when every frame passed to ``get_or_compute`` holds that data; pass
+        ``None`` to fall back to fingerprinting each frame.
+        """
+        self._fingerprint = fingerprint
+
+    def _data_key(self, df: pd.DataFrame) -> str:
+        if self._fingerprint is not None:
+            return self._fingerprint
+        # Columns of one indicators() call all hit the same frame, so only
+        # hash it once per frame object.
+        if self._last_df is None or self._last_df[0]() is not df or self._last_df[1] != len(df):
+            self._last_df = (weakref.ref(df), len(df), data_fingerprint(df))
+        return self._last_df[2]
+
+    def key(self, df: pd.DataFrame, name: str, params: dict, code: str = "", namespace: str = "") -> str:
+        payload = json.dumps(
+            [self._data_key(df), name, len(df), params, code, namespace], sort_keys=True, default=str
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def scoped(self, namespace: str) -> ScopedIndicatorCache:
+        """A view sharing this cache's storage whose keys live in ``namespace``."""
+        return ScopedIndicatorCache(self, namespace)
+
+    def get_or_compute(
+        self,
+        df: pd.DataFrame,
+        name: str,
+        params: dict,
+        compute: Callable[[], pd.Series | np.ndarray],
+        namespace: str = "",
+    ) -> pd.Series:
+        """Return the cached column for ``(data, name, params)`` or compute it.
+
+        Args:
+            df: Frame the column belongs to (its index is reused).
+            name: Indicator name, e.g. ``"sma"`` or ``"atr"``.
+            params: Only the parameters this indicator depends on.
+            compute: Zero-argument callable producing the column; the file
+                defining it is part of the key (see ``code_fingerprint``).
+            namespace: Keeps entries of different owners apart (see
+                ``scoped``).
+
+        Returns:
+            A fresh, writable Series aligned to ``df.index``.
+        """
+        key = self.key(df, name, params, code_fingerprint(compute), namespace)
+
+        values = self._entries.get(key)
+        if values is not None:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        elif self.spill_dir is not None and (self.spill_dir / f"{key}.npy").exists():
+            values = self._store(key, np.load(self.spill_dir / f"{key}.npy"))
+            self.stats.disk_hits += 1
+        else:
+            result = compute()
+            values = self._store(key, np.asarray(result))
+            self.stats.misses += 1
+            self._spill(key, values)
+
+        return pd.Series(values.copy(), index=df.index)
+
+    def _store(self, key: str, values: np.ndarray) -> np.ndarray:
+        values = np.array(values, copy=True)
+        values.flags.writeable = False
+        if values.nbytes > self.max_bytes:
+            return values  # larger than the whole budget: never kept in memory
+        self._entries[key] = values
+        self.stats.bytes_cached += values.nbytes
+        while self.stats.bytes_cached > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.stats.bytes_cached -= evicted.nbytes
+            self.stats.evictions += 1
+        return values
+
+    def _spill(self, key: str, values: np.ndarray) -> None:
+        if self.spill_dir is None or values.dtype == object:
+            return
+        path = self.spill_dir / f"{key}.npy"
+        if path.exists():
+            return
+        tmp = self.spill_dir / f".{key}.{os.getpid()}.tmp.npy"
+        np.save(tmp, values)
+        os.replace(tmp, path)
+
+
+class ScopedIndicatorCache:
+    """One strategy's view of a shared ``IndicatorCache``.
+
+    Lookups go to the shared LRU and disk tier (and count towards its stats)
+    but only ever see entries stored under the same namespace.
+    """
+
+    def __init__(self, cache: IndicatorCache, namespace: str):
+        self.cache = cache
+        self.namespace = namespace
+
+    @property
+    def stats(self) -> IndicatorCacheStats:
+        return self.cache.stats
+
+    def get_or_compute(
+        self,
+        df: pd.DataFrame,
+        name: str,
+        params: dict,
+        compute: Callable[[], pd.Series | np.ndarray],
+    ) -> pd.Series:
+        """See ``IndicatorCache.get_or_compute``."""
+        return self.cache.get_or_compute(df, name, params, compute, self.namespace)
@@ -0,0 +1,211 @@
+"""
+Portfolio aggregation of per-symbol backtests on a union timestamp index.
+
+Each symbol contributes its per-bar mark-to-market equity (closed-trade PnL
+plus the open position valued at the bar's close) on its own timestamps, in
+dollars: symbols quote prices in different point sizes, so streams are only
+summable once each is scaled by its own point value.
+Symbols trade different hours and bar counts, so instead of reindexing every
+symbol onto every timestamp, each symbol's equity is turned into increments
+at the bars where it changes; the portfolio equity is the running sum of all
+increments merged onto the sorted union of timestamps. Memory stays
+O(total bars), never symbols x timestamps.
+
+Daily PnL per symbol comes from its own end-of-day equity; days on which a
+symbol has no bars count as flat for it. Portfolio Sharpe/Sortino, the
+cross-asset correlation matrix and each symbol's share of PnL and of daily
+variance are computed from that ``symbols x days`` matrix.
+
+Usage::
+
+    from dataclasses import replace
+
+    from lib.backtest_runner import pnl_in_dollars
+    from lib.portfolio import SymbolEquity, mark_to_market, portfolio_report, timestamps_ns
+
+    dollar_trades = replace(trades, pnl=pnl_in_dollars(trades, cost_model, 50.0))
+    equity = mark_to_market(dollar_trades, df["close"].to_numpy(), point_value=50.0)
+    streams = [SymbolEquity("ES", timestamps_ns(df["timestamp"]), equity, days), ...]
+    report = portfolio_report(streams, periods_per_year=252)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from lib.calendar_index import annualized_ratios
+
+if TYPE_CHECKING:
+    from lib.backtest_runner import TradeBatch
+
+# Points in the sampled portfolio equity curve (plus the last timestamp).
+EQUITY_CURVE_POINTS = 100
+
+
+def timestamps_ns(timestamps: pd.Series) -> np.ndarray:
+    """UTC nanoseconds of each timestamp (naive timestamps are taken as UTC)."""
+    ts = pd.Series(timestamps)
+    if isinstance(ts.dtype, pd.DatetimeTZDtype):
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    return pd.to_datetime(ts).to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def mark_to_market(trades: TradeBatch, closes: np.ndarray, point_value: float = 1.0) -> np.ndarray:
+    """Equity at the close of every bar, in the units of the trade PnL.
+
+    Closed trades count in full from their exit bar on (costs included);
+    during bars ``[entry_bar, exit_bar)`` a trade adds its open price move at
+    the bar's close times ``point_value``. Pass dollar ``trades.pnl`` (see
+    ``lib.backtest_runner.pnl_in_dollars``) with the matching point value so
+    realized and open PnL share units.
+    """
+    n = len(closes)
+    realized = np.cumsum(np.bincount(trades.exit_bar, weights=trades.pnl, minlength=n)[:n])
+    if len(trades) == 0:
+        return realized.astype(np.float64)
+    bars = np.arange(n)
+    current = np.searchsorted(trades.entry_bar, bars, side="right") - 1
+    safe = np.maximum(current, 0)
+    open_now = (current >= 0) & (bars < trades.exit_bar[safe])
+    unrealized = np.where(
+        open_now, trades.side[safe] * (closes - trades.entry_price[safe]) * point_value, 0.0
+    )
+    return realized + np.nan_to_num(unrealized)
+
+
+@dataclass
+class SymbolEquity:
+    """Per-bar equity of one symbol.
+
+    ``timestamps`` are UTC nanoseconds (sorted) and ``days`` the trading-day
+    id of each bar (see ``lib.calendar_index.day_ids``).
+    """
+
+    symbol: str
+    timestamps: np.ndarray
+    equity: np.ndarray
+    days: np.ndarray
+
+    def end_of_day(self) -> tuple[np.ndarray, np.ndarray]:
+        """Trading days with bars and the equity at each day's last bar."""
+        if len(self.days) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        last = np.flatnonzero(np.append(self.days[1:] != self.days[:-1], True))
+        return self.days[last], self.equity[last]
+
+
+def union_equity(streams: list[SymbolEquity]) -> tuple[np.ndarray, np.ndarray]:
+    """Portfolio equity on the sorted union of all symbols' timestamps.
+
+    Each symbol holds its last equity between its own bars (zero before its
+    first bar).
+    """
+    stamps = np.unique(np.concatenate([s.timestamps for s in streams]))
+    positions = np.concatenate([np.searchsorted(stamps, s.timestamps) for s in streams])
+    increments = np.concatenate([np.diff(s.equity, prepend=0.0) for s in streams])
+    return stamps, np.cumsum(np.bincount(positions, weights=increments, minlength=len(stamps)))
+
+
+def daily_pnl_matrix(streams: list[SymbolEquity]) -> tuple[np.ndarray, np.ndarray]:
+    """``(days, pnl)`` with ``pnl[i, d]`` the PnL of symbol ``i`` on ``days[d]``."""
+    ends = [s.end_of_day() for s in streams]
+    days = np.unique(np.concatenate([d for d, _ in ends]))
+    matrix = np.zeros((len(streams), len(days)), dtype=np.float64)
+    for row, (symbol_days, equity) in zip(matrix, ends):
+        row[np.searchsorted(days, symbol_days)] = np.diff(equity, prepend=0.0)
+    return days, matrix
+
+
+def drawdown(equity: np.ndarray) -> tuple[float, float]:
+    """Max drawdown in PnL units and as a fraction of the peak (like ``compute_metrics``)."""
+    if len(equity) == 0:
+        return 0.0, 0.0
+    running_max = np.maximum.accumulate(equity)
+    max_dd = float((running_max - equity).max())
+    peak = float(running_max.max())
+    return max_dd, max_dd / peak if peak > 0 else 0.0
+
+
+def correlation(daily: np.ndarray) -> np.ndarray:
+    """Pearson correlation of the rows of ``daily``; NaN where a row is constant."""
+    if daily.shape[1] < 2:
+        return np.full((len(daily), len(daily)), np.nan)
+    centered = daily - daily.mean(axis=1, keepdims=True)
+    norms = np.sqrt((centered**2).sum(axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (centered @ centered.T) / np.outer(norms, norms)
+
+
+def _rounded(values: np.ndarray, digits: int = 4) -> list:
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def portfolio_report(streams: list[SymbolEquity], periods_per_year: int = 252) -> dict:
+    """Portfolio metrics, correlation, per-symbol contribution and curves.
+
+    Returns:
+        Dict with ``metrics``, ``correlation``, ``contribution``,
+        ``daily_returns`` and a sampled ``equity_curve``.
+    """
+    stamps, equity = union_equity(streams)
+    days, daily = daily_pnl_matrix(streams)
+    total_daily = daily.sum(axis=0)
+
+    sharpe, sortino = annualized_ratios(total_daily, periods_per_year)
+    max_dd, max_dd_pct = drawdown(equity)
+    total_pnl = float(equity[-1]) if len(equity) else 0.0
+
+    port_var = float(total_daily.var(ddof=1)) if len(days) > 1 else 0.0
+    contribution = {}
+    for stream, row in zip(streams, daily):
+        symbol_pnl = float(stream.equity[-1]) if len(stream.equity) else 0.0
+        symbol_sharpe, _ = annualized_ratios(row, periods_per_year)
+        symbol_dd, _ = drawdown(stream.equity)
+        risk_share = (
+            float(np.cov(row, total_daily, ddof=1)[0, 1]) / port_var if port_var > 0 else None
+        )
+        contribution[stream.symbol] = {
+            "total_pnl": round(symbol_pnl, 2),
+            "pnl_share": round(symbol_pnl / total_pnl, 4) if total_pnl != 0 else None,
+            "risk_share": round(risk_share, 4) if risk_share is not None else None,
+            "daily_sharpe_ratio": round(symbol_sharpe, 4),
+            "max_drawdown_dollars": round(symbol_dd, 2),
+        }
+
+    matrix = correlation(daily)
+    step = max(1, len(stamps) // EQUITY_CURVE_POINTS)
+    sampled = np.arange(0, len(stamps), step)
+    if len(stamps) and sampled[-1] != len(stamps) - 1:
+        sampled = np.append(sampled, len(stamps) - 1)
+    labels = pd.to_datetime(stamps[sampled], utc=True).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    return {
+        "metrics": {
+            "total_pnl": round(total_pnl, 2),
+            "sharpe_ratio": round(sharpe, 4),
+            "sortino_ratio": round(sortino, 4),
+            "max_drawdown": round(max_dd_pct, 4),
+            "max_drawdown_dollars": round(max_dd, 2),
+            "trading_days": len(days),
+            "timestamps": len(stamps),
+        },
+        "correlation": {
+            "symbols": [s.symbol for s in streams],
+            "matrix": [_rounded(row) for row in matrix],
+        },
+        "contribution": contribution,
+        "daily_returns": [
+            {"date": label, "pnl": round(v, 2)}
+            for label, v in zip(
+                days.astype("datetime64[D]").astype(str).tolist(), total_daily.tolist()
+            )
+        ],
+        "equity_curve": [
+            {"timestamp": label, "equity": round(v, 2)}
+            for label, v in zip(labels.tolist(), equity[sampled].tolist())
+        ],
+    }
@@ -0,0 +1,191 @@
+"""
+Per-stage wall time, CPU time and memory high-water marks.
+
+Wrap each stage of a run in ``StageTimer.stage()``; the timer records wall
+and CPU seconds, the peak resident set size reached while the stage ran and
+an optional row count, in stage order.
+
+Usage::
+
+    from lib.profiling import StageTimer
+
+    timer = StageTimer()
+    with timer.stage("load_data") as stage:
+        df = load_data(path)
+        stage.rows = len(df)
+    print(timer.to_dict())
+
+On Linux the kernel's RSS high-water mark is reset at the start of every
+stage, so ``peak_rss_mb`` is the peak of that stage alone. Elsewhere it
+falls back to the process-lifetime peak (``peak_rss_scope: "process"``).
+
+``StageTimer(profile_code=True)`` additionally runs stages entered with
+``profile=True`` (strategy code) under cProfile; ``dump_profile()`` writes
+the pstats file and ``to_dict()`` lists the top functions by self time.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import logging
+import pstats
+import resource
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_PROC_STATUS = "/proc/self/status"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _read_hwm_kb() -> int | None:
+    try:
+        with open(_PROC_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's RSS high-water mark. Returns False if unsupported."""
+    try:
+        with open(_PROC_CLEAR_REFS, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS in MB since the last reset (or since process start)."""
+    kb = _read_hwm_kb()
+    if kb is None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and KB on Linux/BSD.
+        kb = maxrss // 1024 if sys.platform == "darwin" else maxrss
+    return round(kb / 1024, 1)
+
+
+@dataclass
+class StageTiming:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float = 0.0
+    rows: int | None = None
+
+    def to_dict(self) -> dict:
+        stats: dict = {
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+        if self.rows is not None:
+            stats["rows"] = self.rows
+            stats["rows_per_sec"] = round(self.rows / self.wall_s) if self.wall_s > 0 else None
+        return stats
+
+
+# Number of functions listed under ``hotspots`` when code profiling is on.
+HOTSPOT_COUNT = 15
+
+
+@dataclass
+class StageTimer:
+    """Ordered collection of ``StageTiming`` records."""
+
+    stages: list[StageTiming] = field(default_factory=list)
+    peak_rss_scope: str = "stage"
+    profile_code: bool = False
+    profiler: cProfile.Profile | None = None
+
+    def __post_init__(self) -> None:
+        if self.profile_code and self.profiler is None:
+            self.profiler = cProfile.Profile()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: int | None = None, profile: bool = False) -> Iterator[StageTiming]:
+        timing = StageTiming(name, rows=rows)
+        if not reset_peak_rss():
+            self.peak_rss_scope = "process"
+        profiler = self.profiler if profile else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield timing
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            timing.wall_s = time.perf_counter() - wall
+            timing.cpu_s = time.process_time() - cpu
+            timing.peak_rss_mb = peak_rss_mb()
+            self.stages.append(timing)
+            logger.debug("Stage %s: %.3fs wall, %.1f MB peak", name, timing.wall_s, timing.peak_rss_mb)
+
+    def total_wall_s(self) -> float:
+        return sum(s.wall_s for s in self.stages)
+
+    def dump_profile(self, path: str) -> None:
+        """Write the collected cProfile data as a pstats file."""
+        if self.profiler is None:
+            raise ValueError("StageTimer was created without profile_code=True")
+        self.profiler.dump_stats(path)
+
+    def hotspots(self, limit: int = HOTSPOT_COUNT) -> list[dict]:
+        """Profiled functions with the most self time."""
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler).stats  # type: ignore[attr-defined]
+        ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return [
+            {
+                "function": f"{Path(filename).name}:{line}({func})" if line else func,
+                "calls": calls,
+                "self_s": round(tottime, 4),
+                "cumulative_s": round(cumtime, 4),
+            }
+            for (filename, line, func), (_, calls, tottime, cumtime, _) in ranked
+        ]
+
+    def to_dict(self) -> dict:
+        stages: dict[str, dict] = {}
+        for timing in self.stages:
+            # Repeated stage names (e.g. per fold) are summed.
+            if timing.name in stages:
+                prev = stages[timing.name]
+                prev["wall_s"] = round(prev["wall_s"] + timing.wall_s, 4)
+                prev["cpu_s"] = round(prev["cpu_s"] + timing.cpu_s, 4)
+                prev["peak_rss_mb"] = max(prev["peak_rss_mb"], timing.peak_rss_mb)
+                if timing.rows is not None:
+                    prev["rows"] = prev.get("rows", 0) + timing.rows
+                    prev["rows_per_sec"] = round(prev["rows"] / prev["wall_s"]) if prev["wall_s"] > 0 else None
+                prev["calls"] = prev.get("calls", 1) + 1
+            else:
+                stages[timing.name] = timing.to_dict()
+        timings = {
+            "stages": stages,
+            "total_wall_s": round(self.total_wall_s(), 4),
+            "peak_rss_mb": max((s.peak_rss_mb for s in self.stages), default=0.0),
+            "peak_rss_scope": self.peak_rss_scope,
+        }
+        if self.profiler is not None:
+            timings["hotspots"] = self.hotspots()
+        return timings
+
+
+def optional_stage(
+    timer: StageTimer | None, name: str, rows: int | None = None, profile: bool = False
+) -> contextlib.AbstractContextManager[StageTiming]:
+    """``timer.stage(...)``, or a no-op context when ``timer`` is None."""
+    if timer is None:
+        return contextlib.nullcontext(StageTiming(name, rows=rows))
+    return timer.stage(name, rows, profile)
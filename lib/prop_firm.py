@@ -0,0 +1,1085 @@
+"""
+Prop-firm evaluation of a trade sequence for every firm and account size at once.
+
+A firm's rules reduce to a few thresholds per account size: how its
+high-water mark trails (``static``, ``intraday`` or ``eod``), the drawdown
+limit in dollars and the daily loss limit. ``load_compiled_rules``
+validates the rules file once and compiles every firm into a typed
+``FirmRules`` with those thresholds resolved per account size, cached on
+disk by the file's hash. ``CompiledRules.limits`` lays them out as arrays
+with one entry per (firm, account size) combo.
+``TradeSeries`` holds what the trades contribute: PnL, the day of each
+trade and the PnL of each run of same-day trades. ``evaluate_prop_firms``
+builds the equity and high-water-mark paths once per account size and
+finds every combo's first violation with broadcasting. Its results are
+identical to walking the trades one combo at a time (the reference
+``simulate_prop_firm`` in ``scripts/prop-firm-validator.py``).
+
+``estimate_pass_probability`` asks how likely an evaluation is to pass
+rather than whether the one historical ordering did: it block-bootstraps
+whole trading days (each keeping its trades in order) into thousands of
+evaluation windows and reports, per combo, the probability of reaching the
+profit target, of breaching a limit first, and the days it takes to pass.
+
+``prop_firm_report`` assembles the validator's report (per-firm results,
+summary, optional pass odds). ``validate_prop_firms`` does so from a rules
+file for in-process callers: ``lib.backtest_runner --prop-firm`` feeds it
+the trade arrays directly, without a trades file round trip.
+
+Usage::
+
+    from lib.prop_firm import (
+        PassProbabilityConfig, TradeSeries, estimate_pass_probability, evaluate_prop_firms, load_compiled_rules,
+    )
+
+    rules = load_compiled_rules("docs/prop-firms/prop-firm-rules.json")
+    series = TradeSeries.from_days(net_pnl, ["2024-01-02", "2024-01-02", ...])
+    limits = rules.limits([("topstep", 50000), ("apex", 100000)])
+    results = evaluate_prop_firms(series, limits)  # one PropFirmResult per combo
+
+    odds = estimate_pass_probability(series, limits, PassProbabilityConfig(paths=10_000))
+
+    # Whole report from int64 exit timestamps
+    report = validate_prop_firms(TradeSeries.from_exit_times(pnl, exit_ns), PropFirmConfig())
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from lib.monte_carlo import BLOCK_PATHS, DEFAULT_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_RULES_FILE = PROJECT_ROOT / "docs" / "prop-firms" / "prop-firm-rules.json"
+
+# Account sizes tested when a firm lists none of the requested ones.
+DEFAULT_ACCOUNT_SIZES = (50000, 100000)
+
+_DAY_NS = 86_400 * 10**9
+
+# How the drawdown high-water mark follows equity.
+DRAWDOWN_MODES = ("static", "intraday", "eod")
+DD_STATIC, DD_INTRADAY, DD_EOD = range(len(DRAWDOWN_MODES))
+
+# Evaluation rules assumed when a firm's rules leave them out.
+DEFAULT_PROFIT_TARGET_PCT = 0.06
+DEFAULT_MIN_TRADING_DAYS = 1
+
+
+@dataclass
+class PropFirmResult:
+    """Result of prop firm validation for a single firm."""
+    firm_name: str
+    account_size: int
+    passed: bool
+    violation_reason: str | None = None
+    violation_date: str | None = None
+    final_equity: float = 0.0
+    max_drawdown: float = 0.0
+    max_drawdown_pct: float = 0.0
+    trading_days: int = 0
+    total_trades: int = 0
+    consistency_score: float = 0.0
+    best_day_pnl: float = 0.0
+    total_profit: float = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Rule lookups
+# ---------------------------------------------------------------------------
+
+
+def get_drawdown_type(firm_rules: dict) -> tuple[str, float]:
+    """Extract drawdown type and percentage from firm rules."""
+    dd_rules = firm_rules.get('risk_limits', {}).get('drawdown', {})
+
+    dd_type = dd_rules.get('type', 'trailing')
+    dd_percent = dd_rules.get('percent', 0.05)
+
+    # Handle nested structures
+    if isinstance(dd_percent, dict):
+        # Take first value
+        dd_percent = list(dd_percent.values())[0]
+
+    if 'values' in dd_rules:
+        values = dd_rules['values']
+        if isinstance(values, dict):
+            # Get first value
+            dd_percent = list(values.values())[0] / 100 if list(values.values())[0] > 1 else list(values.values())[0]
+
+    return dd_type, float(dd_percent) if dd_percent < 1 else float(dd_percent) / 100
+
+
+def get_daily_loss_limit(firm_rules: dict, account_size: int) -> float | None:
+    """Get daily loss limit for account size."""
+    dll_rules = firm_rules.get('risk_limits', {}).get('daily_loss_limit', {})
+
+    if not dll_rules.get('enabled', True):
+        return None
+
+    if dll_rules.get('enabled') is False:
+        return None
+
+    values = dll_rules.get('values', {})
+    if isinstance(values, dict):
+        return values.get(str(account_size), values.get(account_size))
+
+    # Percent-based
+    if 'percent' in dll_rules:
+        pct = dll_rules['percent']
+        return account_size * (pct / 100 if pct > 1 else pct)
+
+    return None
+
+
+def get_consistency_rule(firm_rules: dict, phase: str = 'evaluation') -> float | None:
+    """Get consistency rule percentage."""
+    cons_rules = firm_rules.get(phase, {}).get('consistency_rule', {})
+
+    if not cons_rules:
+        cons_rules = firm_rules.get('funded', {}).get('consistency_rule', {})
+
+    if not cons_rules.get('enabled', False):
+        return None
+
+    pct = cons_rules.get('percent', cons_rules.get('max_single_day_percent'))
+    if pct:
+        return pct / 100 if pct > 1 else pct
+
+    return None
+
+
+def get_profit_target(firm_rules: dict, account_size: int) -> float:
+    """Get evaluation profit target in dollars for account size."""
+    target = firm_rules.get('evaluation', {}).get('profit_target', {})
+
+    # Bare number: dollars above 100, otherwise a percentage
+    if isinstance(target, (int, float)):
+        if target > 100:
+            return float(target)
+        target = {'percent': target}
+
+    values = target.get('values', {})
+    if isinstance(values, dict):
+        value = values.get(str(account_size), values.get(account_size))
+        if value:
+            return float(value)
+
+    pct = target.get('percent', DEFAULT_PROFIT_TARGET_PCT)
+    return account_size * (pct / 100 if pct > 1 else pct)
+
+
+def get_min_trading_days(firm_rules: dict) -> int:
+    """Get minimum trading days required to pass the evaluation."""
+    days = firm_rules.get('evaluation', {}).get('min_trading_days', DEFAULT_MIN_TRADING_DAYS)
+
+    if isinstance(days, dict):
+        days = days.get('days', days.get('value', DEFAULT_MIN_TRADING_DAYS))
+
+    return int(days or 0)
+
+
+def drawdown_mode(dd_type: str) -> int:
+    """``DD_*`` code of a drawdown type string.
+
+    Trailing types update the high-water mark after every trade, which also
+    covers an end-of-day update, so "trailing EOD" types count as intraday.
+    """
+    lowered = dd_type.lower()
+    if 'intraday' in lowered or 'trailing' in lowered:
+        return DD_INTRADAY
+    if 'eod' in lowered:
+        return DD_EOD
+    return DD_STATIC
+
+
+# ---------------------------------------------------------------------------
+# Compiled rules
+# ---------------------------------------------------------------------------
+
+# Bump whenever the compiled classes or how they resolve rules change, so
+# stale cache entries are rebuilt instead of silently reused.
+RULES_CACHE_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class AccountRules:
+    """A firm's thresholds at one account size, in dollars."""
+
+    account_size: int
+    drawdown_limit_abs: float
+    # None (or zero) where the firm has no daily loss limit.
+    daily_loss_limit: float | None
+    profit_target: float
+
+
+@dataclass(frozen=True, slots=True)
+class FirmRules:
+    """One firm's validated rules, resolved to plain numbers.
+
+    ``accounts`` holds the thresholds of every account size the firm lists.
+    Other sizes resolve from the per-size tables and fractions below, with
+    the same result as the ``get_*`` lookups on the raw rules.
+    """
+
+    name: str
+    drawdown_type: str
+    drawdown_mode: int
+    # Fraction of the account below 1, dollars otherwise.
+    drawdown_limit: float
+    consistency: float | None
+    min_trading_days: int
+    # None when the rules list no sizes.
+    account_sizes: tuple[int, ...] | None
+    accounts: tuple[AccountRules, ...]
+    # Per-size daily loss limits; None when the limit is a fraction instead.
+    daily_loss_values: dict[int, float | None] | None
+    daily_loss_fraction: float | None
+    # Profit target in dollars for every size, else per size, else a fraction.
+    profit_target_fixed: float | None
+    profit_target_values: dict[int, float]
+    profit_target_fraction: float
+
+    def account(self, account_size: int) -> AccountRules:
+        """Thresholds at ``account_size``, listed or not."""
+        for account in self.accounts:
+            if account.account_size == account_size:
+                return account
+        return _resolve_account(self, account_size)
+
+
+def _resolve_account(firm: FirmRules, account_size: int) -> AccountRules:
+    dd_limit = firm.drawdown_limit
+    if firm.daily_loss_values is not None:
+        daily_loss_limit = firm.daily_loss_values.get(account_size)
+    elif firm.daily_loss_fraction is not None:
+        daily_loss_limit = account_size * firm.daily_loss_fraction
+    else:
+        daily_loss_limit = None
+    if firm.profit_target_fixed is not None:
+        profit_target = firm.profit_target_fixed
+    else:
+        profit_target = firm.profit_target_values.get(account_size) or account_size * firm.profit_target_fraction
+    return AccountRules(
+        account_size=account_size,
+        drawdown_limit_abs=account_size * dd_limit if dd_limit < 1 else dd_limit,
+        daily_loss_limit=daily_loss_limit,
+        profit_target=float(profit_target),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRules:
+    """Every firm of a rules file, in file order."""
+
+    firms: tuple[FirmRules, ...]
+    # SHA-256 of the rules file ("" when compiled from a dict).
+    sha256: str = ""
+
+    def __len__(self) -> int:
+        return len(self.firms)
+
+    def firm(self, name: str) -> FirmRules | None:
+        for firm in self.firms:
+            if firm.name == name:
+                return firm
+        return None
+
+    def limits(self, combos: Sequence[tuple[str, int]]) -> FirmLimits:
+        """``FirmLimits`` of each ``(firm_name, account_size)`` combo, in order."""
+        accounts = []
+        for firm_name, account_size in combos:
+            firm = self.firm(firm_name)
+            if firm is None:
+                raise KeyError(firm_name)
+            accounts.append((firm, firm.account(account_size)))
+        return FirmLimits(
+            firm_names=tuple(firm.name for firm, _ in accounts),
+            account_sizes=np.array([a.account_size for _, a in accounts], dtype=np.int64),
+            drawdown_mode=np.array([firm.drawdown_mode for firm, _ in accounts], dtype=np.int8),
+            drawdown_limit=np.array([firm.drawdown_limit for firm, _ in accounts], dtype=np.float64),
+            drawdown_limit_abs=np.array([a.drawdown_limit_abs for _, a in accounts], dtype=np.float64),
+            # A zero limit is never checked, like a missing one.
+            daily_loss_limit=np.array(
+                [float(a.daily_loss_limit) if a.daily_loss_limit else np.nan for _, a in accounts],
+                dtype=np.float64,
+            ),
+            profit_target=np.array([a.profit_target for _, a in accounts], dtype=np.float64),
+            min_trading_days=np.array([firm.min_trading_days for firm, _ in accounts], dtype=np.int64),
+        )
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _section(problems: list[str], where: str, rules: dict, key: str) -> dict:
+    """``rules[key]`` when it is a dict (``{}`` when missing), noting anything else."""
+    value = rules.get(key, {})
+    if isinstance(value, dict):
+        return value
+    problems.append(f"{where}.{key}: expected an object, got {type(value).__name__}")
+    return {}
+
+
+def _check_numbers(problems: list[str], where: str, section: dict, *keys: str) -> None:
+    for key in keys:
+        if key in section and not _is_number(section[key]):
+            problems.append(f"{where}.{key}: expected a number, got {section[key]!r}")
+
+
+def _check_size_table(problems: list[str], where: str, values, allow_null: bool = False) -> None:
+    """Per-size values keyed by account size, e.g. ``{"50000": 1000}``."""
+    if not isinstance(values, dict):
+        problems.append(f"{where}: expected an object keyed by account size")
+        return
+    for key, value in values.items():
+        if not (str(key).isdigit() and str(int(key)) == str(key)):
+            problems.append(f"{where}: account size key {key!r} is not an integer")
+        if not (_is_number(value) or (allow_null and value is None)):
+            problems.append(f"{where}.{key}: expected a number, got {value!r}")
+
+
+def _check_consistency(problems: list[str], where: str, phase: dict) -> None:
+    cons = _section(problems, where, phase, 'consistency_rule')
+    if not isinstance(cons.get('enabled', False), bool):
+        problems.append(f"{where}.consistency_rule.enabled: expected true or false")
+    _check_numbers(problems, f"{where}.consistency_rule", cons, 'percent', 'max_single_day_percent')
+
+
+def validate_firm_rules(firm_name: str, firm_rules) -> list[str]:
+    """Problems in one firm's rules that the ``get_*`` lookups would trip over."""
+    if not isinstance(firm_rules, dict):
+        return [f"{firm_name}: expected an object, got {type(firm_rules).__name__}"]
+    problems: list[str] = []
+
+    evaluation = _section(problems, firm_name, firm_rules, 'evaluation')
+    where = f"{firm_name}.evaluation"
+    sizes = evaluation.get('account_sizes', [])
+    if not isinstance(sizes, list) or not all(isinstance(s, int) and not isinstance(s, bool) and s > 0 for s in sizes):
+        problems.append(f"{where}.account_sizes: expected a list of positive integers")
+    target = evaluation.get('profit_target', {})
+    if isinstance(target, dict):
+        _check_numbers(problems, f"{where}.profit_target", target, 'percent')
+        if 'values' in target:
+            _check_size_table(problems, f"{where}.profit_target.values", target['values'], allow_null=True)
+    elif not _is_number(target):
+        problems.append(f"{where}.profit_target: expected a number or an object")
+    days = evaluation.get('min_trading_days', DEFAULT_MIN_TRADING_DAYS)
+    if isinstance(days, dict):
+        days = days.get('days', days.get('value', DEFAULT_MIN_TRADING_DAYS))
+    if days is not None and not _is_number(days):
+        problems.append(f"{where}.min_trading_days: expected a number of days")
+    _check_consistency(problems, where, evaluation)
+    _check_consistency(problems, f"{firm_name}.funded", _section(problems, firm_name, firm_rules, 'funded'))
+
+    risk_limits = _section(problems, firm_name, firm_rules, 'risk_limits')
+    where = f"{firm_name}.risk_limits"
+    drawdown = _section(problems, where, risk_limits, 'drawdown')
+    if not isinstance(drawdown.get('type', 'trailing'), str):
+        problems.append(f"{where}.drawdown.type: expected a string")
+    for key in ('percent', 'values'):
+        value = drawdown.get(key)
+        if isinstance(value, dict):
+            if not value or not all(_is_number(v) for v in value.values()):
+                problems.append(f"{where}.drawdown.{key}: expected a non-empty object of numbers")
+        elif key == 'percent' and key in drawdown and not _is_number(value):
+            problems.append(f"{where}.drawdown.percent: expected a number or an object of numbers")
+    daily = _section(problems, where, risk_limits, 'daily_loss_limit')
+    if not isinstance(daily.get('enabled', True), bool):
+        problems.append(f"{where}.daily_loss_limit.enabled: expected true or false")
+    # Anything but an object selects the percent limit instead.
+    if isinstance(daily.get('values'), dict):
+        _check_size_table(problems, f"{where}.daily_loss_limit.values", daily['values'], allow_null=True)
+    _check_numbers(problems, f"{where}.daily_loss_limit", daily, 'percent')
+    return problems
+
+
+def _fraction(pct: float) -> float:
+    return pct / 100 if pct > 1 else pct
+
+
+def compile_firm(firm_name: str, firm_rules: dict) -> FirmRules:
+    """Typed rules of one firm; ``firm_rules`` must pass ``validate_firm_rules``."""
+    dd_type, dd_limit = get_drawdown_type(firm_rules)
+    evaluation = firm_rules.get('evaluation', {})
+
+    daily = firm_rules.get('risk_limits', {}).get('daily_loss_limit', {})
+    daily_values: dict[int, float | None] | None = {}
+    daily_fraction = None
+    if daily.get('enabled', True):
+        values = daily.get('values', {})
+        if isinstance(values, dict):
+            daily_values = {int(size): value for size, value in values.items()}
+        else:
+            daily_values = None
+            if 'percent' in daily:
+                daily_fraction = _fraction(daily['percent'])
+
+    # Mirrors get_profit_target: a bare number is dollars above 100.
+    target = evaluation.get('profit_target', {})
+    target_fixed = None
+    if _is_number(target):
+        if target > 100:
+            target_fixed = float(target)
+        target = {'percent': target}
+    target_values = target.get('values', {})
+    target_values = {
+        int(size): float(value) for size, value in target_values.items() if value
+    } if isinstance(target_values, dict) else {}
+
+    sizes = evaluation.get('account_sizes')
+    firm = FirmRules(
+        name=firm_name,
+        drawdown_type=dd_type,
+        drawdown_mode=drawdown_mode(dd_type),
+        drawdown_limit=dd_limit,
+        consistency=get_consistency_rule(firm_rules),
+        min_trading_days=get_min_trading_days(firm_rules),
+        account_sizes=tuple(sizes) if sizes is not None else None,
+        accounts=(),
+        daily_loss_values=daily_values,
+        daily_loss_fraction=daily_fraction,
+        profit_target_fixed=target_fixed,
+        profit_target_values=target_values,
+        profit_target_fraction=_fraction(target.get('percent', DEFAULT_PROFIT_TARGET_PCT)),
+    )
+    return replace(firm, accounts=tuple(_resolve_account(firm, size) for size in dict.fromkeys(sizes or ())))
+
+
+def compile_rules(rules: dict, sha256: str = "") -> CompiledRules:
+    """Validate a rules document (``{"firms": {...}}``) and compile every firm.
+
+    Raises:
+        ValueError: Listing every problem found, before anything is compiled.
+    """
+    firms = rules.get('firms', {}) if isinstance(rules, dict) else None
+    if not isinstance(firms, dict):
+        raise ValueError("Invalid prop firm rules: expected an object with a 'firms' object")
+    problems = [p for name, firm_rules in firms.items() for p in validate_firm_rules(name, firm_rules)]
+    if problems:
+        raise ValueError("Invalid prop firm rules:\n  " + "\n  ".join(problems))
+    return CompiledRules(
+        firms=tuple(compile_firm(name, firm_rules) for name, firm_rules in firms.items()),
+        sha256=sha256,
+    )
+
+
+def rules_cache_dir() -> Path:
+    """Directory of compiled rules, under the data cache root (``SIGMA_QUANT_DATA_CACHE``)."""
+    # Same root as lib.data_cache, which is not imported to keep pandas out of startup.
+    override = os.environ.get("SIGMA_QUANT_DATA_CACHE")
+    root = Path(override) if override else PROJECT_ROOT / "data" / ".cache"
+    return root / "prop-firm-rules"
+
+
+def load_compiled_rules(rules_path: str | Path) -> CompiledRules:
+    """Compiled rules of a rules file, from the on-disk cache when it has them.
+
+    Entries are keyed by the file's SHA-256, so any edit compiles (and
+    validates) the file again; an unchanged file is only hashed and
+    unpickled.
+
+    Raises:
+        FileNotFoundError: ``rules_path`` does not exist.
+        ValueError: The rules fail validation.
+    """
+    source = Path(rules_path).resolve()
+    if not source.exists():
+        raise FileNotFoundError(f"Prop firm rules not found: {source}")
+    raw = source.read_bytes()
+    sha256 = hashlib.sha256(raw).hexdigest()
+    entry = rules_cache_dir() / f"{sha256[:16]}-v{RULES_CACHE_VERSION}.pickle"
+
+    try:
+        with open(entry, "rb") as f:
+            compiled = pickle.load(f)
+        if isinstance(compiled, CompiledRules) and compiled.sha256 == sha256:
+            logger.debug("Prop firm rules cache hit for %s", source)
+            return compiled
+    except FileNotFoundError:
+        pass
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError) as exc:
+        logger.debug("Ignoring unreadable rules cache %s: %s", entry, exc)
+
+    logger.debug("Prop firm rules cache miss for %s", source)
+    compiled = compile_rules(json.loads(raw), sha256=sha256)
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".build-", dir=entry.parent)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, entry)
+    except OSError as exc:
+        logger.warning("Could not cache compiled prop firm rules in %s: %s", entry.parent, exc)
+    return compiled
+
+
+# ---------------------------------------------------------------------------
+# Compiled limits
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class FirmLimits:
+    """Thresholds of (firm, account size) combos, one array entry per combo.
+
+    ``daily_loss_limit`` is NaN where the firm has none. ``profit_target``
+    (dollars) and ``min_trading_days`` only matter for pass probabilities.
+    """
+
+    firm_names: tuple[str, ...]
+    account_sizes: np.ndarray
+    drawdown_mode: np.ndarray
+    drawdown_limit: np.ndarray
+    drawdown_limit_abs: np.ndarray
+    daily_loss_limit: np.ndarray
+    profit_target: np.ndarray
+    min_trading_days: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.firm_names)
+
+
+def compile_limits(firms: dict, combos: Sequence[tuple[str, int]]) -> FirmLimits:
+    """Resolve the rules of each ``(firm_name, account_size)`` combo.
+
+    Shorthand for ``compile_rules({"firms": firms}).limits(combos)``; load a
+    rules file with ``load_compiled_rules`` to compile it only once.
+
+    Args:
+        firms: ``{"firm_name": firm_rules}`` (the rules file's ``firms``).
+        combos: Combos to compile, in result order.
+    """
+    return compile_rules({'firms': firms}).limits(combos)
+
+
+# ---------------------------------------------------------------------------
+# Trade series
+# ---------------------------------------------------------------------------
+
+
+def _segment_sums(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Left-to-right sum of each ``values[start:end]``, vectorized across segments.
+
+    Matches ``total += value`` in a loop bit for bit, which pairwise
+    reductions such as ``np.add.reduceat`` do not.
+    """
+    totals = np.zeros(len(starts), dtype=np.float64)
+    lengths = ends - starts
+    for offset in range(int(lengths.max()) if len(lengths) else 0):
+        active = lengths > offset
+        totals[active] += values[starts[active] + offset]
+    return totals
+
+
+@dataclass(frozen=True)
+class TradeSeries:
+    """Net PnL of trades in order with the day of each.
+
+    Consecutive trades of the same day form a segment; a day that recurs
+    after another day starts a new segment, like a new day in the walk.
+    """
+
+    pnl: np.ndarray
+    days: np.ndarray
+    segment_start: np.ndarray
+    segment_of: np.ndarray
+    segment_pnl: np.ndarray
+    # Distinct days among trades 0..i.
+    distinct_days: np.ndarray
+
+    @classmethod
+    def from_days(cls, pnl: Sequence[float] | np.ndarray, days: Sequence[str] | np.ndarray) -> TradeSeries:
+        """Build from per-trade net PnL and ``YYYY-MM-DD`` day labels."""
+        pnl = np.asarray(pnl, dtype=np.float64)
+        days = np.asarray(days, dtype=str)
+        n = len(pnl)
+        if len(days) != n:
+            raise ValueError(f"{n} PnL values but {len(days)} days")
+        new_segment = np.ones(n, dtype=bool)
+        new_segment[1:] = days[1:] != days[:-1]
+        segment_start = np.flatnonzero(new_segment)
+        segment_end = np.append(segment_start[1:], n)
+        first_seen = np.zeros(n, dtype=bool)
+        first_seen[np.unique(days, return_index=True)[1]] = True
+        return cls(
+            pnl=pnl,
+            days=days,
+            segment_start=segment_start,
+            segment_of=np.cumsum(new_segment) - 1,
+            segment_pnl=_segment_sums(pnl, segment_start, segment_end),
+            distinct_days=np.cumsum(first_seen),
+        )
+
+    @classmethod
+    def from_day_ids(cls, pnl: Sequence[float] | np.ndarray, days: np.ndarray) -> TradeSeries:
+        """Build from per-trade net PnL and trading days as days since 1970-01-01."""
+        labels = np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype(str)
+        return cls.from_days(pnl, labels)
+
+    @classmethod
+    def from_exit_times(cls, pnl: Sequence[float] | np.ndarray, exit_ns: np.ndarray) -> TradeSeries:
+        """Build from per-trade net PnL and int64 exit timestamps (wall-clock nanoseconds).
+
+        Each trade counts towards the calendar date of its exit, without
+        formatting a timestamp per trade.
+        """
+        return cls.from_day_ids(pnl, np.asarray(exit_ns, dtype=np.int64) // _DAY_NS)
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+
+def _drawdown_paths(series: TradeSeries, sizes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Equity ``(sizes, trades)`` and drawdown ``(modes, sizes, trades)`` after each trade."""
+    start = sizes.astype(np.float64)[:, np.newaxis]
+    # Accumulate from the starting balance so every step rounds like the walk.
+    equity = np.cumsum(np.hstack([start, np.broadcast_to(series.pnl, (len(sizes), len(series)))]), axis=1)
+    before = equity[:, :-1]
+    equity = equity[:, 1:]
+
+    intraday = np.maximum(np.maximum.accumulate(equity, axis=1), start)
+    # EOD: the mark moves to the equity held when each new segment begins.
+    eod_marks = np.maximum(np.maximum.accumulate(before[:, series.segment_start], axis=1), start)
+    eod = eod_marks[:, series.segment_of]
+    static = np.broadcast_to(start, equity.shape)
+
+    drawdown = np.empty((len(DRAWDOWN_MODES),) + equity.shape, dtype=np.float64)
+    drawdown[DD_STATIC] = static - equity
+    drawdown[DD_INTRADAY] = intraday - equity
+    drawdown[DD_EOD] = eod - equity
+    return equity, drawdown
+
+
+def _first_true(mask: np.ndarray, missing: int) -> np.ndarray:
+    """Column of the first True per row, ``missing`` where a row has none."""
+    if mask.shape[1] == 0:
+        return np.full(mask.shape[0], missing, dtype=np.int64)
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), missing)
+
+
+def evaluate_prop_firms(series: TradeSeries, limits: FirmLimits) -> list[PropFirmResult]:
+    """Walk ``series`` through every combo of ``limits``.
+
+    A combo stops at its first violation: a drawdown beyond its limit after
+    a trade, or a day whose PnL is below minus the daily loss limit (checked
+    when the next segment starts, and after the last trade).
+
+    Returns:
+        One ``PropFirmResult`` per combo, in ``limits`` order.
+    """
+    n = len(series)
+    n_segments = len(series.segment_start)
+    sizes, size_of = np.unique(limits.account_sizes, return_inverse=True)
+
+    if n:
+        equity, drawdown = _drawdown_paths(series, sizes)
+        max_drawdown = np.maximum.accumulate(np.maximum(drawdown, 0.0), axis=-1)
+        combo_dd = drawdown[limits.drawdown_mode, size_of]
+        dd_at = _first_true(combo_dd > limits.drawdown_limit_abs[:, np.newaxis], n)
+    else:
+        dd_at = np.full(len(limits), n, dtype=np.int64)
+
+    # A day's loss is checked before the first trade of the next segment
+    # (trade index ``n`` for the last segment), ahead of that trade's
+    # drawdown check.
+    day_breach = series.segment_pnl[np.newaxis, :] < -limits.daily_loss_limit[:, np.newaxis]
+    breached_segment = _first_true(day_breach, n_segments)
+    check_at = np.append(series.segment_start[1:], n)
+    daily_at = np.where(breached_segment < n_segments, check_at[np.minimum(breached_segment, max(n_segments - 1, 0))], n + 1)
+
+    positive = series.segment_pnl > 0
+    profit_total = np.cumsum(np.where(positive, series.segment_pnl, 0.0))
+    profit_days = np.cumsum(positive)
+    best_day = np.maximum.accumulate(series.segment_pnl) if n_segments else series.segment_pnl
+
+    results = []
+    for c in range(len(limits)):
+        account_size = int(limits.account_sizes[c])
+        s = size_of[c]
+        reason = date = None
+        if daily_at[c] <= dd_at[c] and daily_at[c] <= n:
+            # Stopped before trade ``last + 1``; the breached day is not recorded.
+            k = int(breached_segment[c])
+            last = int(daily_at[c]) - 1
+            completed = k if daily_at[c] < n else n_segments
+            day_pnl = series.segment_pnl[k]
+            reason = f"Daily loss ${abs(day_pnl):.2f} > limit ${limits.daily_loss_limit[c]:.2f}"
+            date = str(series.days[series.segment_start[k]])
+            counted = int(series.distinct_days[min(last + 1, n - 1)])
+        elif dd_at[c] < n:
+            last = int(dd_at[c])
+            completed = int(series.segment_of[last])
+            dd_limit = limits.drawdown_limit[c]
+            reason = (
+                f"Drawdown ${combo_dd[c, last]:.2f} > limit ${limits.drawdown_limit_abs[c]:.2f} "
+                f"({dd_limit*100:.1f}%)"
+            )
+            date = str(series.days[last])
+            counted = int(series.distinct_days[last])
+        else:
+            last = n - 1
+            completed = n_segments
+            counted = int(series.distinct_days[-1]) if n else 0
+
+        if last >= 0:
+            final_equity = float(equity[s, last])
+            max_dd = float(max_drawdown[limits.drawdown_mode[c], s, last])
+        else:
+            final_equity, max_dd = float(account_size), 0.0
+
+        total_profit: float = 0
+        best: float = 0
+        if completed:
+            best = float(best_day[completed - 1])
+            if profit_days[completed - 1]:
+                total_profit = float(profit_total[completed - 1])
+        consistency_score = best / total_profit if total_profit > 0 and best > 0 else 0.0
+
+        results.append(PropFirmResult(
+            firm_name=limits.firm_names[c],
+            account_size=account_size,
+            passed=reason is None,
+            violation_reason=reason,
+            violation_date=date,
+            final_equity=final_equity,
+            max_drawdown=max_dd,
+            max_drawdown_pct=max_dd / account_size,
+            trading_days=counted,
+            total_trades=n,
+            consistency_score=consistency_score,
+            best_day_pnl=best,
+            total_profit=total_profit,
+        ))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Monte Carlo pass probability
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class PassProbabilityConfig:
+    """Simulated evaluation windows.
+
+    Each path is ``window_days`` trading days drawn as blocks of
+    ``block_days`` consecutive historical days (circular block bootstrap),
+    keeping streaks across days and the trade order within each day.
+    Results depend only on ``seed``, not on ``max_bytes``.
+    """
+
+    paths: int = 10_000
+    window_days: int = 30
+    block_days: int = 5
+    seed: int = 0
+    max_bytes: int = DEFAULT_MAX_BYTES
+
+
+@dataclass
+class PassProbability:
+    """Monte Carlo outcome of one (firm, account size) evaluation."""
+
+    firm_name: str
+    account_size: int
+    pass_probability: float
+    breach_probability: float
+    # Neither passed nor breached within the window.
+    expired_probability: float
+    expected_days_to_pass: float | None
+    median_days_to_pass: int | None
+
+    def to_dict(self) -> dict:
+        return {
+            "pass_probability": round(self.pass_probability, 4),
+            "breach_probability": round(self.breach_probability, 4),
+            "expired_probability": round(self.expired_probability, 4),
+            "expected_days_to_pass": (
+                round(self.expected_days_to_pass, 2) if self.expected_days_to_pass is not None else None
+            ),
+            "median_days_to_pass": self.median_days_to_pass,
+        }
+
+
+def day_profiles(series: TradeSeries) -> np.ndarray:
+    """``(4, days)`` rows per same-day segment: PnL, lowest and highest running PnL, intraday drawdown.
+
+    Running PnL is measured from the day's start after each trade; the
+    intraday drawdown is the deepest fall from the day's running peak, the
+    start counting as a peak.
+    """
+    starts = series.segment_start
+    lengths = np.diff(np.append(starts, len(series)))
+    run = np.zeros(len(starts))
+    low = np.full(len(starts), np.inf)
+    high = np.full(len(starts), -np.inf)
+    peak = np.zeros(len(starts))
+    drawdown = np.zeros(len(starts))
+    for offset in range(int(lengths.max()) if len(lengths) else 0):
+        active = np.flatnonzero(lengths > offset)
+        run[active] += series.pnl[starts[active] + offset]
+        low[active] = np.minimum(low[active], run[active])
+        high[active] = np.maximum(high[active], run[active])
+        peak[active] = np.maximum(peak[active], run[active])
+        drawdown[active] = np.maximum(drawdown[active], peak[active] - run[active])
+    return np.vstack([run, low, high, drawdown])
+
+
+def _window_outcomes(drawn: np.ndarray, limits: FirmLimits) -> tuple[np.ndarray, np.ndarray]:
+    """First pass day and first breach day ``(combos, paths)`` of drawn windows.
+
+    ``drawn`` is ``day_profiles`` gathered to ``(4, paths, window_days)``;
+    a day that never comes is ``window_days``. A breach is a drawdown beyond
+    the limit at any trade of the day (from the day's lowest running PnL) or
+    a daily loss beyond the limit; the target counts at the day's close.
+    """
+    pnl, low, high, intraday_dd = drawn
+    n_paths, window = pnl.shape
+    day_number = np.arange(1, window + 1)
+    pass_day = np.full((len(limits), n_paths), window, dtype=np.int64)
+    breach_day = np.full((len(limits), n_paths), window, dtype=np.int64)
+
+    sizes, size_of = np.unique(limits.account_sizes, return_inverse=True)
+    for s, size in enumerate(sizes):
+        start = float(size)
+        end_equity = start + np.cumsum(pnl, axis=1)
+        start_equity = np.empty_like(end_equity)
+        start_equity[:, 0] = start
+        start_equity[:, 1:] = end_equity[:, :-1]
+        profit = end_equity - start
+
+        for mode in np.unique(limits.drawdown_mode[size_of == s]):
+            if mode == DD_INTRADAY:
+                mark = np.maximum(np.maximum.accumulate(start_equity + high, axis=1), start)
+                mark_before = np.empty_like(mark)
+                mark_before[:, 0] = start
+                mark_before[:, 1:] = mark[:, :-1]
+                drawdown = np.maximum(mark_before - start_equity - low, intraday_dd)
+            elif mode == DD_EOD:
+                drawdown = np.maximum(np.maximum.accumulate(start_equity, axis=1), start) - start_equity - low
+            else:
+                drawdown = start - start_equity - low
+
+            combos = np.flatnonzero((size_of == s) & (limits.drawdown_mode == mode))
+            breach = drawdown > limits.drawdown_limit_abs[combos, np.newaxis, np.newaxis]
+            breach |= pnl < -limits.daily_loss_limit[combos, np.newaxis, np.newaxis]
+            reached = (profit >= limits.profit_target[combos, np.newaxis, np.newaxis]) & (
+                day_number >= limits.min_trading_days[combos, np.newaxis, np.newaxis]
+            )
+            breach_day[combos] = np.where(breach.any(axis=2), breach.argmax(axis=2), window)
+            pass_day[combos] = np.where(reached.any(axis=2), reached.argmax(axis=2), window)
+    return pass_day, breach_day
+
+
+def estimate_pass_probability(
+    series: TradeSeries,
+    limits: FirmLimits,
+    config: PassProbabilityConfig | None = None,
+) -> list[PassProbability] | None:
+    """Pass, breach and days-to-pass odds of every combo over simulated windows.
+
+    A window passes on the first day it closes at or above the profit
+    target (after the minimum trading days) without having breached a
+    limit; a breach on the same day counts as a breach.
+
+    Returns:
+        One ``PassProbability`` per combo in ``limits`` order, or ``None``
+        without trades.
+    """
+    config = config or PassProbabilityConfig()
+    if len(series) == 0 or config.paths < 1 or config.window_days < 1:
+        return None
+    profiles = day_profiles(series)
+    n_days = profiles.shape[1]
+    window = config.window_days
+    block_days = max(1, min(config.block_days, n_days))
+    blocks_per_path = -(-window // block_days)
+    offsets = np.arange(block_days)
+
+    # Per path: a few float matrices of window days plus boolean matrices
+    # for each combo.
+    path_bytes = window * (8 * 12 + 3 * len(limits))
+    n_blocks = -(-config.paths // BLOCK_PATHS)
+    blocks_per_chunk = max(1, config.max_bytes // (path_bytes * BLOCK_PATHS))
+
+    passed = np.zeros(len(limits), dtype=np.int64)
+    breached = np.zeros(len(limits), dtype=np.int64)
+    days_histogram = np.zeros((len(limits), window + 1), dtype=np.int64)
+    for first in range(0, n_blocks, blocks_per_chunk):
+        starts = []
+        for block in range(first, min(first + blocks_per_chunk, n_blocks)):
+            rng = np.random.default_rng([config.seed, block])
+            size = min(BLOCK_PATHS, config.paths - block * BLOCK_PATHS)
+            starts.append(rng.integers(0, n_days, size=(size, blocks_per_path)))
+        days = (np.concatenate(starts)[:, :, np.newaxis] + offsets) % n_days
+        days = days.reshape(len(days), -1)[:, :window]
+
+        pass_day, breach_day = _window_outcomes(profiles[:, days], limits)
+        is_pass = pass_day < breach_day
+        passed += is_pass.sum(axis=1)
+        breached += ((breach_day <= pass_day) & (breach_day < window)).sum(axis=1)
+        combo_rows = np.broadcast_to(np.arange(len(limits))[:, np.newaxis], is_pass.shape)
+        np.add.at(days_histogram, (combo_rows[is_pass], pass_day[is_pass] + 1), 1)
+
+    results = []
+    day_numbers = np.arange(window + 1)
+    for c in range(len(limits)):
+        expected = median = None
+        if passed[c]:
+            expected = float(days_histogram[c] @ day_numbers / passed[c])
+            median = int(np.searchsorted(np.cumsum(days_histogram[c]), (passed[c] + 1) // 2))
+        results.append(PassProbability(
+            firm_name=limits.firm_names[c],
+            account_size=int(limits.account_sizes[c]),
+            pass_probability=float(passed[c] / config.paths),
+            breach_probability=float(breached[c] / config.paths),
+            expired_probability=float((config.paths - passed[c] - breached[c]) / config.paths),
+            expected_days_to_pass=expected,
+            median_days_to_pass=median,
+        ))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class PropFirmConfig:
+    """Prop-firm validation of a backtest's trades.
+
+    ``account_sizes`` are tested where a firm offers them (a firm offering
+    none of them is tested at its first two sizes). With
+    ``pass_probability`` the report adds Monte Carlo pass odds.
+    """
+
+    rules_path: str = str(DEFAULT_RULES_FILE)
+    account_sizes: tuple[int, ...] = DEFAULT_ACCOUNT_SIZES
+    pass_probability: PassProbabilityConfig | None = None
+
+
+def _recommended_firms(results: dict, passing_firms: list[str]) -> list[str]:
+    """Top three passing firms by lowest drawdown, then highest profit."""
+    scores = []
+    for firm_name in passing_firms:
+        for size, result in results.get(firm_name, {}).items():
+            if result.get('passed'):
+                score = (
+                    1 - result.get('max_drawdown_pct', 1),  # Lower DD = better
+                    result.get('final_equity', 0) / size,    # Higher profit = better
+                )
+                scores.append((firm_name, score))
+                break
+
+    scores.sort(key=lambda x: x[1], reverse=True)
+    return [s[0] for s in scores[:3]]
+
+
+def _firm_warnings(results: dict) -> list[str]:
+    """Near-miss consistency and drawdown warnings (at most five)."""
+    warnings = []
+    for firm_name, firm_results in results.items():
+        for result in firm_results.values():
+            cons_score = result.get('consistency_score', 0)
+            if 0.40 < cons_score < 0.50:
+                warnings.append(f"{firm_name}: Consistency score {cons_score:.0%} close to limit")
+
+            dd_pct = result.get('max_drawdown_pct', 0)
+            if result.get('passed') and dd_pct > 0.06:
+                warnings.append(f"{firm_name}: Max drawdown {dd_pct:.1%} close to limits")
+
+    return list(set(warnings))[:5]  # Dedupe and limit
+
+
+def prop_firm_report(
+    series: TradeSeries,
+    rules: CompiledRules,
+    account_sizes: Sequence[int] | None = None,
+    pass_probability: PassProbabilityConfig | None = None,
+) -> dict:
+    """Validation report of ``series`` against every firm of ``rules``.
+
+    Returns:
+        ``{"results": {firm: {size: PropFirmResult dict}}, "summary": ...,
+        "timestamp": ...}``, plus ``"monteCarlo"`` with ``pass_probability``.
+        A strategy is deployment-ready when at least three firms pass.
+    """
+    account_sizes = list(account_sizes or DEFAULT_ACCOUNT_SIZES)
+    firms = [firm.name for firm in rules.firms]
+
+    combos = []
+    for firm in rules.firms:
+        firm_sizes = firm.account_sizes if firm.account_sizes is not None else account_sizes
+        # Test intersection of requested and available sizes
+        test_sizes = [s for s in account_sizes if s in firm_sizes] or list(firm_sizes[:2])
+        combos.extend((firm.name, size) for size in test_sizes)
+
+    # Every firm and size in one pass over the trades
+    limits = rules.limits(combos)
+    results: dict[str, dict] = {firm_name: {} for firm_name in firms}
+    for result in evaluate_prop_firms(series, limits):
+        results[result.firm_name][result.account_size] = asdict(result)
+
+    passing_firms = [name for name, sized in results.items() if any(r['passed'] for r in sized.values())]
+    failing_firms = [name for name in results if name not in passing_firms]
+    report = {
+        'results': results,
+        'summary': {
+            'firmsTested': len(firms),
+            'firmsPassing': len(passing_firms),
+            'firmsFailing': len(failing_firms),
+            'passingFirms': passing_firms,
+            'failingFirms': failing_firms,
+            'deploymentReady': len(passing_firms) >= 3,
+            'recommendedFirms': _recommended_firms(results, passing_firms),
+            'warnings': _firm_warnings(results),
+        },
+        'timestamp': datetime.now().isoformat(),
+    }
+
+    odds = estimate_pass_probability(series, limits, pass_probability) if pass_probability else None
+    if odds is not None:
+        monte_carlo: dict[str, dict] = {firm_name: {} for firm_name in firms}
+        for estimate in odds:
+            monte_carlo[estimate.firm_name][estimate.account_size] = estimate.to_dict()
+        report['monteCarlo'] = {
+            'paths': pass_probability.paths,
+            'windowDays': pass_probability.window_days,
+            'blockDays': pass_probability.block_days,
+            'seed': pass_probability.seed,
+            'results': monte_carlo,
+        }
+    return report
+
+
+def validate_prop_firms(series: TradeSeries, config: PropFirmConfig | None = None) -> dict:
+    """``prop_firm_report`` with the compiled rules of ``config.rules_path``.
+
+    For in-process callers such as ``lib.backtest_runner``: build ``series``
+    straight from the trade arrays (``TradeSeries.from_exit_times`` or
+    ``from_day_ids``) instead of writing and re-reading a trades file.
+    """
+    config = config or PropFirmConfig()
+    return prop_firm_report(
+        series, load_compiled_rules(config.rules_path), config.account_sizes, config.pass_probability
+    )
@@ -0,0 +1,250 @@
+"""
+Backtest result files in pretty, compact-columnar or NumPy sidecar form.
+
+The runner's result dict carries bulky, row-shaped sections: the per-trade
+``trade_log``, the sampled ``equity_curve`` and the ``daily_returns``. ``json`` keeps the
+historical pretty-printed layout (one dict per row). The other formats store
+those sections as columns, one array per field:
+
+- ``compact``: a single minified JSON file with ``{"field": [...]}`` columns
+  (orjson when installed), typically several times smaller and faster to
+  write and parse. Non-finite floats (an ``inf`` profit factor) are written
+  as ``Infinity``/``NaN`` like the stdlib encoder does, not as ``null``.
+- ``npz``: a small summary JSON without the bulky sections plus a compressed
+  ``.trades.npz`` sidecar next to it (same stem) holding the columns, so
+  listing tools can read metrics without touching trades.
+
+Usage::
+
+    from lib.result_io import load_result, read_result_summary, write_result
+
+    write_result(results, "output/backtests/sma.json", fmt="npz")
+    summary = read_result_summary("output/backtests/sma.json")  # no trade_log
+    full = load_result("output/backtests/sma.json")             # row dicts again
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ("json", "compact", "npz")
+
+# Row-shaped result sections stored column-wise by the compact formats.
+COLUMNAR_KEYS = ("trade_log", "equity_curve", "daily_returns")
+
+SIDECAR_SUFFIX = ".trades.npz"
+
+# Sidecar suffix of files written before it was made distinct from any
+# summary name (a summary called ``x.npz`` used to overwrite its sidecar).
+LEGACY_SIDECAR_SUFFIX = ".npz"
+
+# orjson writes NaN and +-Infinity as null. They are swapped for these
+# placeholders before encoding and for the stdlib's tokens after it.
+_NON_FINITE_TOKENS = {"\x00nan": b"NaN", "\x00inf": b"Infinity", "\x00-inf": b"-Infinity"}
+_FINITE_SCALARS = frozenset({str, int, bool, type(None)})
+
+
+def records_to_columns(records: list[dict]) -> dict[str, list]:
+    """Turn ``[{"a": 1, "b": 2}, ...]`` into ``{"a": [1, ...], "b": [2, ...]}``."""
+    if not records:
+        return {}
+    return {name: [row[name] for row in records] for name in records[0]}
+
+
+def columns_to_records(columns: dict[str, Any]) -> list[dict]:
+    """Inverse of ``records_to_columns`` (accepts lists or NumPy arrays)."""
+    if not columns:
+        return []
+    names = list(columns)
+    values = [col.tolist() if isinstance(col, np.ndarray) else list(col) for col in columns.values()]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _columnar_sections(results: dict) -> list[str]:
+    return [key for key in COLUMNAR_KEYS if isinstance(results.get(key), list)]
+
+
+def _placeholder(value: float) -> str:
+    return "\x00nan" if value != value else ("\x00inf" if value > 0 else "\x00-inf")
+
+
+def _mask_non_finite(obj: Any) -> tuple[Any, bool]:
+    """``obj`` with non-finite floats replaced by placeholders, and whether any were."""
+    if isinstance(obj, float):
+        return (obj, False) if math.isfinite(obj) else (_placeholder(obj), True)
+    if isinstance(obj, dict):
+        masked = {key: _mask_non_finite(value) for key, value in obj.items()}
+        if not any(changed for _, changed in masked.values()):
+            return obj, False
+        return {key: value for key, (value, _) in masked.items()}, True
+    if isinstance(obj, (list, tuple, np.ndarray)):
+        if isinstance(obj, np.ndarray) and obj.dtype.kind not in "fO":
+            return obj, False
+        # Numeric columns are checked in one vectorized pass.
+        try:
+            if np.isfinite(np.asarray(obj, dtype=np.float64)).all():
+                return obj, False
+        except (TypeError, ValueError):
+            pass
+        items = obj.tolist() if isinstance(obj, np.ndarray) else obj
+        masked_items = None
+        for i, item in enumerate(items):
+            if type(item) in _FINITE_SCALARS:
+                continue
+            value, changed = _mask_non_finite(item)
+            if changed:
+                masked_items = list(items) if masked_items is None else masked_items
+                masked_items[i] = value
+        return (obj, False) if masked_items is None else (masked_items, True)
+    return obj, False
+
+
+def _dumps_compact(obj: Any) -> bytes:
+    if orjson is not None:
+        masked, changed = _mask_non_finite(obj)
+        try:
+            payload = orjson.dumps(masked, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass  # e.g. non-string dict keys; the stdlib encoder coerces them
+        else:
+            if changed:
+                for placeholder, token in _NON_FINITE_TOKENS.items():
+                    payload = payload.replace(orjson.dumps(placeholder), token)
+            return payload
+    return json.dumps(obj, default=str, separators=(",", ":")).encode()
+
+
+def _loads(payload: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            pass  # NaN/Infinity written by the stdlib encoder
+    return json.loads(payload)
+
+
+def encode_result(results: dict, fmt: str = "json", indent: int | None = 2) -> dict[str, bytes]:
+    """Serialize ``results`` without touching the filesystem.
+
+    Args:
+        results: Result dict as returned by the runner.
+        fmt: One of ``OUTPUT_FORMATS``.
+        indent: JSON indent for the ``json`` format (``None`` = one line).
+
+    Returns:
+        ``{suffix: payload}``: ``".json"`` always, plus ``".npz"`` for the
+        sidecar format when there are sections to store.
+    """
+    if fmt == "json":
+        return {".json": json.dumps(results, indent=indent, default=str).encode()}
+
+    sections = _columnar_sections(results)
+    if fmt == "compact":
+        compact = dict(results)
+        for key in sections:
+            compact[key] = records_to_columns(results[key])
+        compact["result_format"] = "compact"
+        return {".json": _dumps_compact(compact)}
+
+    if fmt == "npz":
+        summary = {k: v for k, v in results.items() if k not in sections}
+        arrays: dict[str, np.ndarray] = {}
+        for key in sections:
+            for name, values in records_to_columns(results[key]).items():
+                arrays[f"{key}/{name}"] = np.asarray(values)
+        summary["result_format"] = "npz"
+        summary["columnar_sections"] = {key: len(results[key]) for key in sections}
+        if not sections:
+            return {".json": _dumps_compact(summary)}  # nothing worth a sidecar
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return {".json": _dumps_compact(summary), SIDECAR_SUFFIX: buffer.getvalue()}
+
+    raise ValueError(f"Unknown result format {fmt!r}; expected one of {OUTPUT_FORMATS}")
+
+
+def sidecar_path(path: str | Path) -> Path:
+    """Path of the ``.trades.npz`` sidecar belonging to a summary JSON."""
+    return Path(path).with_suffix(SIDECAR_SUFFIX)
+
+
+def _existing_sidecar(path: str | Path) -> Path:
+    sidecar = sidecar_path(path)
+    legacy = Path(path).with_suffix(LEGACY_SIDECAR_SUFFIX)
+    if not sidecar.exists() and legacy != Path(path) and legacy.exists():
+        return legacy
+    return sidecar
+
+
+def write_encoded(encoded: dict[str, bytes], path: str | Path) -> list[Path]:
+    """Write the payloads from ``encode_result`` next to each other.
+
+    The sidecar is written first and every file is replaced atomically, so
+    a reader never sees a summary pointing at a missing or stale sidecar.
+    """
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    written = []
+    for suffix in sorted(encoded, key=lambda s: s == ".json"):
+        target = out if suffix == ".json" else out.with_suffix(suffix)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(encoded[suffix])
+        os.replace(tmp, target)
+        written.append(target)
+    return written
+
+
+def write_result(results: dict, path: str | Path, fmt: str = "json", indent: int | None = 2) -> list[Path]:
+    """Serialize ``results`` in ``fmt`` to ``path`` (plus sidecar). Returns the files written."""
+    return write_encoded(encode_result(results, fmt, indent), path)
+
+
+def read_result_summary(path: str | Path) -> dict:
+    """Load a result file without its row-shaped sections.
+
+    Sidecar results never open the ``.npz``; for ``json``/``compact`` files
+    the sections are parsed with the rest and then dropped.
+    """
+    data = _loads(Path(path).read_bytes())
+    if isinstance(data, dict):
+        for key in COLUMNAR_KEYS:
+            data.pop(key, None)
+    return data
+
+
+def load_result(path: str | Path) -> dict:
+    """Load a result file in any format with every row-shaped section as row dicts."""
+    data = _loads(Path(path).read_bytes())
+
+    fmt = data.pop("result_format", "json")
+    if fmt == "compact":
+        for key in COLUMNAR_KEYS:
+            if isinstance(data.get(key), dict):
+                data[key] = columns_to_records(data[key])
+    elif fmt == "npz":
+        sections = data.pop("columnar_sections", {})
+        if not sections:
+            return data
+        columns: dict[str, dict[str, np.ndarray]] = {key: {} for key in sections}
+        with np.load(_existing_sidecar(path)) as arrays:
+            for name in arrays.files:
+                key, field = name.split("/", 1)
+                columns.setdefault(key, {})[field] = arrays[name]
+        for key, cols in columns.items():
+            data[key] = columns_to_records(cols)
+    return data
@@ -0,0 +1,163 @@
+"""
+Shared-memory OHLCV frames for multi-process backtests.
+
+The parent process copies each numeric / timestamp column of a loaded
+DataFrame into its own ``multiprocessing.shared_memory`` block exactly once.
+Workers receive only a small picklable handle, attach to the blocks and
+rebuild a DataFrame whose columns are read-only views over shared memory,
+so RSS no longer grows with the worker count.
+
+Usage::
+
+    from lib.shared_data import attach_frame, share_frame
+
+    with share_frame(df) as shared:
+        # ship shared.handle to workers (e.g. via ProcessPoolExecutor initargs)
+        ...
+
+    # inside a worker
+    attached = attach_frame(handle)
+    df = attached.df  # zero-copy, read-only OHLCV columns
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedColumn:
+    """Location and layout of one column stored in shared memory."""
+
+    name: str
+    shm_name: str
+    dtype: str
+    tz: str | None = None  # set for timezone-aware timestamp columns
+
+
+@dataclass(frozen=True)
+class SharedFrameHandle:
+    """Picklable description of a shared frame, sent to worker processes."""
+
+    length: int
+    columns: tuple[SharedColumn, ...]
+    # Columns that cannot live in shared memory (strings, objects) travel
+    # with the handle; they are rare and small next to OHLCV.
+    extra: dict[str, pd.Series] = field(default_factory=dict)
+    column_order: tuple[str, ...] = ()
+
+
+class SharedFrame:
+    """Owner of the shared-memory blocks backing a DataFrame.
+
+    The creating process must call ``close()`` (or use the object as a
+    context manager) once all workers are done; that releases and unlinks
+    every block.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._blocks: list[shared_memory.SharedMemory] = []
+        columns: list[SharedColumn] = []
+        extra: dict[str, pd.Series] = {}
+
+        try:
+            for name in df.columns:
+                series = df[name]
+                tz = None
+                if isinstance(series.dtype, pd.DatetimeTZDtype):
+                    tz = str(series.dtype.tz)
+                    values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+                elif pd.api.types.is_datetime64_dtype(series.dtype):
+                    values = series.to_numpy()
+                elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+                    values = series.to_numpy()
+                else:
+                    extra[str(name)] = series
+                    continue
+
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self._blocks.append(block)
+                view = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+                view[:] = values
+                del view  # release the exported buffer so close() can succeed
+
+                columns.append(SharedColumn(str(name), block.name, values.dtype.str, tz))
+        except Exception:
+            self.close()
+            raise
+
+        self.handle = SharedFrameHandle(
+            length=len(df),
+            columns=tuple(columns),
+            extra=extra,
+            column_order=tuple(str(c) for c in df.columns),
+        )
+        logger.debug(
+            "Shared %d columns (%d bytes) across %d blocks",
+            len(columns), sum(b.size for b in self._blocks), len(self._blocks),
+        )
+
+    def close(self) -> None:
+        """Release and unlink every block owned by this frame."""
+        for block in self._blocks:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+
+    def __enter__(self) -> SharedFrame:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def share_frame(df: pd.DataFrame) -> SharedFrame:
+    """Copy ``df`` into shared memory once and return the owning ``SharedFrame``."""
+    return SharedFrame(df)
+
+
+@dataclass
+class AttachedFrame:
+    """A DataFrame view over shared memory plus the blocks keeping it alive."""
+
+    df: pd.DataFrame
+    blocks: list[shared_memory.SharedMemory]
+
+
+def attach_frame(handle: SharedFrameHandle) -> AttachedFrame:
+    """Attach to the blocks described by ``handle`` without copying.
+
+    Columns are read-only so a strategy that tries to overwrite OHLCV in
+    place fails loudly instead of corrupting data other workers see; adding
+    new indicator columns works as usual. Timezone-aware timestamp columns
+    are the one exception to zero-copy: pandas has no public way to wrap
+    naive datetime64 memory as tz-aware, so each worker holds its own
+    8-byte-per-bar copy of that column.
+    """
+    blocks: list[shared_memory.SharedMemory] = []
+    data: dict[str, object] = {}
+
+    for col in handle.columns:
+        block = shared_memory.SharedMemory(name=col.shm_name)
+        blocks.append(block)
+        values = np.ndarray((handle.length,), dtype=np.dtype(col.dtype), buffer=block.buf)
+        values.flags.writeable = False
+        if col.tz is not None:
+            data[col.name] = pd.Series(pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(col.tz), copy=False)
+        else:
+            data[col.name] = pd.Series(values, copy=False)
+
+    data.update(handle.extra)
+    order = handle.column_order or tuple(data)
+    df = pd.DataFrame({name: data[name] for name in order}, copy=False)
+    return AttachedFrame(df=df, blocks=blocks)
@@ -0,0 +1,164 @@
+"""
+Reproducible synthetic OHLCV bars for benchmarks and stress tests.
+
+Prices follow a geometric Brownian motion whose drift and volatility switch
+between regimes (a Markov chain with geometric regime durations), which
+gives trending, ranging and volatile stretches instead of one homogeneous
+random walk. Bars are generated in fixed-size blocks, each seeded from
+``(seed, block_index)`` and continuing from the previous block's last close
+and regime, so a given ``seed`` always yields the same series no matter how
+many bars are requested or how they are written out.
+
+Usage::
+
+    from lib.synthetic_data import generate_ohlcv, write_ohlcv_csv
+
+    df = generate_ohlcv(1_000_000, seed=7)
+    write_ohlcv_csv("data/bench/ES_synth_100M.csv", 100_000_000, seed=7)  # streamed
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bars per generation block; fixed so the series does not depend on how
+# callers chunk their requests.
+BLOCK_BARS = 1 << 20
+
+
+@dataclass(frozen=True)
+class Regime:
+    """Annualized drift and volatility of one market regime."""
+
+    name: str
+    drift: float
+    volatility: float
+
+
+DEFAULT_REGIMES = (
+    Regime("ranging", 0.0, 0.12),
+    Regime("trending_up", 0.35, 0.18),
+    Regime("trending_down", -0.35, 0.22),
+    Regime("volatile", 0.0, 0.55),
+)
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    """Shape of the generated series.
+
+    ``bar_minutes`` sets both the timestamp spacing and the GBM time step
+    (assuming 24h trading, as for crypto). ``mean_regime_bars`` is the
+    expected regime length.
+    """
+
+    start_price: float = 4500.0
+    start: str = "2018-01-01"
+    bar_minutes: float = 1.0
+    mean_regime_bars: float = 5_000.0
+    regimes: tuple[Regime, ...] = DEFAULT_REGIMES
+    tick_size: float = 0.25
+    base_volume: float = 1_000.0
+
+
+def _blocks(n_bars: int, seed: int, config: SyntheticConfig) -> Iterator[pd.DataFrame]:
+    minutes_per_year = 365.25 * 24 * 60
+    dt = config.bar_minutes / minutes_per_year
+    drift = np.array([r.drift for r in config.regimes])
+    vol = np.array([r.volatility for r in config.regimes])
+    n_regimes = len(config.regimes)
+    switch_p = 1.0 / max(config.mean_regime_bars, 1.0)
+
+    start_ns = pd.Timestamp(config.start, tz="UTC").value
+    step_ns = int(round(config.bar_minutes * 60 * 1e9))
+
+    last_close = config.start_price
+    regime = 0
+    for block, offset in enumerate(range(0, n_bars, BLOCK_BARS)):
+        m = min(BLOCK_BARS, n_bars - offset)
+        rng = np.random.default_rng([seed, block])
+        # Always draw a full block so a truncated final block matches the
+        # prefix of a longer series with the same seed.
+        switches = rng.random(BLOCK_BARS)[:m] < switch_p
+        jumps = rng.integers(1, max(n_regimes, 2), BLOCK_BARS)[:m]
+        z_close = rng.standard_normal(BLOCK_BARS)[:m]
+        z_high = np.abs(rng.standard_normal(BLOCK_BARS)[:m])
+        z_low = np.abs(rng.standard_normal(BLOCK_BARS)[:m])
+        z_volume = rng.standard_normal(BLOCK_BARS)[:m]
+
+        regimes = (regime + np.cumsum(np.where(switches, jumps, 0))) % n_regimes
+        sigma = vol[regimes] * np.sqrt(dt)
+        log_ret = (drift[regimes] - 0.5 * vol[regimes] ** 2) * dt + sigma * z_close
+        close = last_close * np.exp(np.cumsum(log_ret))
+        open_ = np.empty(m)
+        open_[0] = last_close
+        open_[1:] = close[:-1]
+        high = np.maximum(open_, close) * np.exp(0.5 * sigma * z_high)
+        low = np.minimum(open_, close) * np.exp(-0.5 * sigma * z_low)
+
+        if config.tick_size > 0:
+            tick = config.tick_size
+            open_, close = np.round(open_ / tick) * tick, np.round(close / tick) * tick
+            high = np.maximum(np.ceil(high / tick) * tick, np.maximum(open_, close))
+            low = np.minimum(np.floor(low / tick) * tick, np.minimum(open_, close))
+
+        volume = np.round(config.base_volume * (vol[regimes] / vol.min()) * np.exp(0.5 * z_volume))
+        timestamps = pd.to_datetime(
+            start_ns + (offset + np.arange(m, dtype=np.int64)) * step_ns, utc=True
+        )
+
+        last_close = float(close[-1])
+        regime = int(regimes[-1])
+        yield pd.DataFrame({
+            "timestamp": timestamps,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        })
+
+
+def iter_ohlcv(
+    n_bars: int,
+    seed: int = 0,
+    config: SyntheticConfig | None = None,
+    chunk_bars: int = BLOCK_BARS,
+) -> Iterator[pd.DataFrame]:
+    """Yield ``n_bars`` synthetic bars as frames of at most ``chunk_bars`` rows."""
+    config = config or SyntheticConfig()
+    for block in _blocks(n_bars, seed, config):
+        for start in range(0, len(block), chunk_bars):
+            yield block.iloc[start:start + chunk_bars].reset_index(drop=True)
+
+
+def generate_ohlcv(n_bars: int, seed: int = 0, config: SyntheticConfig | None = None) -> pd.DataFrame:
+    """Return ``n_bars`` synthetic bars in one DataFrame."""
+    frames = list(_blocks(n_bars, seed, config or SyntheticConfig()))
+    if not frames:
+        return next(_blocks(1, seed, config or SyntheticConfig())).iloc[:0]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def write_ohlcv_csv(
+    path: str | Path,
+    n_bars: int,
+    seed: int = 0,
+    config: SyntheticConfig | None = None,
+) -> Path:
+    """Stream ``n_bars`` synthetic bars to a CSV without holding them all."""
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", newline="") as f:
+        for i, block in enumerate(_blocks(n_bars, seed, config or SyntheticConfig())):
+            block.to_csv(f, index=False, header=i == 0, date_format="%Y-%m-%dT%H:%M:%SZ")
+    logger.info("Wrote %d synthetic bars to %s", n_bars, out)
+    return out
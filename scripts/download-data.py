@@ -9,9 +9,15 @@ Usage:
     python download-data.py --provider databento --symbol ES --timeframe 5m --bars 1000
     python download-data.py --provider hyperliquid --symbol BTC --timeframe 5m --bars 5000
     python download-data.py --from-profile  # Use active profile settings
+
+Downloads are split into fixed time windows fetched concurrently
+(--concurrency) under a per-exchange rate limit. Finished windows are
+checkpointed under data/.partial/, so rerunning an interrupted download
+only fetches the windows still missing.
 """
 
 import argparse
+import asyncio
 import csv
 import json
 import os
@@ -64,6 +70,164 @@ def progress_bar(current: int, total: int, width: int = 40):
     sys.stdout.flush()
 
 
+# ---------------------------------------------------------------------------
+# Windowed downloads
+# ---------------------------------------------------------------------------
+# A requested span is cut into windows of one page of bars each, on a grid
+# aligned to the epoch so the windows stay the same when "now" moves. They
+# are fetched concurrently, paced by a token bucket shared by everything
+# talking to the same exchange, then merged and deduplicated by timestamp.
+# Windows that have closed are appended to a checkpoint file as they
+# finish; a rerun after an interruption skips them.
+
+DEFAULT_CONCURRENCY = 4
+WINDOW_RETRIES = 3
+RETRY_BACKOFF_S = 1.0
+CHECKPOINT_DIR = DATA_DIR / ".partial"
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second, in bursts of up to ``burst``.
+
+    Kept as a theoretical arrival time (GCRA) rather than a token count, so
+    ``acquire`` never needs a lock and one bucket can pace downloads that
+    run in separate event loops.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1.0 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        self._tat = 0.0
+
+    async def acquire(self):
+        now = time.monotonic()
+        tat = max(self._tat, now)
+        self._tat = tat + self.interval
+        delay = tat - self.tolerance - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_LIMITERS: dict = {}
+
+
+def limiter_for(key: str, rate: float, burst: int) -> TokenBucket:
+    """The shared bucket of one exchange (created on first use)."""
+    if key not in _LIMITERS:
+        _LIMITERS[key] = TokenBucket(rate, burst)
+    return _LIMITERS[key]
+
+
+def plan_windows(start_ms: int, end_ms: int, window_ms: int) -> list[tuple[int, int]]:
+    """Grid-aligned ``[start, end)`` windows covering ``start_ms`` to ``end_ms``."""
+    first = start_ms - start_ms % window_ms
+    return [(s, s + window_ms) for s in range(first, end_ms, window_ms)]
+
+
+class WindowCheckpoint:
+    """Bars of finished windows of one download, one JSON line per window."""
+
+    def __init__(self, name: str, window_ms: int):
+        self.path = CHECKPOINT_DIR / f"{name}.ndjson"
+        self.window_ms = window_ms
+        self.windows: dict = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn line from an interrupted write
+                    if rec.get("window_ms") == window_ms:
+                        self.windows[rec["start"]] = rec["bars"]
+
+    def record(self, start: int, bars: list[list]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({"window_ms": self.window_ms, "start": start, "bars": bars}) + "\n"
+        with open(self.path, "ab+") as f:
+            # Start on a fresh line after a torn write, or this window is lost too.
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line
+            f.write(line.encode())
+        self.windows[start] = bars
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+async def fetch_windows(
+    windows: list[tuple[int, int]],
+    fetch_page,
+    tf_ms: int,
+    limiter: TokenBucket,
+    checkpoint: WindowCheckpoint,
+    total: int,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    single_page: bool = False,
+) -> list[list]:
+    """Fetch every window not yet checkpointed; return all bars sorted by timestamp.
+
+    ``fetch_page(since_ms, end_ms)`` returns bars from ``since_ms`` on. A
+    window keeps paging from its last bar until it reaches the window's end
+    or a page comes back empty (or after one page with ``single_page``).
+    Failed requests are retried with backoff; if a window still fails, the
+    others are cancelled and the error is raised, checkpoint intact.
+    """
+    results = {start: checkpoint.windows[start] for start, _ in windows if start in checkpoint.windows}
+    if results:
+        ok(f"Resuming: {len(results)}/{len(windows)} windows already downloaded")
+    done_bars = sum(len(bars) for bars in results.values())
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def fetch_window(start: int, end: int):
+        nonlocal done_bars
+        bars: list = []
+        since = start
+        async with semaphore:
+            while since < end:
+                for attempt in range(WINDOW_RETRIES + 1):
+                    await limiter.acquire()
+                    try:
+                        page = await fetch_page(since, end)
+                        break
+                    except Exception:
+                        if attempt == WINDOW_RETRIES:
+                            raise
+                        await asyncio.sleep(RETRY_BACKOFF_S * 2 ** attempt)
+                bars.extend(bar for bar in page if start <= bar[0] < end)
+                if single_page or not page or page[-1][0] + tf_ms <= since:
+                    break
+                since = page[-1][0] + tf_ms
+
+        # The window holding "now" can still gain bars; only closed ones are kept.
+        if end <= time.time() * 1000:
+            checkpoint.record(start, bars)
+        results[start] = bars
+        done_bars += len(bars)
+        progress_bar(min(done_bars, total), total)
+
+    tasks = [asyncio.ensure_future(fetch_window(s, e)) for s, e in windows if s not in results]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print()
+        saved = sum(1 for start, _ in windows if start in checkpoint.windows)
+        warn(f"Download interrupted; {saved}/{len(windows)} windows checkpointed, rerun to resume")
+        raise
+    print()  # Newline after progress bar
+
+    merged: dict = {}
+    for start in sorted(results):
+        for bar in results[start]:
+            merged.setdefault(bar[0], bar)
+    return [merged[ts] for ts in sorted(merged)]
+
+
 # ---------------------------------------------------------------------------
 # CCXT provider
 # ---------------------------------------------------------------------------
@@ -77,78 +241,86 @@ TIMEFRAME_MS = {
 }
 
 
-def download_ccxt(exchange: str, symbol: str, timeframe: str, bars: int, api_key: str = "", secret: str = "") -> list[list]:
-    """Download OHLCV data via CCXT with pagination."""
+def download_ccxt(
+    exchange: str,
+    symbol: str,
+    timeframe: str,
+    bars: int,
+    api_key: str = "",
+    secret: str = "",
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[list]:
+    """Download OHLCV data via CCXT, fetching time windows concurrently."""
     try:
-        import ccxt  # type: ignore
+        import ccxt.async_support as ccxt_async  # type: ignore
     except ImportError:
         fail("ccxt not installed. Run: pip install ccxt")
         sys.exit(1)
 
-    cls = getattr(ccxt, exchange, None)
+    cls = getattr(ccxt_async, exchange, None)
     if cls is None:
         fail(f"Unknown exchange: {exchange}")
         sys.exit(1)
 
-    params: dict = {"enableRateLimit": True}
+    # Requests are paced by the shared token bucket at the exchange's
+    # published rate, not by ccxt's own one-at-a-time throttle.
+    params: dict = {"enableRateLimit": False}
     if api_key:
         params["apiKey"] = api_key
         params["secret"] = secret
 
-    ex = cls(params)
-    ex.load_markets()
+    return asyncio.run(_download_ccxt(cls(params), exchange, symbol, timeframe, bars, concurrency))
 
-    # Normalise symbol
-    if "/" not in symbol:
-        symbol = symbol.replace("USDT", "/USDT").replace("USD", "/USD")
-        if "/" not in symbol:
-            symbol = f"{symbol}/USDT"
 
-    if symbol not in ex.markets:
-        fail(f"Symbol {symbol} not found on {exchange}")
-        available = [s for s in ex.markets if "USDT" in s][:10]
-        print(f"  {C.DIM}Available (sample): {', '.join(available)}{C.NC}")
-        sys.exit(1)
-
-    print(f"  {C.BLUE}Downloading {bars} bars of {symbol} {timeframe} from {exchange}...{C.NC}")
-
-    all_bars: list = []
-    batch_size = 1000
-    since = None  # fetch most recent first, then page backwards
+async def _download_ccxt(ex, exchange: str, symbol: str, timeframe: str, bars: int, concurrency: int) -> list[list]:
+    try:
+        await ex.load_markets()
 
-    # Calculate start time: bars * timeframe_ms ago from now
-    tf_ms = TIMEFRAME_MS.get(timeframe, 300_000)
-    now_ms = int(time.time() * 1000)
-    since = now_ms - (bars * tf_ms)
+        # Normalise symbol
+        if "/" not in symbol:
+            symbol = symbol.replace("USDT", "/USDT").replace("USD", "/USD")
+            if "/" not in symbol:
+                symbol = f"{symbol}/USDT"
 
-    while len(all_bars) < bars:
-        remaining = bars - len(all_bars)
-        limit = min(batch_size, remaining)
+        if symbol not in ex.markets:
+            fail(f"Symbol {symbol} not found on {exchange}")
+            available = [s for s in ex.markets if "USDT" in s][:10]
+            print(f"  {C.DIM}Available (sample): {', '.join(available)}{C.NC}")
+            sys.exit(1)
 
-        ohlcv = ex.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
-        if not ohlcv:
-            break
+        print(f"  {C.BLUE}Downloading {bars} bars of {symbol} {timeframe} from {exchange}...{C.NC}")
 
-        all_bars.extend(ohlcv)
-        progress_bar(len(all_bars), bars)
+        batch_size = 1000
 
-        # Move since forward past the last candle
-        since = ohlcv[-1][0] + tf_ms
+        # Calculate start time: bars * timeframe_ms ago from now
+        tf_ms = TIMEFRAME_MS.get(timeframe, 300_000)
+        now_ms = int(time.time() * 1000)
+        since = now_ms - (bars * tf_ms)
 
-        if len(ohlcv) < limit:
-            break  # No more data available
+        async def fetch_page(page_since: int, end: int) -> list[list]:
+            return await ex.fetch_ohlcv(symbol, timeframe, since=page_since, limit=batch_size)
 
-        # Rate limit courtesy
-        time.sleep(ex.rateLimit / 1000)
+        window_ms = batch_size * tf_ms
+        checkpoint = WindowCheckpoint(f"ccxt_{exchange}_{symbol.replace('/', '')}_{timeframe}", window_ms)
+        limiter = limiter_for(f"ccxt:{exchange}", 1000 / max(ex.rateLimit, 1), concurrency)
+        all_bars = await fetch_windows(
+            plan_windows(since, now_ms, window_ms), fetch_page, tf_ms, limiter, checkpoint, bars, concurrency
+        )
+    finally:
+        await ex.close()
 
-    print()  # Newline after progress bar
-    return all_bars[:bars]
+    checkpoint.clear()
+    return [bar for bar in all_bars if bar[0] >= since][:bars]
 
 
 # ---------------------------------------------------------------------------
 # Hyperliquid provider
 # ---------------------------------------------------------------------------
-def download_hyperliquid(symbol: str, timeframe: str, bars: int) -> list[list]:
+# Public info endpoint budget; the sequential pager slept 0.5 s per page.
+HYPERLIQUID_REQUESTS_PER_S = 2.0
+
+
+def download_hyperliquid(symbol: str, timeframe: str, bars: int, concurrency: int = DEFAULT_CONCURRENCY) -> list[list]:
     """Download OHLCV from Hyperliquid public API."""
     try:
         import requests
@@ -166,11 +338,9 @@ def download_hyperliquid(symbol: str, timeframe: str, bars: int) -> list[list]:
 
     print(f"  {C.BLUE}Downloading {bars} bars of {symbol} {timeframe} from Hyperliquid...{C.NC}")
 
-    all_bars: list = []
     batch_size = 5000
-    since = start_ms
 
-    while len(all_bars) < bars:
+    def post(since: int, end: int) -> list[list]:
         resp = requests.post(
             "https://api.hyperliquid.xyz/info",
             json={
@@ -179,47 +349,53 @@ def download_hyperliquid(symbol: str, timeframe: str, bars: int) -> list[list]:
                     "coin": symbol,
                     "interval": interval,
                     "startTime": since,
-                    "endTime": now_ms,
+                    "endTime": min(end, now_ms),
                 },
             },
             timeout=30,
         )
-
         if resp.status_code != 200:
-            warn(f"API returned {resp.status_code}")
-            break
-
-        candles = resp.json()
-        if not candles:
-            break
+            raise RuntimeError(f"API returned {resp.status_code}")
 
-        for c in candles:
-            ts = c.get("t", c.get("T", 0))
-            all_bars.append([
-                ts,
+        return [
+            [
+                c.get("t", c.get("T", 0)),
                 float(c.get("o", 0)),
                 float(c.get("h", 0)),
                 float(c.get("l", 0)),
                 float(c.get("c", 0)),
                 float(c.get("v", 0)),
-            ])
+            ]
+            for c in resp.json()
+        ]
 
-        progress_bar(len(all_bars), bars)
-        since = all_bars[-1][0] + tf_ms
+    async def fetch_page(since: int, end: int) -> list[list]:
+        return await asyncio.to_thread(post, since, end)
 
-        if len(candles) < batch_size:
-            break
-
-        time.sleep(0.5)
+    window_ms = batch_size * tf_ms
+    checkpoint = WindowCheckpoint(f"hyperliquid_{symbol}_{timeframe}", window_ms)
+    limiter = limiter_for("hyperliquid", HYPERLIQUID_REQUESTS_PER_S, concurrency)
+    try:
+        all_bars = asyncio.run(fetch_windows(
+            plan_windows(start_ms, now_ms, window_ms), fetch_page, tf_ms, limiter, checkpoint, bars, concurrency
+        ))
+    except Exception as e:
+        warn(f"Hyperliquid download failed: {e}")
+        return []
 
-    print()
-    return all_bars[:bars]
+    checkpoint.clear()
+    return [bar for bar in all_bars if bar[0] >= start_ms][:bars]
 
 
 # ---------------------------------------------------------------------------
 # Databento provider
 # ---------------------------------------------------------------------------
-def download_databento(symbol: str, timeframe: str, bars: int) -> list[list]:
+# Bars per request window, and the request pace of the historical API.
+DATABENTO_WINDOW_BARS = 10_000
+DATABENTO_REQUESTS_PER_S = 5.0
+
+
+def download_databento(symbol: str, timeframe: str, bars: int, concurrency: int = DEFAULT_CONCURRENCY) -> list[list]:
     """Download OHLCV from Databento (requires API key)."""
     api_key = os.environ.get("DATABENTO_API_KEY", "")
     if not api_key:
@@ -243,9 +419,9 @@ def download_databento(symbol: str, timeframe: str, bars: int) -> list[list]:
     # Calculate date range from bar count
     tf_ms = TIMEFRAME_MS.get(timeframe, 300_000)
     end_dt = datetime.now(timezone.utc)
-    start_dt = datetime.fromtimestamp(
-        (end_dt.timestamp() * 1000 - bars * tf_ms) / 1000, tz=timezone.utc
-    )
+    now_ms = int(end_dt.timestamp() * 1000)
+    start_ms = now_ms - bars * tf_ms
+    start_dt = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
 
     dataset = "GLBX.MDP3"
     symbol_query = f"{symbol}.FUT" if "." not in symbol else symbol
@@ -254,17 +430,19 @@ def download_databento(symbol: str, timeframe: str, bars: int) -> list[list]:
     print(f"  {C.DIM}Dataset: {dataset}, Schema: {schema}{C.NC}")
     print(f"  {C.DIM}Range: {start_dt.date()} to {end_dt.date()}{C.NC}")
 
-    try:
+    def iso(ms: int) -> str:
+        return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def get_range(since: int, end: int) -> list[list]:
         resp = requests.get(
             f"https://hist.databento.com/v0/timeseries.get_range",
             params={
                 "dataset": dataset,
                 "symbols": symbol_query,
                 "schema": schema,
-                "start": start_dt.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "end": end_dt.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "start": iso(since),
+                "end": iso(min(end, now_ms)),
                 "encoding": "json",
-                "limit": bars,
             },
             auth=(api_key, ""),
             timeout=60,
@@ -272,16 +450,14 @@ def download_databento(symbol: str, timeframe: str, bars: int) -> list[list]:
         )
 
         if resp.status_code != 200:
-            warn(f"Databento API returned {resp.status_code}: {resp.text[:200]}")
-            warn("Falling back to sample data")
-            return _load_sample_data(symbol, bars)
+            raise RuntimeError(f"Databento API returned {resp.status_code}: {resp.text[:200]}")
 
-        all_bars = []
+        page = []
         for line in resp.iter_lines():
             if not line:
                 continue
             rec = json.loads(line)
-            all_bars.append([
+            page.append([
                 rec.get("ts_event", 0) // 1_000_000,  # ns to ms
                 float(rec.get("open", 0)) / 1e9,
                 float(rec.get("high", 0)) / 1e9,
@@ -289,17 +465,27 @@ def download_databento(symbol: str, timeframe: str, bars: int) -> list[list]:
                 float(rec.get("close", 0)) / 1e9,
                 int(rec.get("volume", 0)),
             ])
-            if len(all_bars) % 100 == 0:
-                progress_bar(len(all_bars), bars)
+        return page
 
-        print()
-        return all_bars[:bars]
+    async def fetch_page(since: int, end: int) -> list[list]:
+        return await asyncio.to_thread(get_range, since, end)
 
+    window_ms = DATABENTO_WINDOW_BARS * tf_ms
+    checkpoint = WindowCheckpoint(f"databento_{symbol_query}_{timeframe}", window_ms)
+    limiter = limiter_for("databento", DATABENTO_REQUESTS_PER_S, concurrency)
+    try:
+        all_bars = asyncio.run(fetch_windows(
+            plan_windows(start_ms, now_ms, window_ms), fetch_page, tf_ms, limiter, checkpoint, bars,
+            concurrency, single_page=True,
+        ))
     except Exception as e:
         warn(f"Databento download failed: {e}")
         warn("Falling back to sample data")
         return _load_sample_data(symbol, bars)
 
+    checkpoint.clear()
+    return [bar for bar in all_bars if bar[0] >= start_ms][:bars]
+
 
 def _databento_cost_preview(api_key: str, symbol: str, timeframe: str, bars: int):
     """Show estimated cost before downloading from Databento."""
@@ -423,7 +609,7 @@ def save_csv(bars: list[list], provider: str, symbol: str, timeframe: str):
 # ---------------------------------------------------------------------------
 # Profile-based download
 # ---------------------------------------------------------------------------
-def download_from_profile():
+def download_from_profile(concurrency: int = DEFAULT_CONCURRENCY):
     """Download data for all pinned symbols in the active profile."""
     if not ACTIVE_PROFILE.exists():
         fail("No active profile found. Run setup-wizard.py first.")
@@ -447,13 +633,13 @@ def download_from_profile():
     for symbol in symbols:
         try:
             if adapter == "ccxt":
-                bars = download_ccxt(exchange, symbol, "5m", 5000)
+                bars = download_ccxt(exchange, symbol, "5m", 5000, concurrency=concurrency)
                 save_csv(bars, "ccxt", symbol, "5m")
             elif adapter == "databento":
-                bars = download_databento(symbol, "5m", 1000)
+                bars = download_databento(symbol, "5m", 1000, concurrency)
                 save_csv(bars, "databento", symbol, "5m")
             elif adapter == "hyperliquid":
-                bars = download_hyperliquid(symbol, "5m", 5000)
+                bars = download_hyperliquid(symbol, "5m", 5000, concurrency)
                 save_csv(bars, "hyperliquid", symbol, "5m")
         except Exception as e:
             warn(f"Failed to download {symbol}: {e}")
@@ -482,12 +668,13 @@ Examples:
     parser.add_argument("--timeframe", default="5m", choices=["1m", "5m", "15m", "1h", "4h", "1d"], help="Bar timeframe (default: 5m)")
     parser.add_argument("--bars", type=int, default=5000, help="Number of bars to download (default: 5000)")
     parser.add_argument("--from-profile", action="store_true", help="Download for all symbols in active profile")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"Time windows fetched at once (default: {DEFAULT_CONCURRENCY})")
     args = parser.parse_args()
 
     print(f"\n{C.CYAN}{C.BOLD}  QuantStream Data Downloader{C.NC}\n")
 
     if args.from_profile:
-        download_from_profile()
+        download_from_profile(args.concurrency)
         return
 
     if not args.provider or not args.symbol:
@@ -500,11 +687,11 @@ Examples:
     if args.provider == "ccxt":
         api_key = os.environ.get(f"{args.exchange.upper()}_API_KEY", "")
         secret = os.environ.get(f"{args.exchange.upper()}_SECRET", "")
-        bars = download_ccxt(args.exchange, args.symbol, args.timeframe, args.bars, api_key, secret)
+        bars = download_ccxt(args.exchange, args.symbol, args.timeframe, args.bars, api_key, secret, args.concurrency)
     elif args.provider == "databento":
-        bars = download_databento(args.symbol, args.timeframe, args.bars)
+        bars = download_databento(args.symbol, args.timeframe, args.bars, args.concurrency)
     elif args.provider == "hyperliquid":
-        bars = download_hyperliquid(args.symbol, args.timeframe, args.bars)
+        bars = download_hyperliquid(args.symbol, args.timeframe, args.bars, args.concurrency)
 
     if bars:
         save_csv(bars, args.provider, args.symbol, args.timeframe)
@@ -11,6 +11,7 @@ Usage:
     python prop-firm-validator.py --trades="output/backtests/2026-01-18/trades.csv"
     python prop-firm-validator.py --list-firms
     python prop-firm-validator.py --firm=topstep --account-size=50000
+    python prop-firm-validator.py --trades="output/backtests/2026-01-18/trades.csv" --mc-paths=10000
 
 Output:
     Creates prop firm result JSON in output/strategies/prop_firm_ready/ or rejected/
@@ -24,13 +25,29 @@ import csv
 from pathlib import Path
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any
 from collections import defaultdict
 
 # Configuration paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
-RULES_FILE = PROJECT_ROOT / "docs" / "prop-firms" / "prop-firm-rules.json"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from lib.prop_firm import (  # noqa: E402
+    DEFAULT_RULES_FILE,
+    PassProbabilityConfig,
+    PropFirmResult,
+    TradeSeries,
+    evaluate_prop_firms,
+    get_consistency_rule,
+    get_daily_loss_limit,
+    get_drawdown_type,
+    load_compiled_rules,
+    prop_firm_report,
+)
+
+RULES_FILE = DEFAULT_RULES_FILE
 OUTPUT_DIR = PROJECT_ROOT / "output"
 
 
@@ -51,26 +68,13 @@ class Trade:
     low_during: float = 0.0   # For MFE calculation
 
 
-@dataclass
-class PropFirmResult:
-    """Result of prop firm validation for a single firm."""
-    firm_name: str
-    account_size: int
-    passed: bool
-    violation_reason: Optional[str] = None
-    violation_date: Optional[str] = None
-    final_equity: float = 0.0
-    max_drawdown: float = 0.0
-    max_drawdown_pct: float = 0.0
-    trading_days: int = 0
-    total_trades: int = 0
-    consistency_score: float = 0.0
-    best_day_pnl: float = 0.0
-    total_profit: float = 0.0
-
-
 def load_prop_firm_rules() -> Dict[str, Any]:
-    """Load prop firm rules from JSON file."""
+    """Load prop firm rules from JSON file.
+
+    Only the trade-by-trade reference reads raw rules; everything else uses
+    ``load_compiled_rules(RULES_FILE)``, validated once and cached by file
+    hash.
+    """
     if not RULES_FILE.exists():
         raise FileNotFoundError(f"Prop firm rules not found: {RULES_FILE}")
 
@@ -139,64 +143,12 @@ def get_daily_pnls(trades: List[Trade]) -> Dict[str, float]:
     return dict(daily)
 
 
-def get_drawdown_type(firm_rules: Dict) -> Tuple[str, float]:
-    """Extract drawdown type and percentage from firm rules."""
-    dd_rules = firm_rules.get('risk_limits', {}).get('drawdown', {})
-
-    dd_type = dd_rules.get('type', 'trailing')
-    dd_percent = dd_rules.get('percent', 0.05)
-
-    # Handle nested structures
-    if isinstance(dd_percent, dict):
-        # Take first value
-        dd_percent = list(dd_percent.values())[0]
-
-    if 'values' in dd_rules:
-        values = dd_rules['values']
-        if isinstance(values, dict):
-            # Get first value
-            dd_percent = list(values.values())[0] / 100 if list(values.values())[0] > 1 else list(values.values())[0]
-
-    return dd_type, float(dd_percent) if dd_percent < 1 else float(dd_percent) / 100
-
-
-def get_daily_loss_limit(firm_rules: Dict, account_size: int) -> Optional[float]:
-    """Get daily loss limit for account size."""
-    dll_rules = firm_rules.get('risk_limits', {}).get('daily_loss_limit', {})
-
-    if not dll_rules.get('enabled', True):
-        return None
-
-    if dll_rules.get('enabled') is False:
-        return None
-
-    values = dll_rules.get('values', {})
-    if isinstance(values, dict):
-        return values.get(str(account_size), values.get(account_size))
-
-    # Percent-based
-    if 'percent' in dll_rules:
-        pct = dll_rules['percent']
-        return account_size * (pct / 100 if pct > 1 else pct)
-
-    return None
-
-
-def get_consistency_rule(firm_rules: Dict, phase: str = 'evaluation') -> Optional[float]:
-    """Get consistency rule percentage."""
-    cons_rules = firm_rules.get(phase, {}).get('consistency_rule', {})
-
-    if not cons_rules:
-        cons_rules = firm_rules.get('funded', {}).get('consistency_rule', {})
-
-    if not cons_rules.get('enabled', False):
-        return None
-
-    pct = cons_rules.get('percent', cons_rules.get('max_single_day_percent'))
-    if pct:
-        return pct / 100 if pct > 1 else pct
-
-    return None
+def trade_series(trades: List[Trade]) -> TradeSeries:
+    """Net PnL and trading day of each trade, for the matrix simulator."""
+    return TradeSeries.from_days(
+        [trade.net_pnl for trade in trades],
+        [trade.timestamp.strftime('%Y-%m-%d') for trade in trades],
+    )
 
 
 def simulate_prop_firm(
@@ -208,6 +160,9 @@ def simulate_prop_firm(
     """
     Simulate a prop firm evaluation/funded period.
 
+    Trade-by-trade reference for ``lib.prop_firm.evaluate_prop_firms``,
+    which gives identical results for many firms and sizes at once.
+
     Returns PropFirmResult with pass/fail and details.
     """
     # Initialize
@@ -325,106 +280,19 @@ def simulate_prop_firm(
 def validate_all_firms(
     trades: List[Trade],
     account_sizes: List[int] = None,
+    pass_probability: PassProbabilityConfig = None,
 ) -> Dict[str, Any]:
     """
     Validate strategy against all 14 prop firms.
 
-    Returns comprehensive validation report.
-    """
-    rules_data = load_prop_firm_rules()
-    firms = rules_data.get('firms', {})
+    With ``pass_probability`` the report also carries a ``monteCarlo``
+    block: per firm and size, the odds of passing or breaching an
+    evaluation over block-bootstrapped windows of trading days.
 
-    if not account_sizes:
-        account_sizes = [50000, 100000]
-
-    results = {}
-    passing_firms = []
-    failing_firms = []
-
-    for firm_name, firm_rules in firms.items():
-        firm_results = {}
-
-        # Get account sizes for this firm
-        firm_sizes = firm_rules.get('evaluation', {}).get('account_sizes', account_sizes)
-
-        # Test intersection of requested and available sizes
-        test_sizes = [s for s in account_sizes if s in firm_sizes] or firm_sizes[:2]
-
-        for size in test_sizes:
-            result = simulate_prop_firm(trades, firm_name, firm_rules, size)
-            firm_results[size] = asdict(result)
-
-        results[firm_name] = firm_results
-
-        # Track passing/failing
-        if any(r['passed'] for r in firm_results.values()):
-            passing_firms.append(firm_name)
-        else:
-            failing_firms.append(firm_name)
-
-    # Summary
-    summary = {
-        'firmsTested': len(firms),
-        'firmsPassing': len(passing_firms),
-        'firmsFailing': len(failing_firms),
-        'passingFirms': passing_firms,
-        'failingFirms': failing_firms,
-        'deploymentReady': len(passing_firms) >= 3,
-        'recommendedFirms': get_recommended_firms(results, passing_firms),
-        'warnings': get_warnings(results),
-    }
-
-    return {
-        'results': results,
-        'summary': summary,
-        'timestamp': datetime.now().isoformat(),
-    }
-
-
-def get_recommended_firms(results: Dict, passing_firms: List[str]) -> List[str]:
-    """Get top recommended firms based on results."""
-    # Rank by: lowest max_drawdown_pct, highest profit retention
-    scores = []
-
-    for firm_name in passing_firms:
-        firm_results = results.get(firm_name, {})
-        for size, result in firm_results.items():
-            if result.get('passed'):
-                score = (
-                    1 - result.get('max_drawdown_pct', 1),  # Lower DD = better
-                    result.get('final_equity', 0) / size,    # Higher profit = better
-                )
-                scores.append((firm_name, score))
-                break
-
-    # Sort by score (higher is better)
-    scores.sort(key=lambda x: x[1], reverse=True)
-
-    # Return top 3
-    return [s[0] for s in scores[:3]]
-
-
-def get_warnings(results: Dict) -> List[str]:
-    """Extract warnings from validation results."""
-    warnings = []
-
-    for firm_name, firm_results in results.items():
-        for size, result in firm_results.items():
-            # Consistency warning
-            cons_score = result.get('consistency_score', 0)
-            if 0.40 < cons_score < 0.50:
-                warnings.append(
-                    f"{firm_name}: Consistency score {cons_score:.0%} close to limit"
-                )
-
-            # Drawdown warning
-            dd_pct = result.get('max_drawdown_pct', 0)
-            if result.get('passed') and dd_pct > 0.06:
-                warnings.append(
-                    f"{firm_name}: Max drawdown {dd_pct:.1%} close to limits"
-                )
-
-    return list(set(warnings))[:5]  # Dedupe and limit
+    Returns comprehensive validation report (see ``lib.prop_firm.prop_firm_report``).
+    """
+    rules = load_compiled_rules(RULES_FILE)
+    return prop_firm_report(trade_series(trades), rules, account_sizes, pass_probability)
 
 
 def save_result(
@@ -479,6 +347,30 @@ def main():
         '--account-sizes',
         help='Comma-separated account sizes (e.g., 50000,100000)'
     )
+    parser.add_argument(
+        '--mc-paths',
+        type=int,
+        default=0,
+        help='Monte Carlo evaluation windows for pass probabilities, e.g. 10000 (default: 0 = off)'
+    )
+    parser.add_argument(
+        '--mc-window-days',
+        type=int,
+        default=30,
+        help='Trading days per simulated evaluation window'
+    )
+    parser.add_argument(
+        '--mc-block-days',
+        type=int,
+        default=5,
+        help='Consecutive historical days per bootstrap block'
+    )
+    parser.add_argument(
+        '--mc-seed',
+        type=int,
+        default=0,
+        help='Monte Carlo random seed'
+    )
     parser.add_argument(
         '--output-name',
         help='Strategy name for output file'
@@ -498,16 +390,15 @@ def main():
 
     # List firms
     if args.list_firms:
-        rules = load_prop_firm_rules()
-        firms = rules.get('firms', {})
+        rules = load_compiled_rules(RULES_FILE)
 
         print(f"{'#':<3} {'Firm':<25} {'Drawdown':<12} {'Daily Limit':<12} {'Consistency'}")
         print("-" * 70)
 
-        for i, (name, firm) in enumerate(firms.items(), 1):
-            dd_type, dd_pct = get_drawdown_type(firm)
-            dll = get_daily_loss_limit(firm, 50000)
-            cons = get_consistency_rule(firm)
+        for i, firm in enumerate(rules.firms, 1):
+            name, dd_type, dd_pct = firm.name, firm.drawdown_type, firm.drawdown_limit
+            dll = firm.account(50000).daily_loss_limit
+            cons = firm.consistency
 
             dd_str = f"{dd_pct*100:.0f}% {dd_type[:3]}" if dd_pct else "N/A"
             dll_str = f"${dll:,.0f}" if dll else "None"
@@ -541,16 +432,14 @@ def main():
 
     # Single firm test
     if args.firm:
-        rules = load_prop_firm_rules()
-        firm_rules = rules.get('firms', {}).get(args.firm)
+        rules = load_compiled_rules(RULES_FILE)
 
-        if not firm_rules:
+        if rules.firm(args.firm) is None:
             print(f"Error: Unknown firm '{args.firm}'")
             sys.exit(1)
 
-        result = simulate_prop_firm(
-            trades, args.firm, firm_rules, args.account_size
-        )
+        limits = rules.limits([(args.firm, args.account_size)])
+        result = evaluate_prop_firms(trade_series(trades), limits)[0]
 
         if args.json:
             print(json.dumps(asdict(result), indent=2))
@@ -571,7 +460,16 @@ def main():
     if not args.quiet:
         print(f"Validating {len(trades)} trades against 14 prop firms...")
 
-    result = validate_all_firms(trades, account_sizes)
+    pass_probability = None
+    if args.mc_paths > 0:
+        pass_probability = PassProbabilityConfig(
+            paths=args.mc_paths,
+            window_days=args.mc_window_days,
+            block_days=args.mc_block_days,
+            seed=args.mc_seed,
+        )
+
+    result = validate_all_firms(trades, account_sizes, pass_probability)
     result['strategy'] = strategy_name
     result['tradeCount'] = len(trades)
 
@@ -615,6 +513,18 @@ def main():
         if summary['recommendedFirms']:
             print(f"\nRecommended: {', '.join(summary['recommendedFirms'])}")
 
+        if 'monteCarlo' in result:
+            mc = result['monteCarlo']
+            print(f"\nPass Probability ({mc['paths']:,} windows of {mc['windowDays']} days):")
+            for firm, firm_odds in mc['results'].items():
+                for size, odds in firm_odds.items():
+                    days = odds['expected_days_to_pass']
+                    days_str = f"~{days:.1f} days" if days is not None else "never"
+                    print(
+                        f"  - {firm} ${size:,}: pass {odds['pass_probability']:.1%} | "
+                        f"breach {odds['breach_probability']:.1%} | {days_str}"
+                    )
+
         if summary['warnings']:
             print("\nWarnings:")
             for w in summary['warnings']:
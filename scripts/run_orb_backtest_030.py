@@ -20,9 +20,12 @@ Data Source: Databento (parquet cache - NO MOCK DATA)
 Costs: $2.50/contract/side commission + 0.5 tick slippage
 """
 
+import argparse
+import itertools
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, time
 from decimal import Decimal
 from pathlib import Path
@@ -79,6 +82,14 @@ BACKTEST_CONFIG = {
         "max_daily": 6,
     },
 
+    # Parameter sweep grid (--sweep); other parameters come from strategy_params
+    "sweep_grid": {
+        "range_minutes": [5, 15, 30],
+        "atr_tp_multiplier": [1.5, 2.0, 3.0, 4.0],
+        "stop_loss_buffer_points": [0.0, 1.0, 2.0, 4.0],
+        "volume_threshold": [1.0, 1.3, 1.6],
+    },
+
     # Validation Thresholds (Anti-Overfitting)
     "validation": {
         "min_sharpe": 1.0,
@@ -145,15 +156,351 @@ def calculate_max_drawdown(equity_curve: pd.Series) -> tuple:
     return abs(max_dd), abs(float(max_dd))
 
 
-def run_single_backtest(
+# ===========================================================================
+# ORB ENGINE
+# ===========================================================================
+#
+# ``simulate_orb_trades`` reproduces the original bar-by-bar loop (kept as
+# ``_simulate_orb_loop``) with array operations. The rules both follow:
+#
+# - Bars are bucketed by the calendar date of the index (in its own timezone).
+#   A new date resets the trade counters and the opening range but not an open
+#   position, which carries into the next date.
+# - Range bars are 9:30 <= t <= range end; trading bars are range end < t <
+#   16:00 on a date that has a range. No other bar is ever looked at.
+# - Once a date has min(max_daily, max_per_session) entries, its remaining
+#   bars are skipped entirely, exits included.
+# - An open position exits at its stop (checked first) or its target, and the
+#   exit bar cannot enter again. A position still open at the end closes at
+#   the last close.
+
+NY_START = time(9, 30)
+NY_SESSION_END = time(16, 0)
+
+# Trading bars scanned in the first step of a trade's exit search; the window
+# grows geometrically, so long holds take a few NumPy calls.
+EXIT_SCAN_BARS = 256
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def _cost_per_trade(config: dict) -> float:
+    """Round-trip commission plus slippage in dollars."""
+    commission = float(config["commission_per_contract"]) * 2  # Round trip
+    slippage = float(config["slippage_ticks"]) * float(config["tick_value"]) * 2
+    return commission + slippage
+
+
+def _ny_range_end(range_minutes: int) -> time:
+    """Last bar time (inclusive) of the NY opening range."""
+    range_end_minute = 30 + range_minutes
+    return time(9, range_end_minute % 60) if range_end_minute < 60 else time(10, range_end_minute - 60)
+
+
+def _time_ns(t: time) -> int:
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 10**9 + t.microsecond * 1000
+
+
+def _with_datetime_index(data: pd.DataFrame) -> pd.DataFrame:
+    """``data`` indexed by its timestamps (a new frame only when re-indexed)."""
+    if isinstance(data.index, pd.DatetimeIndex):
+        return data
+    if 'timestamp' in data.columns:
+        return data.assign(timestamp=pd.to_datetime(data['timestamp'])).set_index('timestamp')
+    if 'ts_event' in data.columns:
+        return data.assign(timestamp=pd.to_datetime(data['ts_event'], unit='ns')).set_index('timestamp')
+    return data
+
+
+def build_orb_sessions(data: pd.DataFrame, range_minutes: int = 15) -> dict | None:
+    """
+    Per-session feature table: opening ranges and the bars that trade on them.
+
+    Depends only on the bars and ``range_minutes`` (the 20-bar volume SMA is
+    parameter-free), so parameter sweeps build it once per range length.
+
+    Returns:
+        Dict of arrays. Per session (date with a range): ``range_day``,
+        ``range_high``, ``range_low``, ``range_volume`` and ``session_start``,
+        the offset of its first post-range bar in the per-bar arrays (one
+        extra trailing entry, so session ``s`` owns ``session_start[s]:
+        session_start[s + 1]``). Per post-range trading bar: ``time``,
+        ``day``, ``session``, OHLC, ``volume`` and ``volume_sma`` (``None``
+        without volume). Plus ``last_close``/``last_time`` of the final bar.
+        ``None`` when the index is not sorted timestamps, which only the loop
+        engine handles.
+    """
+    data = _with_datetime_index(data)
+    index = data.index
+    if not isinstance(index, pd.DatetimeIndex) or not index.is_monotonic_increasing or len(index) == 0:
+        return None
+
+    # Wall-clock time like ``idx.time()`` (microsecond resolution).
+    wall = index.tz_localize(None) if index.tz is not None else index
+    clock = wall.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    day = clock // _NS_PER_DAY
+    time_of_day = (clock - day * _NS_PER_DAY) // 1000 * 1000
+    range_end = _time_ns(_ny_range_end(range_minutes))
+    in_range = (time_of_day >= _time_ns(NY_START)) & (time_of_day <= range_end)
+    trading = (time_of_day > range_end) & (time_of_day < _time_ns(NY_SESSION_END))
+
+    high = data['high'].to_numpy(dtype=np.float64)
+    low = data['low'].to_numpy(dtype=np.float64)
+    has_volume = 'volume' in data.columns
+    volume = data['volume'].to_numpy(dtype=np.float64) if has_volume else np.zeros(len(data))
+
+    # Opening range per date: grouped reductions over its range bars.
+    rows = np.flatnonzero(in_range)
+    starts = np.flatnonzero(np.diff(day[rows], prepend=day[rows[:1]] - 1)) if len(rows) else rows
+    range_day = day[rows[starts]]
+    if len(rows):
+        range_high = np.fmax.reduceat(high[rows], starts)
+        range_low = np.fmin.reduceat(low[rows], starts)
+        range_volume = np.add.reduceat(volume[rows], starts)
+        # max()/min() in the loop keep a NaN first bar and skip later NaNs.
+        range_high[np.isnan(high[rows[starts]])] = np.nan
+        range_low[np.isnan(low[rows[starts]])] = np.nan
+    else:
+        range_high = range_low = range_volume = np.empty(0)
+
+    bars = np.flatnonzero(trading)
+    session = np.searchsorted(range_day, day[bars])
+    found = session < len(range_day)
+    found[found] = range_day[session[found]] == day[bars[found]]
+    bars, session = bars[found], session[found]
+
+    volume_sma = None
+    if has_volume:
+        volume_sma = data['volume'].rolling(window=20, min_periods=1).mean().to_numpy()[bars]
+
+    return {
+        "range_day": range_day,
+        "range_high": range_high,
+        "range_low": range_low,
+        "range_volume": range_volume,
+        "session_start": np.searchsorted(session, np.arange(len(range_day) + 1)),
+        "time": index[bars],
+        "day": day[bars],
+        "session": session,
+        "open": data['open'].to_numpy(dtype=np.float64)[bars],
+        "high": high[bars],
+        "low": low[bars],
+        "close": data['close'].to_numpy(dtype=np.float64)[bars],
+        "volume": volume[bars] if has_volume else None,
+        "volume_sma": volume_sma,
+        "last_close": data['close'].iloc[-1],
+        "last_time": index[-1],
+    }
+
+
+def orb_entry_signals(sessions: dict, params: dict) -> dict:
+    """
+    Entry signal of every post-range bar, evaluated at once against its range.
+
+    Uses ``min_range_points``, ``max_range_points``, ``volume_threshold`` and
+    ``use_volume_confirmation``; exit parameters do not affect it, so a sweep
+    reuses it across them.
+
+    Returns:
+        Dict with per-bar ``long`` (a long signal; other signals are short),
+        ``range_high``, ``range_low``, ``range_size`` and ``next_entry``, the
+        first signal bar at or after each bar (``n`` when there is none; one
+        extra trailing entry).
+    """
+    close = sessions["close"]
+    high = sessions["high"]
+    low = sessions["low"]
+    range_high = sessions["range_high"][sessions["session"]]
+    range_low = sessions["range_low"][sessions["session"]]
+    range_size = range_high - range_low
+
+    allowed = ~(
+        (range_size < params.get("min_range_points", 5.0))
+        | (range_size > params.get("max_range_points", 50.0))
+    )
+    if params.get("use_volume_confirmation", True) and sessions["volume"] is not None:
+        threshold = params.get("volume_threshold", 1.3)
+        allowed &= ~(sessions["volume"] < sessions["volume_sma"] * threshold * 0.8)
+    candle_range = high - low
+    allowed &= ~((candle_range > 0) & (np.abs(close - sessions["open"]) < candle_range * 0.3))
+    long_entry = allowed & (close > range_high)
+    entry = long_entry | (allowed & (close < range_low))
+
+    n = len(close)
+    positions = np.where(entry, np.arange(n), n)
+    return {
+        "long": long_entry,
+        "range_high": range_high,
+        "range_low": range_low,
+        "range_size": range_size,
+        "next_entry": np.append(np.minimum.accumulate(positions[::-1])[::-1], n),
+    }
+
+
+def _first_exit(
+    high: np.ndarray,
+    low: np.ndarray,
+    start: int,
+    stop_loss: float,
+    take_profit: float,
+    is_long: bool,
+) -> tuple:
+    """First trading bar from ``start`` hitting the stop or target: ``(bar, stopped)``, ``(-1, False)`` if none."""
+    n = len(high)
+    step = EXIT_SCAN_BARS
+    while start < n:
+        end = min(start + step, n)
+        if is_long:
+            stopped = low[start:end] <= stop_loss
+            hit = stopped | (high[start:end] >= take_profit)
+        else:
+            stopped = high[start:end] >= stop_loss
+            hit = stopped | (low[start:end] <= take_profit)
+        if hit.any():
+            first = int(hit.argmax())
+            return start + first, bool(stopped[first])
+        start = end
+        step *= 4
+    return -1, False
+
+
+def walk_orb_trades(sessions: dict, signals: dict, params: dict, config: dict) -> list:
+    """
+    Trades from precomputed entry signals, in order.
+
+    Each trade jumps to the next signal via ``signals["next_entry"]`` and
+    scans forward for its stop/target hit, so the Python work is per trade,
+    not per bar. Uses ``max_daily``, ``max_per_session``,
+    ``atr_tp_multiplier`` and ``stop_loss_buffer_points``.
+
+    Returns:
+        Trade dicts (``entry_time``, ``exit_time``, ``direction``,
+        ``entry_price``, ``exit_price``, ``pnl``).
+    """
+    limit = min(params.get("max_daily", 6), params.get("max_per_session", 2))
+    close = sessions["close"]
+    n = len(close)
+    if limit <= 0 or n == 0:
+        return []
+
+    high = sessions["high"]
+    low = sessions["low"]
+    times = sessions["time"]
+    day = sessions["day"]
+    # First bar of the following session, where a skipped date's bars end.
+    next_day = sessions["session_start"][sessions["session"] + 1]
+    long_entry = signals["long"]
+    next_entry = signals["next_entry"]
+    range_high = signals["range_high"]
+    range_low = signals["range_low"]
+    range_size = signals["range_size"]
+
+    atr_multiplier = params.get("atr_tp_multiplier", 3.0)
+    stop_buffer = params.get("stop_loss_buffer_points", 2.0)
+    total_cost_per_trade = _cost_per_trade(config)
+
+    # (entry bar, exit bar or -1, long, entry, exit, pnl); timestamps are
+    # boxed in one batch at the end.
+    fills = []
+    current_day = None
+    day_trades = 0
+    position = 0
+    while True:
+        k = next_entry[position]
+        if k == n:
+            break
+        if day[k] != current_day:
+            current_day, day_trades = day[k], 0
+        elif day_trades >= limit:
+            position = next_day[k]
+            continue
+        day_trades += 1
+
+        is_long = bool(long_entry[k])
+        entry_price = close[k]
+        atr = range_size[k]  # Use range as proxy for ATR
+        if is_long:
+            stop_loss = range_low[k] - stop_buffer
+            take_profit = entry_price + (atr * atr_multiplier)
+        else:
+            stop_loss = range_high[k] + stop_buffer
+            take_profit = entry_price - (atr * atr_multiplier)
+
+        # After a date's last allowed entry its remaining bars are skipped.
+        first = next_day[k] if day_trades >= limit else k + 1
+        j, stopped = _first_exit(high, low, first, stop_loss, take_profit, is_long)
+        if j < 0:
+            exit_price = sessions["last_close"]
+        else:
+            exit_price = stop_loss if stopped else take_profit
+
+        if is_long:
+            pnl = (exit_price - entry_price) * 50 - total_cost_per_trade  # ES multiplier
+        else:
+            pnl = (entry_price - exit_price) * 50 - total_cost_per_trade
+        fills.append((k, j, is_long, entry_price, exit_price, pnl))
+        if j < 0:
+            break
+        position = j + 1
+        if day[j] != current_day:
+            current_day, day_trades = day[j], 0
+
+    if not fills:
+        return []
+    entry_bars, exit_bars = (np.array(col) for col in list(zip(*fills))[:2])
+    entry_times = times[entry_bars]
+    exit_times = list(times[np.maximum(exit_bars, 0)])
+    if exit_bars[-1] < 0:
+        exit_times[-1] = sessions["last_time"]
+    return [
+        {
+            "entry_time": entry_time,
+            "exit_time": exit_time,
+            "direction": "long" if is_long else "short",
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "pnl": pnl,
+        }
+        for (_, _, is_long, entry_price, exit_price, pnl), entry_time, exit_time
+        in zip(fills, entry_times, exit_times)
+    ]
+
+
+def simulate_orb_trades(
     data: pd.DataFrame,
     params: dict,
     config: dict,
-) -> dict:
+    sessions: dict | None = None,
+) -> list:
     """
-    Run a single ORB backtest on provided data.
+    ORB trades computed with array operations; same trades as the loop engine.
 
-    Returns metrics dictionary.
+    Args:
+        data: OHLCV bars (DatetimeIndex or a ``timestamp``/``ts_event`` column).
+        params: Strategy parameters.
+        config: Backtest configuration (costs).
+        sessions: Prebuilt ``build_orb_sessions`` table for ``data`` and
+            ``params["range_minutes"]``.
+
+    Returns:
+        Trade dicts, see ``walk_orb_trades``.
+    """
+    if sessions is None:
+        sessions = build_orb_sessions(data, params.get("range_minutes", 15))
+    if sessions is None:
+        return _simulate_orb_loop(data, params, config)
+    return walk_orb_trades(sessions, orb_entry_signals(sessions, params), params, config)
+
+
+def _simulate_orb_loop(
+    data: pd.DataFrame,
+    params: dict,
+    config: dict,
+) -> list:
+    """
+    Bar-by-bar reference simulation, kept as the oracle for ``simulate_orb_trades``.
+
+    Returns the trade dicts.
     """
     trades = []
     current_position = None
@@ -162,29 +509,13 @@ def run_single_backtest(
     daily_trades = 0
     last_date = None
 
-    equity = [float(config["initial_capital"])]
-
-    # Calculate costs
-    commission = float(config["commission_per_contract"]) * 2  # Round trip
-    slippage = float(config["slippage_ticks"]) * float(config["tick_value"]) * 2
-    total_cost_per_trade = commission + slippage
-
-    # Ensure data has proper index
-    data = data.copy()
-    if not isinstance(data.index, pd.DatetimeIndex):
-        if 'timestamp' in data.columns:
-            data['timestamp'] = pd.to_datetime(data['timestamp'])
-            data = data.set_index('timestamp')
-        elif 'ts_event' in data.columns:
-            data['timestamp'] = pd.to_datetime(data['ts_event'], unit='ns')
-            data = data.set_index('timestamp')
+    total_cost_per_trade = _cost_per_trade(config)
+    data = _with_datetime_index(data).copy()
 
     # NY Session times
-    ny_start = time(9, 30)
-    range_minutes = params.get("range_minutes", 15)
-    range_end_minute = 30 + range_minutes
-    ny_range_end = time(9, range_end_minute % 60) if range_end_minute < 60 else time(10, range_end_minute - 60)
-    ny_session_end = time(16, 0)
+    ny_start = NY_START
+    ny_range_end = _ny_range_end(params.get("range_minutes", 15))
+    ny_session_end = NY_SESSION_END
 
     # Calculate volume average for confirmation
     if 'volume' in data.columns:
@@ -254,7 +585,6 @@ def run_single_backtest(
                         "exit_price": exit_price,
                         "pnl": pnl,
                     })
-                    equity.append(equity[-1] + pnl)
                     current_position = None
                 elif row["high"] >= take_profit:
                     # Hit take profit
@@ -268,7 +598,6 @@ def run_single_backtest(
                         "exit_price": exit_price,
                         "pnl": pnl,
                     })
-                    equity.append(equity[-1] + pnl)
                     current_position = None
             else:  # short
                 if row["high"] >= stop_loss:
@@ -282,7 +611,6 @@ def run_single_backtest(
                         "exit_price": exit_price,
                         "pnl": pnl,
                     })
-                    equity.append(equity[-1] + pnl)
                     current_position = None
                 elif row["low"] <= take_profit:
                     exit_price = take_profit
@@ -295,7 +623,6 @@ def run_single_backtest(
                         "exit_price": exit_price,
                         "pnl": pnl,
                     })
-                    equity.append(equity[-1] + pnl)
                     current_position = None
             continue
 
@@ -382,9 +709,20 @@ def run_single_backtest(
             "exit_price": exit_price,
             "pnl": pnl,
         })
-        equity.append(equity[-1] + pnl)
 
-    # Calculate metrics
+    return trades
+
+
+def summarize_orb_trades(trades: list, config: dict) -> dict:
+    """
+    Metrics of a trade list; equity starts at the initial capital.
+
+    Returns metrics dictionary.
+    """
+    equity = [float(config["initial_capital"])]
+    for trade in trades:
+        equity.append(equity[-1] + trade["pnl"])
+
     total_trades = len(trades)
     if total_trades == 0:
         return {
@@ -434,6 +772,29 @@ def run_single_backtest(
     }
 
 
+def run_single_backtest(
+    data: pd.DataFrame,
+    params: dict,
+    config: dict,
+    engine: str = "vectorized",
+) -> dict:
+    """
+    Run a single ORB backtest on provided data.
+
+    ``engine="loop"`` runs the original bar-by-bar simulation; both engines
+    produce the same trades.
+
+    Returns metrics dictionary.
+    """
+    if engine == "vectorized":
+        trades = simulate_orb_trades(data, params, config)
+    elif engine == "loop":
+        trades = _simulate_orb_loop(data, params, config)
+    else:
+        raise ValueError(f"Unknown engine {engine!r}; expected 'vectorized' or 'loop'")
+    return summarize_orb_trades(trades, config)
+
+
 def run_walk_forward_validation(
     data: pd.DataFrame,
     params: dict,
@@ -516,23 +877,178 @@ def run_walk_forward_validation(
     }
 
 
-def main():
-    """Main backtest execution."""
-    print("="*60)
-    print("ORB STRATEGY FULL BACKTEST - Task backtest-030")
+# ===========================================================================
+# PARAMETER SWEEP
+# ===========================================================================
+
+# Swept parameters and their defaults when neither grid nor params set them.
+SWEEP_PARAMS = {
+    "range_minutes": 15,
+    "volume_threshold": 1.3,
+    "atr_tp_multiplier": 3.0,
+    "stop_loss_buffer_points": 2.0,
+}
+
+# Metrics of summarize_orb_trades reported per grid row.
+SWEEP_METRICS = ("sharpe", "total_return_pct", "max_drawdown_pct", "win_rate", "profit_factor", "total_trades")
+
+# Exit-parameter combos evaluated per pool task.
+SWEEP_TASK_COMBOS = 16
+
+# Per-process sweep state, populated once by _init_sweep_worker so each task
+# only pays for its trade walks.
+_SWEEP_STATE: dict = {}
+
+
+def _init_sweep_worker(tables: dict, params: dict, config: dict) -> None:
+    _SWEEP_STATE["tables"] = tables
+    _SWEEP_STATE["params"] = params
+    _SWEEP_STATE["config"] = config
+    _SWEEP_STATE["signals"] = {}
+
+
+def _run_sweep_task(range_minutes: int, volume_threshold: float, exits: list) -> list:
+    """Grid rows for one range length and volume threshold over a batch of exit combos."""
+    sessions = _SWEEP_STATE["tables"][range_minutes]
+    config = _SWEEP_STATE["config"]
+    base = {**_SWEEP_STATE["params"], "range_minutes": range_minutes, "volume_threshold": volume_threshold}
+
+    key = (range_minutes, volume_threshold)
+    signals = _SWEEP_STATE["signals"].get(key)
+    if signals is None:
+        signals = _SWEEP_STATE["signals"][key] = orb_entry_signals(sessions, base)
+
+    rows = []
+    for atr_tp_multiplier, stop_loss_buffer_points in exits:
+        params = {**base, "atr_tp_multiplier": atr_tp_multiplier, "stop_loss_buffer_points": stop_loss_buffer_points}
+        metrics = summarize_orb_trades(walk_orb_trades(sessions, signals, params, config), config)
+        rows.append({
+            "params": {name: params[name] for name in SWEEP_PARAMS},
+            **{name: metrics[name] for name in SWEEP_METRICS},
+        })
+    return rows
+
+
+def run_orb_sweep(
+    data: pd.DataFrame,
+    grid: dict,
+    params: dict,
+    config: dict,
+    workers: int | None = None,
+) -> list:
+    """
+    Backtest every combination of ``grid`` and rank them by Sharpe ratio.
+
+    The session table is built once per ``range_minutes`` and the entry
+    signals once per (``range_minutes``, ``volume_threshold``); exit combos
+    (``atr_tp_multiplier`` x ``stop_loss_buffer_points``) only rerun the
+    trade walk. Batches of exit combos are spread across a process pool
+    whose workers receive the tables once. Every row matches
+    ``run_single_backtest`` with the same parameters.
+
+    Args:
+        data: OHLCV bars.
+        grid: ``{name: [values]}`` for ``SWEEP_PARAMS``; missing names use
+            ``params``.
+        params: Base strategy parameters.
+        config: Backtest configuration (costs, initial capital).
+        workers: Process count (default: CPU count). ``1`` runs in-process.
+
+    Returns:
+        Grid rows (``rank``, ``params`` and metrics), best first.
+    """
+    values = {
+        name: list(grid.get(name) or [params.get(name, default)])
+        for name, default in SWEEP_PARAMS.items()
+    }
+
+    tables = {}
+    for range_minutes in values["range_minutes"]:
+        sessions = build_orb_sessions(data, range_minutes)
+        if sessions is None:
+            raise ValueError("ORB sweep needs bars indexed by sorted timestamps")
+        tables[range_minutes] = sessions
+
+    exits = list(itertools.product(values["atr_tp_multiplier"], values["stop_loss_buffer_points"]))
+    tasks = [
+        (range_minutes, volume_threshold, exits[i:i + SWEEP_TASK_COMBOS])
+        for range_minutes in values["range_minutes"]
+        for volume_threshold in values["volume_threshold"]
+        for i in range(0, len(exits), SWEEP_TASK_COMBOS)
+    ]
+
+    rows = []
+    n_workers = workers or os.cpu_count() or 1
+    if n_workers == 1 or len(tasks) <= 1:
+        _init_sweep_worker(tables, params, config)
+        try:
+            for task in tasks:
+                rows.extend(_run_sweep_task(*task))
+        finally:
+            _SWEEP_STATE.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(n_workers, len(tasks)),
+            initializer=_init_sweep_worker,
+            initargs=(tables, params, config),
+        ) as pool:
+            for task_rows in pool.map(_run_sweep_task, *zip(*tasks)):
+                rows.extend(task_rows)
+
+    # Stable sort: ties keep grid order.
+    rows.sort(key=lambda row: (-row["sharpe"], -row["total_return_pct"]))
+    return [{"rank": rank, **row} for rank, row in enumerate(rows, 1)]
+
+
+def run_sweep_report(data: pd.DataFrame, workers: int | None = None, top: int = 10) -> Path:
+    """Run the configured sweep grid, print the top rows and save the ranked grid."""
+    grid = BACKTEST_CONFIG["sweep_grid"]
+    n_combos = int(np.prod([len(v) for v in grid.values()]))
+
+    print("\n" + "="*60)
+    print(f"ORB PARAMETER SWEEP ({n_combos} combos)")
     print("="*60)
-    print(f"Timestamp: {datetime.now().isoformat()}")
-    print(f"Symbol: {BACKTEST_CONFIG['symbol']}")
-    print(f"Period: {BACKTEST_CONFIG['start_date']} to {BACKTEST_CONFIG['end_date']}")
-    print()
 
-    # Print hypothesis
-    print("HYPOTHESIS:")
-    print("-"*60)
-    print(HYPOTHESIS[:500] + "...")
-    print("-"*60)
-    print()
+    started = datetime.now()
+    ranked = run_orb_sweep(data, grid, BACKTEST_CONFIG["strategy_params"], BACKTEST_CONFIG, workers=workers)
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Evaluated {len(ranked)} combos in {elapsed:.1f}s\n")
+
+    print(f"{'rank':>4} {'range':>5} {'vol':>5} {'tp_x':>5} {'buf':>5} {'sharpe':>8} {'ret%':>8} {'dd%':>7} {'win%':>6} {'trades':>6}")
+    for row in ranked[:top]:
+        p = row["params"]
+        print(
+            f"{row['rank']:>4} {p['range_minutes']:>5} {p['volume_threshold']:>5} "
+            f"{p['atr_tp_multiplier']:>5} {p['stop_loss_buffer_points']:>5} "
+            f"{row['sharpe']:>8.3f} {row['total_return_pct']:>8.2f} {row['max_drawdown_pct']:>7.2f} "
+            f"{row['win_rate']*100:>6.1f} {row['total_trades']:>6}"
+        )
 
+    output_dir = Path(__file__).parent.parent / "output" / "backtests" / datetime.now().strftime("%Y-%m-%d")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / "orb_breakout_es_sweep.json"
+    with open(output_path, "w") as f:
+        json.dump({
+            "strategy": "orb_breakout_es",
+            "symbol": BACKTEST_CONFIG["symbol"],
+            "period": {"start": BACKTEST_CONFIG["start_date"], "end": BACKTEST_CONFIG["end_date"]},
+            "base_parameters": BACKTEST_CONFIG["strategy_params"],
+            "grid": grid,
+            "ranked": ranked,
+            "timestamp": datetime.now().isoformat(),
+        }, f, indent=2, default=str)
+
+    print(f"\n✅ Ranked grid saved to: {output_path}")
+    return output_path
+
+
+def load_backtest_data() -> pd.DataFrame | None:
+    """
+    Load the cached ES bars for the configured period.
+
+    Prints the failure markers and returns None when the cache is missing
+    or unreadable.
+    """
     # Load data from parquet
     print(f"Loading data from: {DATA_PATH}")
 
@@ -540,7 +1056,7 @@ def main():
         print(f"❌ Data file not found: {DATA_PATH}")
         print("QUANT_TASK_FAILED: backtest-030")
         print("REASON: Databento parquet cache not found - cannot use mock data")
-        return
+        return None
 
     try:
         data = pd.read_parquet(DATA_PATH)
@@ -554,7 +1070,7 @@ def main():
         print(f"❌ Failed to load data: {e}")
         print("QUANT_TASK_FAILED: backtest-030")
         print(f"REASON: Data load failed - {e}")
-        return
+        return None
 
     # Ensure proper datetime index
     if not isinstance(data.index, pd.DatetimeIndex):
@@ -584,6 +1100,43 @@ def main():
     # Verify no mock data
     print("\n✅ Data source verification: Databento parquet cache (NO MOCK DATA)")
 
+    return data
+
+
+def parse_args(argv: list | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ORB full backtest (task backtest-030)")
+    parser.add_argument("--sweep", action="store_true", help="Rank the sweep_grid parameter combos instead of the full backtest")
+    parser.add_argument("--workers", type=int, default=None, help="Sweep worker processes (default: CPU count)")
+    parser.add_argument("--top", type=int, default=10, help="Sweep rows to print")
+    return parser.parse_args(argv)
+
+
+def main(argv: list | None = None):
+    """Main backtest execution."""
+    args = parse_args(argv)
+    print("="*60)
+    print("ORB STRATEGY FULL BACKTEST - Task backtest-030")
+    print("="*60)
+    print(f"Timestamp: {datetime.now().isoformat()}")
+    print(f"Symbol: {BACKTEST_CONFIG['symbol']}")
+    print(f"Period: {BACKTEST_CONFIG['start_date']} to {BACKTEST_CONFIG['end_date']}")
+    print()
+
+    # Print hypothesis
+    print("HYPOTHESIS:")
+    print("-"*60)
+    print(HYPOTHESIS[:500] + "...")
+    print("-"*60)
+    print()
+
+    data = load_backtest_data()
+    if data is None:
+        return
+
+    if args.sweep:
+        run_sweep_report(data, workers=args.workers, top=args.top)
+        return
+
     # Run full backtest
     print("\n" + "="*60)
     print("RUNNING FULL IN-SAMPLE BACKTEST")
@@ -0,0 +1,29 @@
+"""High-turnover mean-reversion strategy for benchmarking the backtest runner.
+
+Flips side whenever the close crosses a very short moving average, so it
+trades on a large fraction of bars and stresses the simulator and metrics
+far more than the SMA crossover demo.
+"""
+
+
+class Strategy:
+    name = "High_Turnover_Demo"
+
+    def __init__(self, params=None):
+        self.params = params or self.default_params()
+
+    def default_params(self):
+        return {"period": 3}
+
+    def warmup_bars(self):
+        return self.params["period"]
+
+    def indicators(self, df):
+        df["sma"] = df["close"].rolling(self.params["period"]).mean()
+        return df
+
+    def signals(self, df):
+        df["signal"] = 0
+        df.loc[df["close"] < df["sma"], "signal"] = 1
+        df.loc[df["close"] > df["sma"], "signal"] = -1
+        return df
@@ -17,20 +17,44 @@ class Strategy:
             "atr_multiplier": 2.0,
         }
 
+    def warmup_bars(self):
+        # History needed before every indicator is valid (ATR also uses
+        # the previous close).
+        p = self.params
+        return max(p["slow_period"], p["atr_period"] + 1)
+
+    def _indicator(self, df, name, deps, compute):
+        # Reuse columns through the runner's indicator cache when present;
+        # ``deps`` lists only the parameters the indicator depends on.
+        cache = getattr(self, "indicator_cache", None)
+        if cache is None:
+            return compute()
+        return cache.get_or_compute(df, name, deps, compute)
+
     def indicators(self, df):
         p = self.params
-        df["sma_fast"] = df["close"].rolling(p["fast_period"]).mean()
-        df["sma_slow"] = df["close"].rolling(p["slow_period"]).mean()
+        df["sma_fast"] = self._indicator(
+            df, "sma", {"period": p["fast_period"]},
+            lambda: df["close"].rolling(p["fast_period"]).mean(),
+        )
+        df["sma_slow"] = self._indicator(
+            df, "sma", {"period": p["slow_period"]},
+            lambda: df["close"].rolling(p["slow_period"]).mean(),
+        )
+
         # ATR for stop-loss reference
-        tr = pd.concat(
-            [
-                df["high"] - df["low"],
-                (df["high"] - df["close"].shift(1)).abs(),
-                (df["low"] - df["close"].shift(1)).abs(),
-            ],
-            axis=1,
-        ).max(axis=1)
-        df["atr"] = tr.rolling(p["atr_period"]).mean()
+        def atr():
+            tr = pd.concat(
+                [
+                    df["high"] - df["low"],
+                    (df["high"] - df["close"].shift(1)).abs(),
+                    (df["low"] - df["close"].shift(1)).abs(),
+                ],
+                axis=1,
+            ).max(axis=1)
+            return tr.rolling(p["atr_period"]).mean()
+
+        df["atr"] = self._indicator(df, "atr", {"period": p["atr_period"]}, atr)
         return df
 
     def signals(self, df):
@@ -0,0 +1,38 @@
+"""Shared fixtures: seeded synthetic bars and an isolated data cache."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from lib.synthetic_data import SyntheticConfig, generate_ohlcv  # noqa: E402
+
+SAMPLE_STRATEGY = PROJECT_ROOT / "seed" / "sample_strategy.py"
+
+
+@pytest.fixture(autouse=True)
+def data_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point the data and rules caches at a per-test directory."""
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("SIGMA_QUANT_DATA_CACHE", str(cache))
+    return cache
+
+
+@pytest.fixture(scope="session")
+def bars() -> pd.DataFrame:
+    """Four trading days of seeded 5-minute bars."""
+    return generate_ohlcv(4 * 288, seed=11, config=SyntheticConfig(bar_minutes=5.0))
+
+
+@pytest.fixture
+def bars_csv(tmp_path: Path, bars: pd.DataFrame) -> Path:
+    """``bars`` written as a CSV with unix-second timestamps."""
+    path = tmp_path / "ES_5min_synth.csv"
+    bars.assign(timestamp=bars["timestamp"].astype("int64") // 10**9).to_csv(path, index=False)
+    return path
@@ -0,0 +1,119 @@
+"""Equivalence of the trade simulators and of chunked, incremental and single-shot backtests."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.backtest_runner import (
+    DEFAULT_CRYPTO_CEX_COST,
+    DEFAULT_FUTURES_COST,
+    SAME_BAR_RULES,
+    TradeBatch,
+    run_backtest,
+    run_backtest_chunked,
+    simulate_trades,
+)
+
+from conftest import SAMPLE_STRATEGY
+
+TRADE_FIELDS = ("entry_bar", "exit_bar", "side", "entry_price", "exit_price", "pnl", "mfe", "mae", "exit_reason")
+
+
+def assert_batches_equal(actual: TradeBatch, expected: TradeBatch) -> None:
+    assert len(actual) == len(expected)
+    for field in TRADE_FIELDS:
+        np.testing.assert_allclose(getattr(actual, field), getattr(expected, field), rtol=0, atol=1e-9, err_msg=field)
+
+
+def random_signals(n: int, seed: int) -> np.ndarray:
+    """Runs of long/flat/short signals with random lengths."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 40, size=n)
+    values = rng.choice([-1, 0, 1], size=n)
+    return np.repeat(values, lengths)[:n]
+
+
+def with_brackets(df: pd.DataFrame, seed: int) -> pd.DataFrame:
+    """Stops, targets and trailing distances a few bar ranges from the close."""
+    rng = np.random.default_rng(seed)
+    side = df["signal"].to_numpy()
+    bar_range = (df["high"] - df["low"]).rolling(20, min_periods=1).mean().to_numpy()
+    stop = df["close"].to_numpy() - side * bar_range * rng.uniform(1.0, 4.0, len(df))
+    target = df["close"].to_numpy() + side * bar_range * rng.uniform(1.0, 6.0, len(df))
+    trail = np.where(rng.random(len(df)) < 0.5, bar_range * 3.0, np.nan)
+    flat = side == 0
+    return df.assign(
+        stop_price=np.where(flat, np.nan, stop),
+        target_price=np.where(flat | (rng.random(len(df)) < 0.2), np.nan, target),
+        trail=np.where(flat, np.nan, trail),
+    )
+
+
+@pytest.mark.parametrize("cost_model", [DEFAULT_FUTURES_COST, DEFAULT_CRYPTO_CEX_COST], ids=["futures", "crypto"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_vectorized_matches_loop(bars, cost_model, seed):
+    df = bars.assign(signal=random_signals(len(bars), seed))
+
+    expected = simulate_trades(df, cost_model, engine="loop")
+    assert len(expected) > 10
+    assert_batches_equal(simulate_trades(df, cost_model, engine="vectorized"), expected)
+
+
+@pytest.mark.parametrize("rule", SAME_BAR_RULES)
+@pytest.mark.parametrize("seed", [4, 5])
+def test_vectorized_matches_loop_with_brackets(bars, rule, seed):
+    df = with_brackets(bars.assign(signal=random_signals(len(bars), seed)), seed)
+    cost_model = {**DEFAULT_FUTURES_COST, "same_bar_exit": rule}
+
+    expected = simulate_trades(df, cost_model, engine="loop")
+    assert {"stop", "target"} <= {t.exit_reason for t in expected}
+    assert_batches_equal(simulate_trades(df, cost_model, engine="vectorized"), expected)
+
+
+def test_unknown_engine_is_rejected(bars):
+    with pytest.raises(ValueError, match="Unknown simulation engine"):
+        simulate_trades(bars.assign(signal=0), DEFAULT_FUTURES_COST, engine="gpu")
+
+
+@pytest.mark.parametrize("chunk_bars", [97, 400, 5000])
+def test_chunked_matches_single_shot(bars_csv, chunk_bars):
+    expected = run_backtest(str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, use_cache=False)
+    actual = run_backtest_chunked(
+        str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, chunk_bars=chunk_bars, use_cache=False
+    )
+
+    assert expected["metrics"]["total_trades"] > 10
+    assert actual["trade_log"] == expected["trade_log"]
+    assert actual["metrics"] == pytest.approx(expected["metrics"])
+    assert actual["daily_returns"] == expected["daily_returns"]
+    assert actual["bars_tested"] == expected["bars_tested"]
+
+
+def test_chunked_matches_single_shot_on_a_bar_range(bars_csv):
+    expected = run_backtest(
+        str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, start_bar=100, end_bar=900, use_cache=False
+    )
+    actual = run_backtest_chunked(
+        str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, chunk_bars=150, start_bar=100, end_bar=900,
+        use_cache=False,
+    )
+
+    assert actual["trade_log"] == expected["trade_log"]
+    assert actual["metrics"] == pytest.approx(expected["metrics"])
+
+
+def test_incremental_resume_matches_full_run(bars_csv, tmp_path):
+    lines = bars_csv.read_bytes().splitlines(keepends=True)
+    checkpoint = str(tmp_path / "sma.ckpt")
+    bars_csv.write_bytes(b"".join(lines[:600]))
+    run_backtest(str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, checkpoint=checkpoint)
+
+    for end in (900, len(lines)):
+        bars_csv.write_bytes(b"".join(lines[:end]))
+        resumed = run_backtest(str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, checkpoint=checkpoint)
+        expected = run_backtest(str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, use_cache=False)
+
+        assert resumed["trade_log"] == expected["trade_log"]
+        assert resumed["metrics"] == pytest.approx(expected["metrics"])
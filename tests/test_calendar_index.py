@@ -0,0 +1,88 @@
+"""Trading-day attribution: CME evening roll-forward and calendar-month parity."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.calendar_index import (
+    CalendarIndex,
+    daily_returns,
+    month_ids,
+    monthly_returns,
+    resolve_session,
+    weekly_returns,
+)
+
+CME = resolve_session("CME")
+
+
+def trading_days(local_times: list[str], session=CME) -> list[str]:
+    """Trading day of each Chicago wall-clock time, fed to the index as UTC timestamps."""
+    ts = pd.Series(pd.to_datetime(local_times)).dt.tz_localize("America/Chicago").dt.tz_convert("UTC")
+    days = CalendarIndex.from_timestamps(ts, session).day
+    return days.astype("datetime64[D]").astype(str).tolist()
+
+
+def test_cme_sunday_evening_rolls_to_monday():
+    assert trading_days([
+        "2024-03-01 15:59",  # Friday close
+        "2024-03-03 17:00",  # Sunday open
+        "2024-03-03 23:30",
+        "2024-03-04 09:30",
+        "2024-03-04 16:59",
+        "2024-03-04 17:00",  # Monday evening belongs to Tuesday
+    ]) == ["2024-03-01", "2024-03-04", "2024-03-04", "2024-03-04", "2024-03-04", "2024-03-05"]
+
+
+def test_cme_roll_follows_daylight_saving():
+    # 2024-03-10 is the first Sunday on CDT: 17:00 local is 22:00 UTC, not 23:00.
+    assert trading_days(["2024-03-08 16:00", "2024-03-10 17:00"]) == ["2024-03-08", "2024-03-11"]
+
+
+def test_cme_month_end_evening_rolls_to_next_month():
+    days = trading_days(["2024-01-31 16:59", "2024-01-31 17:00", "2024-02-29 18:00"])
+
+    assert days == ["2024-01-31", "2024-02-01", "2024-03-01"]
+    day_ids = np.array(days, dtype="datetime64[D]").astype(np.int64)
+    assert month_ids(day_ids).tolist() == [202401, 202402, 202403]
+
+
+def test_calendar_session_keeps_the_wall_clock_date():
+    assert trading_days(["2024-01-31 18:30"], resolve_session("calendar")) == ["2024-02-01"]  # 00:30 UTC
+    naive = pd.Series(pd.to_datetime(["2024-01-31 23:59", "2024-02-01 00:00"]))
+    assert CalendarIndex.from_timestamps(naive).day.astype("datetime64[D]").astype(str).tolist() == [
+        "2024-01-31", "2024-02-01",
+    ]
+
+
+@pytest.mark.parametrize("tz", [None, "UTC"])
+def test_calendar_session_matches_strftime_grouping(tz):
+    rng = np.random.default_rng(7)
+    ts = pd.Series(pd.date_range("2023-11-20", "2024-03-10", freq="37min", tz=tz))
+    exit_bars = np.sort(rng.choice(len(ts), 400, replace=False))
+    pnl = rng.normal(0.0, 50.0, len(exit_bars))
+    exits = ts.iloc[exit_bars].reset_index(drop=True)
+
+    trade_calendar = CalendarIndex.from_timestamps(ts).for_trades(exit_bars)
+
+    by_month = pd.Series(pnl).groupby(exits.dt.strftime("%Y-%m")).sum()
+    assert monthly_returns(trade_calendar, pnl) == [
+        {"month": month, "pnl": round(v, 2)} for month, v in by_month.items()
+    ]
+    by_day = pd.Series(pnl).groupby(exits.dt.strftime("%Y-%m-%d")).sum()
+    assert daily_returns(trade_calendar, pnl) == [{"date": day, "pnl": round(v, 2)} for day, v in by_day.items()]
+    mondays = (exits.dt.tz_localize(None) if tz else exits).dt.normalize() - pd.to_timedelta(exits.dt.weekday, unit="D")
+    by_week = pd.Series(pnl).groupby(mondays.dt.strftime("%Y-%m-%d")).sum()
+    assert weekly_returns(trade_calendar, pnl) == [{"week": week, "pnl": round(v, 2)} for week, v in by_week.items()]
+
+
+def test_resolve_session_specs():
+    assert resolve_session(None).name == "calendar"
+    custom = resolve_session('{"tz": "Asia/Tokyo", "start": "08:45"}')
+    assert (custom.name, custom.tz, custom.start) == ("custom", "Asia/Tokyo", "08:45")
+    with pytest.raises(ValueError, match="Unknown session"):
+        resolve_session("LSE")
+    with pytest.raises(ValueError, match="Invalid session start"):
+        resolve_session({"start": "25:00"})
@@ -0,0 +1,129 @@
+"""Round trips through the memory-mapped data cache."""
+
+from __future__ import annotations
+
+import logging
+
+import pandas as pd
+import pytest
+
+from lib.backtest_runner import parse_csv
+from lib.data_cache import cached_rows, extend_cached, load_cached, mark_file, read_appended
+
+
+class CountingParser:
+    """``parse_csv`` that counts its calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return parse_csv(path)
+
+
+@pytest.fixture
+def csv_path(bars_csv):
+    # A string column exercises the non-mmap path and dtype restoration.
+    df = pd.read_csv(bars_csv)
+    df["symbol"] = "ES"
+    df.to_csv(bars_csv, index=False)
+    return bars_csv
+
+
+def test_cached_load_matches_parse(csv_path):
+    parse = CountingParser()
+    expected = parse_csv(str(csv_path))
+
+    first = load_cached(str(csv_path), parse)
+    second = load_cached(str(csv_path), parse)
+
+    assert parse.calls == 1
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+    assert cached_rows(str(csv_path)) == len(expected)
+
+
+@pytest.mark.parametrize(("start_bar", "end_bar"), [(0, 10), (100, -1), (500, 777), (1150, -1)])
+def test_cached_slices_match_parse(csv_path, start_bar, end_bar):
+    load_cached(str(csv_path), parse_csv)
+    expected = parse_csv(str(csv_path)).iloc[start_bar:None if end_bar == -1 else end_bar].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(load_cached(str(csv_path), parse_csv, start_bar, end_bar), expected)
+
+
+def test_content_change_rebuilds(csv_path):
+    parse = CountingParser()
+    load_cached(str(csv_path), parse)
+    df = pd.read_csv(csv_path)
+    df.loc[3, "close"] += 1.0
+    df.to_csv(csv_path, index=False)
+
+    reloaded = load_cached(str(csv_path), parse)
+
+    assert parse.calls == 2
+    pd.testing.assert_frame_equal(reloaded, parse_csv(str(csv_path)))
+
+
+def test_unusable_cache_falls_back_to_parse(csv_path, tmp_path, monkeypatch, caplog):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    monkeypatch.setenv("SIGMA_QUANT_DATA_CACHE", str(blocker / "cache"))
+
+    with caplog.at_level(logging.WARNING, logger="lib.data_cache"):
+        df = load_cached(str(csv_path), parse_csv, 5, 50)
+
+    assert "parsing the CSV directly" in caplog.text
+    pd.testing.assert_frame_equal(df, parse_csv(str(csv_path)).iloc[5:50].reset_index(drop=True))
+    assert cached_rows(str(csv_path)) is None
+
+
+def _write_head(csv_path, keep: int) -> list[bytes]:
+    """Keep the header and all but ``keep`` rows; returns the rows cut off."""
+    lines = csv_path.read_bytes().splitlines(keepends=True)
+    csv_path.write_bytes(b"".join(lines[:-keep]))
+    return lines[-keep:]
+
+
+def test_extend_matches_full_parse(csv_path):
+    tail = _write_head(csv_path, 200)
+    parse = CountingParser()
+    head = load_cached(str(csv_path), parse)
+    before = mark_file(str(csv_path), len(head))
+    assert before is not None
+
+    with open(csv_path, "ab") as f:
+        f.write(b"".join(tail))
+    rows, after = read_appended(str(csv_path), before, parse_csv)
+
+    assert len(rows) == 200
+    assert after.rows == before.rows + 200
+    assert extend_cached(str(csv_path), rows, before, after)
+    pd.testing.assert_frame_equal(load_cached(str(csv_path), parse), parse_csv(str(csv_path)))
+    assert parse.calls == 1
+
+
+def test_partial_line_waits_for_completion(csv_path):
+    tail = _write_head(csv_path, 3)
+    before = mark_file(str(csv_path), len(parse_csv(str(csv_path))))
+
+    with open(csv_path, "ab") as f:
+        f.write(tail[0] + tail[1][:10])
+    rows, mark = read_appended(str(csv_path), before, parse_csv)
+    assert len(rows) == 1
+
+    with open(csv_path, "ab") as f:
+        f.write(tail[1][10:])
+    rows, mark = read_appended(str(csv_path), mark, parse_csv)
+    assert len(rows) == 1
+    assert read_appended(str(csv_path), mark, parse_csv) == (None, mark)
+
+
+def test_rewritten_file_is_not_read_as_appended(csv_path):
+    rows = len(parse_csv(str(csv_path)))
+    mark = mark_file(str(csv_path), rows)
+    df = pd.read_csv(csv_path)
+    df.loc[len(df) - 2, "close"] += 1.0
+    df.to_csv(csv_path, index=False)
+
+    assert read_appended(str(csv_path), mark, parse_csv) is None
@@ -0,0 +1,153 @@
+"""Windowed downloads: grid planning, checkpoint resume, page dedupe, retries and rate limiting."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+
+import pytest
+
+from conftest import PROJECT_ROOT
+
+
+def _load_downloader():
+    # Hyphenated script name; load it by path.
+    spec = importlib.util.spec_from_file_location("download_data", PROJECT_ROOT / "scripts" / "download-data.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+dl = _load_downloader()
+
+TF_MS = 60_000
+PAGE_BARS = 50
+WINDOW_MS = PAGE_BARS * TF_MS
+START_MS = 1_704_067_200_000 + 17 * TF_MS  # 2024-01-01, off the window grid
+END_MS = START_MS + 7 * WINDOW_MS + 5 * TF_MS
+BARS = [[ts, 1.0, 2.0, 0.5, 1.5, 10.0] for ts in range(START_MS - START_MS % WINDOW_MS, END_MS, TF_MS)]
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(dl, "CHECKPOINT_DIR", tmp_path / "partial")
+    monkeypatch.setattr(dl, "RETRY_BACKOFF_S", 0.0)
+
+
+class Exchange:
+    """In-memory exchange serving pages of ``page_bars`` bars from ``since`` on.
+
+    Pages start one bar early, so consecutive pages overlap. ``failures``
+    maps a window start to how many of its requests fail first.
+    """
+
+    def __init__(self, page_bars: int = 20, failures: dict | None = None):
+        self.page_bars = page_bars
+        self.failures = dict(failures or {})
+        self.requests: list[int] = []
+
+    async def fetch_page(self, since: int, end: int) -> list[list]:
+        self.requests.append(since)
+        window = since - since % WINDOW_MS
+        if self.failures.get(window, 0) > 0:
+            self.failures[window] -= 1
+            raise ConnectionError(f"window {window} unavailable")
+        await asyncio.sleep(0)
+        return [bar for bar in BARS if bar[0] >= since - TF_MS][:self.page_bars]
+
+
+def download(exchange: Exchange, concurrency: int = 3) -> list[list]:
+    windows = dl.plan_windows(START_MS, END_MS, WINDOW_MS)
+    checkpoint = dl.WindowCheckpoint("test", WINDOW_MS)
+    limiter = dl.TokenBucket(1e6, burst=100)
+    return asyncio.run(
+        dl.fetch_windows(windows, exchange.fetch_page, TF_MS, limiter, checkpoint, len(BARS), concurrency)
+    )
+
+
+def test_windows_are_aligned_to_the_grid():
+    windows = dl.plan_windows(START_MS, END_MS, WINDOW_MS)
+
+    assert windows[0][0] <= START_MS < windows[0][1]
+    assert windows[-1][0] < END_MS <= windows[-1][1]
+    assert all(start % WINDOW_MS == 0 and end - start == WINDOW_MS for start, end in windows)
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+    # A later "now" keeps the earlier windows.
+    later = dl.plan_windows(START_MS + 3 * TF_MS, END_MS + 3 * TF_MS, WINDOW_MS)
+    assert later[:len(windows) - 1] == windows[:-1]
+
+
+def test_overlapping_pages_are_deduplicated():
+    exchange = Exchange()
+
+    bars = download(exchange)
+
+    assert bars == BARS
+    assert len(exchange.requests) > len(dl.plan_windows(START_MS, END_MS, WINDOW_MS))
+
+
+def test_resume_skips_checkpointed_windows():
+    windows = dl.plan_windows(START_MS, END_MS, WINDOW_MS)
+    checkpoint = dl.WindowCheckpoint("test", WINDOW_MS)
+    for start, end in windows[:3]:
+        checkpoint.record(start, [bar for bar in BARS if start <= bar[0] < end])
+    with open(checkpoint.path, "a") as f:
+        f.write('{"window_ms": 60000, "start": 0, "bars": []}\n{"window_ms": 30')  # other grid, torn line
+
+    assert sorted(dl.WindowCheckpoint("test", WINDOW_MS).windows) == [start for start, _ in windows[:3]]
+    exchange = Exchange()
+    assert download(exchange) == BARS
+    assert min(exchange.requests) >= windows[3][0] - TF_MS
+    # Windows recorded after the torn line are readable on the next resume.
+    assert sorted(dl.WindowCheckpoint("test", WINDOW_MS).windows) == [start for start, _ in windows]
+
+
+def test_retries_recover_a_flaky_window():
+    flaky = dl.plan_windows(START_MS, END_MS, WINDOW_MS)[2][0]
+    exchange = Exchange(failures={flaky: dl.WINDOW_RETRIES})
+
+    assert download(exchange) == BARS
+    assert exchange.failures[flaky] == 0
+
+
+def test_failure_cancels_the_rest_and_keeps_the_checkpoint():
+    windows = dl.plan_windows(START_MS, END_MS, WINDOW_MS)
+    broken = windows[4][0]
+
+    with pytest.raises(ConnectionError, match=f"window {broken}"):
+        download(Exchange(failures={broken: dl.WINDOW_RETRIES + 1}), concurrency=2)
+
+    checkpoint = dl.WindowCheckpoint("test", WINDOW_MS)
+    lines = checkpoint.path.read_text().splitlines()
+    assert [json.loads(line)["start"] for line in lines] == list(checkpoint.windows)
+    assert broken not in checkpoint.windows
+    assert 0 < len(checkpoint.windows) < len(windows)
+
+    resumed = Exchange()
+    assert download(resumed) == BARS
+    assert all(since - since % WINDOW_MS not in checkpoint.windows for since in resumed.requests)
+
+
+def test_token_bucket_paces_after_the_burst(monkeypatch):
+    now = [100.0]
+    delays: list[float] = []
+
+    async def fake_sleep(delay):
+        delays.append(round(delay, 9))
+
+    monkeypatch.setattr(dl.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(dl.asyncio, "sleep", fake_sleep)
+    bucket = dl.TokenBucket(rate=10.0, burst=3)
+
+    async def acquire(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(acquire(5))
+    assert delays == [0.1, 0.2]
+
+    now[0] += 10.0  # idle long enough to refill the burst
+    delays.clear()
+    asyncio.run(acquire(3))
+    assert delays == []
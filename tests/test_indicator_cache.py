@@ -0,0 +1,153 @@
+"""Indicator memoization: hits and misses, the LRU budget, disk spill and code changes."""
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.backtest_runner import main
+from lib.indicator_cache import IndicatorCache, code_fingerprint
+
+from conftest import SAMPLE_STRATEGY
+
+
+class Counter:
+    """Compute function that counts its calls."""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.calls = 0
+
+    def __call__(self) -> np.ndarray:
+        self.calls += 1
+        return self.values
+
+
+@pytest.fixture
+def df(bars) -> pd.DataFrame:
+    return bars.head(400).copy()
+
+
+def sma(df: pd.DataFrame, period: int) -> Counter:
+    return Counter(df["close"].rolling(period).mean().to_numpy())
+
+
+def test_hits_and_misses(df):
+    cache = IndicatorCache()
+    compute = sma(df, 10)
+
+    first = cache.get_or_compute(df, "sma", {"period": 10}, compute)
+    second = cache.get_or_compute(df.copy(), "sma", {"period": 10}, compute)
+    cache.get_or_compute(df, "sma", {"period": 20}, sma(df, 20))
+
+    assert compute.calls == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+    np.testing.assert_array_equal(second.to_numpy(), compute.values)
+    second.iloc[:] = 0.0  # callers get private copies
+    np.testing.assert_array_equal(first.to_numpy(), compute.values)
+
+
+def test_different_data_misses(df):
+    cache = IndicatorCache()
+    changed = df.copy()
+    changed.loc[5, "close"] += 1.0
+
+    cache.get_or_compute(df, "sma", {"period": 10}, sma(df, 10))
+    cache.get_or_compute(changed, "sma", {"period": 10}, sma(changed, 10))
+    cache.get_or_compute(df.head(300), "sma", {"period": 10}, sma(df.head(300), 10))
+
+    assert cache.stats.misses == 3
+
+
+def test_lru_budget_evicts_least_recently_used(df):
+    column_bytes = len(df) * 8
+    cache = IndicatorCache(max_bytes=2 * column_bytes)
+    computes = {period: sma(df, period) for period in (5, 10, 20)}
+
+    cache.get_or_compute(df, "sma", {"period": 5}, computes[5])
+    cache.get_or_compute(df, "sma", {"period": 10}, computes[10])
+    cache.get_or_compute(df, "sma", {"period": 5}, computes[5])  # 10 is now the oldest
+    cache.get_or_compute(df, "sma", {"period": 20}, computes[20])
+
+    assert cache.stats.evictions == 1
+    assert cache.stats.bytes_cached == 2 * column_bytes
+    cache.get_or_compute(df, "sma", {"period": 5}, computes[5])
+    cache.get_or_compute(df, "sma", {"period": 10}, computes[10])
+    assert (computes[5].calls, computes[10].calls, computes[20].calls) == (1, 2, 1)
+
+
+def test_columns_over_budget_are_not_kept(df):
+    cache = IndicatorCache(max_bytes=len(df) * 8 - 1)
+    compute = sma(df, 10)
+
+    cache.get_or_compute(df, "sma", {"period": 10}, compute)
+    cache.get_or_compute(df, "sma", {"period": 10}, compute)
+
+    assert compute.calls == 2
+    assert cache.stats.bytes_cached == 0
+
+
+def test_disk_tier_is_shared_across_caches(df, tmp_path):
+    compute = sma(df, 10)
+    IndicatorCache(spill_dir=tmp_path).get_or_compute(df, "sma", {"period": 10}, compute)
+
+    other = IndicatorCache(spill_dir=tmp_path)
+    column = other.get_or_compute(df, "sma", {"period": 10}, compute)
+
+    assert compute.calls == 1
+    assert other.stats.disk_hits == 1
+    np.testing.assert_array_equal(column.to_numpy(), compute.values)
+
+
+def _load_module(path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_editing_the_indicator_code_invalidates(df, tmp_path):
+    helper = tmp_path / "helper.py"
+    helper.write_text("def indicator(close):\n    return close.rolling(10).mean().to_numpy()\n")
+    old = _load_module(helper)
+    cache = IndicatorCache(spill_dir=tmp_path / "spill")
+    cache.get_or_compute(df, "sma", {"period": 10}, functools.partial(old.indicator, df["close"]))
+
+    helper.write_text("def indicator(close):\n    return close.rolling(10).max().to_numpy()\n")
+    os.utime(helper, ns=(helper.stat().st_atime_ns, helper.stat().st_mtime_ns + 10**9))
+    new = _load_module(helper)
+    column = IndicatorCache(spill_dir=tmp_path / "spill").get_or_compute(
+        df, "sma", {"period": 10}, functools.partial(new.indicator, df["close"])
+    )
+
+    np.testing.assert_array_equal(column.to_numpy(), df["close"].rolling(10).max().to_numpy())
+
+
+def test_code_fingerprint_follows_the_defining_file(tmp_path):
+    first = tmp_path / "first.py"
+    second = tmp_path / "second.py"
+    first.write_text("def compute():\n    return 1\n")
+    second.write_text("def compute():\n    return 1\n\n# a different file\n")
+
+    a, b = _load_module(first), _load_module(second)
+
+    assert code_fingerprint(a.compute) == code_fingerprint(a.compute)
+    assert code_fingerprint(a.compute) != code_fingerprint(b.compute)
+    assert code_fingerprint(np.mean) == code_fingerprint(np.mean)
+
+
+def test_runner_leaves_the_cache_off_by_default(bars_csv, tmp_path):
+    output = tmp_path / "result.json"
+    args = ["--strategy", str(SAMPLE_STRATEGY), "--data", str(bars_csv), "--output", str(output)]
+
+    assert main(args) == 0
+    assert "indicator_cache" not in json.loads(output.read_text())
+
+    assert main([*args, "--indicator-cache-mb", "16"]) == 0
+    assert json.loads(output.read_text())["indicator_cache"]["misses"] == 3
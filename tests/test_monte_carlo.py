@@ -0,0 +1,64 @@
+"""Monte Carlo resampling: chunking independence and per-path statistics."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from lib.backtest_runner import DEFAULT_FUTURES_COST, compute_metrics, simulate_trades
+from lib.monte_carlo import MonteCarloConfig, path_statistics, run_monte_carlo
+
+
+@pytest.fixture(scope="module")
+def trades(bars):
+    rng = np.random.default_rng(3)
+    signal = rng.choice([-1, 0, 1], size=len(bars), p=[0.05, 0.9, 0.05])
+    return simulate_trades(bars.assign(signal=signal), DEFAULT_FUTURES_COST)
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "permutation"])
+def test_results_do_not_depend_on_chunking(trades, method):
+    config = MonteCarloConfig(paths=300, method=method, seed=5)
+
+    whole = run_monte_carlo(trades.pnl, config)
+    one_block_per_chunk = run_monte_carlo(trades.pnl, MonteCarloConfig(**{**vars(config), "max_bytes": 1}))
+
+    assert whole.to_dict() == one_block_per_chunk.to_dict()
+    assert whole.to_dict() != run_monte_carlo(trades.pnl, MonteCarloConfig(**{**vars(config), "seed": 6})).to_dict()
+
+
+def test_permutation_keeps_the_total(trades):
+    summary = run_monte_carlo(trades.pnl, MonteCarloConfig(paths=100, method="permutation"))
+
+    total = round(float(trades.pnl.sum()), 4)
+    assert set(summary.percentiles["total_pnl"].values()) == {total}
+
+
+def test_observed_order_matches_compute_metrics(trades):
+    metrics = compute_metrics(trades)
+    stats = path_statistics(trades.pnl[np.newaxis, :])
+
+    assert len(trades) > 20
+    assert round(float(stats["max_drawdown"][0]), 2) == metrics.max_drawdown_dollars
+    assert round(float(stats["sharpe"][0]), 4) == metrics.sharpe_ratio
+    assert round(float(stats["total_pnl"][0]), 2) == metrics.total_pnl
+
+
+def test_time_to_recovery_on_hand_built_paths():
+    paths = np.array([
+        [10.0, -5.0, -5.0, 3.0, 10.0, -1.0, 4.0, -20.0],  # peaks at 0, 4, 6: longest gap is 3 trades
+        [-1.0, -1.0, -1.0, -1.0, -1.0, -1.0, -1.0, -1.0],  # never recovers after the first trade
+        [5.0, -5.0, 5.0, -1.0, 1.0, -2.0, 1.0, 1.0],  # returning to a peak counts as recovering: gaps 1, 1, 2
+    ])
+
+    stats = path_statistics(paths)
+
+    assert stats["time_to_recovery"].tolist() == [3.0, 7.0, 2.0]
+    assert stats["max_drawdown"].tolist() == [20.0, 7.0, 5.0]
+    assert stats["total_pnl"].tolist() == [-4.0, -8.0, 5.0]
+
+
+def test_too_few_trades_and_bad_method():
+    assert run_monte_carlo(np.array([1.0])) is None
+    with pytest.raises(ValueError, match="Unknown Monte Carlo method"):
+        run_monte_carlo(np.array([1.0, -1.0]), MonteCarloConfig(method="jackknife"))
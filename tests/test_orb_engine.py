@@ -0,0 +1,92 @@
+"""The array-based ORB simulator and parameter sweep against their single-run references."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+
+import pandas as pd
+import pytest
+
+from lib.synthetic_data import generate_ohlcv
+
+from conftest import PROJECT_ROOT
+
+
+def _load_orb_script():
+    # The script is not a package module; load it by path and register it so
+    # sweep workers can unpickle its functions.
+    spec = importlib.util.spec_from_file_location("run_orb_backtest_030", PROJECT_ROOT / "scripts" / "run_orb_backtest_030.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+orb = _load_orb_script()
+
+
+@pytest.fixture(scope="module")
+def minute_bars() -> pd.DataFrame:
+    """Eight days of seeded one-minute bars covering the NY session."""
+    return generate_ohlcv(8 * 1440, seed=23)
+
+
+PARAM_SETS = [
+    {"range_minutes": 15, "min_range_points": 1.0},
+    {"range_minutes": 5, "min_range_points": 0.5, "atr_tp_multiplier": 1.5, "stop_loss_buffer_points": 0.0},
+    {"range_minutes": 30, "min_range_points": 1.0, "use_volume_confirmation": False, "max_per_session": 1},
+    {"range_minutes": 15, "min_range_points": 1.0, "volume_threshold": 1.6, "stop_loss_buffer_points": 4.0},
+]
+
+
+@pytest.mark.parametrize("overrides", PARAM_SETS, ids=lambda p: "-".join(f"{k}={v}" for k, v in p.items()))
+def test_vectorized_orb_matches_loop(minute_bars, overrides):
+    params = {**orb.BACKTEST_CONFIG["strategy_params"], **overrides}
+    config = orb.BACKTEST_CONFIG
+
+    expected = orb._simulate_orb_loop(minute_bars, params, config)
+    actual = orb.simulate_orb_trades(minute_bars, params, config)
+
+    assert len(expected) > 0
+    assert actual == expected
+
+
+def test_prebuilt_sessions_give_the_same_trades(minute_bars):
+    params = {**orb.BACKTEST_CONFIG["strategy_params"], "min_range_points": 1.0}
+    sessions = orb.build_orb_sessions(minute_bars, params["range_minutes"])
+
+    assert orb.simulate_orb_trades(minute_bars, params, orb.BACKTEST_CONFIG, sessions=sessions) == (
+        orb.simulate_orb_trades(minute_bars, params, orb.BACKTEST_CONFIG)
+    )
+
+
+SWEEP_GRID = {
+    "range_minutes": [5, 15],
+    "volume_threshold": [1.3, 1.6],
+    "atr_tp_multiplier": [1.5, 3.0, 4.0],
+    "stop_loss_buffer_points": [0.0, 2.0, 4.0],
+}
+
+
+@pytest.fixture(scope="module")
+def sweep(minute_bars) -> list:
+    params = {**orb.BACKTEST_CONFIG["strategy_params"], "min_range_points": 1.0}
+    return orb.run_orb_sweep(minute_bars, SWEEP_GRID, params, orb.BACKTEST_CONFIG, workers=1)
+
+
+def test_sweep_rows_match_single_backtests(minute_bars, sweep):
+    base = {**orb.BACKTEST_CONFIG["strategy_params"], "min_range_points": 1.0}
+
+    assert len(sweep) == 36
+    assert [row["rank"] for row in sweep] == list(range(1, 37))
+    assert [row["sharpe"] for row in sweep] == sorted((row["sharpe"] for row in sweep), reverse=True)
+    for row in sweep:
+        metrics = orb.run_single_backtest(minute_bars, {**base, **row["params"]}, orb.BACKTEST_CONFIG)
+        assert {name: row[name] for name in orb.SWEEP_METRICS} == {name: metrics[name] for name in orb.SWEEP_METRICS}
+
+
+def test_sweep_pool_matches_in_process(minute_bars, sweep):
+    params = {**orb.BACKTEST_CONFIG["strategy_params"], "min_range_points": 1.0}
+
+    assert orb.run_orb_sweep(minute_bars, SWEEP_GRID, params, orb.BACKTEST_CONFIG, workers=2) == sweep
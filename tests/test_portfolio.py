@@ -0,0 +1,65 @@
+"""Multi-symbol portfolios: every figure in dollars, summed per symbol."""
+
+from __future__ import annotations
+
+import pytest
+
+from lib.backtest_runner import (
+    DEFAULT_FUTURES_COST,
+    load_data,
+    load_strategy,
+    pnl_in_dollars,
+    run_portfolio,
+    simulate_trades,
+)
+from lib.synthetic_data import SyntheticConfig, generate_ohlcv
+
+from conftest import SAMPLE_STRATEGY
+
+POINT_VALUES = {"ES": 50.0, "MES": 5.0}
+
+
+@pytest.fixture
+def data_paths(tmp_path, bars) -> dict[str, str]:
+    other = generate_ohlcv(len(bars), seed=12, config=SyntheticConfig(bar_minutes=5.0))
+    paths = {}
+    for symbol, df in (("ES", bars), ("MES", other)):
+        path = tmp_path / f"{symbol}.csv"
+        df.assign(timestamp=df["timestamp"].astype("int64") // 10**9).to_csv(path, index=False)
+        paths[symbol] = str(path)
+    return paths
+
+
+def dollar_pnl(data_path: str, cost_model: dict) -> float:
+    strategy = load_strategy(str(SAMPLE_STRATEGY))
+    df = strategy.signals(strategy.indicators(load_data(data_path, use_cache=False)))
+    trades = simulate_trades(df, cost_model)
+    return float(pnl_in_dollars(trades, cost_model, cost_model["point_value"]).sum())
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_dollar_totals_are_the_per_symbol_sums(data_paths, workers):
+    cost_models = {symbol: {**DEFAULT_FUTURES_COST, "point_value": value} for symbol, value in POINT_VALUES.items()}
+
+    result = run_portfolio(
+        str(SAMPLE_STRATEGY), data_paths, DEFAULT_FUTURES_COST, workers=workers, use_cache=False,
+        symbol_cost_models=cost_models,
+    )
+
+    assert result["strategy_name"] == load_strategy(str(SAMPLE_STRATEGY)).name
+    assert result["point_values"] == POINT_VALUES
+    symbol_results = result["symbol_results"]
+    for symbol, path in data_paths.items():
+        expected = dollar_pnl(path, cost_models[symbol])
+        assert symbol_results[symbol]["metrics"]["total_pnl"] == pytest.approx(expected, abs=0.01)
+        assert result["contribution"][symbol]["total_pnl"] == pytest.approx(expected, abs=0.01)
+        assert "strategy_name" not in symbol_results[symbol]
+    assert result["metrics"]["total_pnl"] == pytest.approx(
+        sum(r["metrics"]["total_pnl"] for r in symbol_results.values()), abs=0.02
+    )
+    assert result["metrics"]["total_trades"] == sum(r["metrics"]["total_trades"] for r in symbol_results.values())
+
+
+def test_futures_without_a_point_value_are_refused(data_paths):
+    with pytest.raises(ValueError, match=r"No point value for \['ES', 'MES'\]"):
+        run_portfolio(str(SAMPLE_STRATEGY), data_paths, DEFAULT_FUTURES_COST, workers=1, use_cache=False)
@@ -0,0 +1,275 @@
+"""Compiled prop-firm rules, and the broadcast evaluation and pass odds against the trade-by-trade reference."""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import logging
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from lib.monte_carlo import BLOCK_PATHS
+from lib.prop_firm import (
+    PassProbabilityConfig,
+    TradeSeries,
+    compile_rules,
+    estimate_pass_probability,
+    evaluate_prop_firms,
+    get_consistency_rule,
+    get_daily_loss_limit,
+    get_drawdown_type,
+    get_min_trading_days,
+    get_profit_target,
+    load_compiled_rules,
+    rules_cache_dir,
+)
+
+from conftest import PROJECT_ROOT
+
+
+def _load_validator():
+    # Hyphenated script name; load it by path.
+    spec = importlib.util.spec_from_file_location("prop_firm_validator", PROJECT_ROOT / "scripts" / "prop-firm-validator.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+validator = _load_validator()
+
+ACCOUNT_SIZES = (25000, 50000, 100000)
+
+FIRMS = {
+    "static_pct": {
+        "evaluation": {"account_sizes": [50000, 100000], "profit_target": {"percent": 6}},
+        "risk_limits": {
+            "drawdown": {"type": "static", "percent": 4},
+            "daily_loss_limit": {"enabled": True, "values": {"50000": 1100, "100000": 2200}},
+        },
+    },
+    "intraday_dollars": {
+        "evaluation": {"account_sizes": [25000, 50000]},
+        "risk_limits": {
+            "drawdown": {"type": "trailing_intraday", "values": {"50000": 2500}},
+            "daily_loss_limit": {"enabled": False},
+        },
+    },
+    "eod_pct_daily": {
+        "evaluation": {"profit_target": 3000, "min_trading_days": 5},
+        "risk_limits": {
+            "drawdown": {"type": "eod", "percent": 0.05},
+            "daily_loss_limit": {"enabled": True, "values": None, "percent": 2},
+        },
+        "funded": {"consistency_rule": {"enabled": True, "percent": 30}},
+    },
+}
+
+
+def synthetic_trades(seed: int, n: int = 80) -> list:
+    """Trades of a few per day with seeded dollar PnL."""
+    rng = np.random.default_rng(seed)
+    day_offsets = np.sort(rng.integers(0, 30, size=n))
+    start = datetime(2024, 1, 2, 14, 30)
+    trades = []
+    for i, (offset, net) in enumerate(zip(day_offsets, rng.normal(40.0, 450.0, size=n))):
+        trades.append(validator.Trade(
+            timestamp=start + timedelta(days=int(offset), minutes=i),
+            direction="LONG",
+            entry_price=4500.0,
+            exit_price=4500.0,
+            contracts=1,
+            pnl=float(net),
+            commission=0.0,
+            slippage=0.0,
+            net_pnl=float(net),
+        ))
+    return trades
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_matrix_matches_reference(seed):
+    trades = synthetic_trades(seed)
+    combos = [(firm, size) for firm in FIRMS for size in ACCOUNT_SIZES]
+
+    actual = evaluate_prop_firms(validator.trade_series(trades), compile_rules({"firms": FIRMS}).limits(combos))
+
+    assert [(r.firm_name, r.account_size) for r in actual] == combos
+    for result, (firm, size) in zip(actual, combos):
+        expected = validator.simulate_prop_firm(trades, firm, FIRMS[firm], size)
+        assert asdict(result) == pytest.approx(asdict(expected), rel=1e-9, abs=1e-6), (firm, size)
+
+
+def test_outcomes_cover_passes_and_both_violation_kinds():
+    combos = [(firm, size) for firm in FIRMS for size in ACCOUNT_SIZES]
+    limits = compile_rules({"firms": FIRMS}).limits(combos)
+    reasons = [
+        r.violation_reason or "passed"
+        for seed in range(6)
+        for r in evaluate_prop_firms(validator.trade_series(synthetic_trades(seed)), limits)
+    ]
+
+    assert any(reason == "passed" for reason in reasons)
+    assert any(reason.startswith("Drawdown") for reason in reasons)
+    assert any(reason.startswith("Daily loss") for reason in reasons)
+
+
+def test_empty_series():
+    limits = compile_rules({"firms": FIRMS}).limits([("static_pct", 50000)])
+
+    (result,) = evaluate_prop_firms(TradeSeries.from_days([], []), limits)
+    expected = validator.simulate_prop_firm([], "static_pct", FIRMS["static_pct"], 50000)
+
+    assert asdict(result) == pytest.approx(asdict(expected))
+
+
+def drawn_windows(n_days: int, config: PassProbabilityConfig) -> np.ndarray:
+    """Historical day of every window day, drawn like ``estimate_pass_probability``."""
+    block_days = min(config.block_days, n_days)
+    blocks_per_path = -(-config.window_days // block_days)
+    starts = np.concatenate([
+        np.random.default_rng([config.seed, block]).integers(
+            0, n_days, size=(min(BLOCK_PATHS, config.paths - block * BLOCK_PATHS), blocks_per_path)
+        )
+        for block in range(-(-config.paths // BLOCK_PATHS))
+    ])
+    days = (starts[:, :, np.newaxis] + np.arange(block_days)) % n_days
+    return days.reshape(len(days), -1)[:, :config.window_days]
+
+
+def reference_outcome(trades_by_day: list, window: np.ndarray, firm: str, size: int) -> tuple[int | None, bool]:
+    """Window day (1-based) on which ``simulate_prop_firm`` would pass, and whether it breaches first."""
+    start = datetime(2024, 1, 2, 14, 30)
+    path = [
+        replace(trade, timestamp=start + timedelta(days=day_number, minutes=i))
+        for day_number, day in enumerate(window)
+        for i, trade in enumerate(trades_by_day[day])
+    ]
+    result = validator.simulate_prop_firm(path, firm, FIRMS[firm], size)
+    breach_day = len(window) + 1
+    if result.violation_date is not None:
+        breach_day = (datetime.strptime(result.violation_date, "%Y-%m-%d") - start.replace(hour=0, minute=0)).days + 1
+    target = get_profit_target(FIRMS[firm], size)
+    min_days = get_min_trading_days(FIRMS[firm])
+    profit = 0.0
+    for day_number, day in enumerate(window, 1):
+        profit += sum(trade.net_pnl for trade in trades_by_day[day])
+        if day_number >= breach_day:
+            return None, True
+        if profit >= target and day_number >= min_days:
+            return day_number, False
+    return None, False
+
+
+def test_pass_probability_matches_reference_paths():
+    trades = synthetic_trades(2, n=120)
+    trades_by_day: dict[str, list] = {}
+    for trade in trades:
+        trades_by_day.setdefault(trade.timestamp.strftime("%Y-%m-%d"), []).append(trade)
+    trades_by_day = list(trades_by_day.values())
+    combos = [(firm, size) for firm in FIRMS for size in ACCOUNT_SIZES]
+    config = PassProbabilityConfig(paths=BLOCK_PATHS + 36, window_days=12, block_days=3, seed=9)
+
+    odds = estimate_pass_probability(
+        validator.trade_series(trades), compile_rules({"firms": FIRMS}).limits(combos), config
+    )
+
+    windows = drawn_windows(len(trades_by_day), config)
+    totals = {"passed": 0, "breached": 0}
+    for result, (firm, size) in zip(odds, combos):
+        outcomes = [reference_outcome(trades_by_day, window, firm, size) for window in windows]
+        pass_days = [day for day, _ in outcomes if day is not None]
+        breaches = sum(breached for _, breached in outcomes)
+        totals["passed"] += len(pass_days)
+        totals["breached"] += breaches
+        assert result.pass_probability == pytest.approx(len(pass_days) / config.paths), (firm, size)
+        assert result.breach_probability == pytest.approx(breaches / config.paths), (firm, size)
+        expected_days = sum(pass_days) / len(pass_days) if pass_days else None
+        assert result.expected_days_to_pass == pytest.approx(expected_days), (firm, size)
+    assert totals["passed"] and totals["breached"]
+
+
+# Shapes of the rules the get_* lookups accept, beyond those in FIRMS.
+LOOKUP_FIRMS = {
+    **FIRMS,
+    "target_values": {
+        "evaluation": {"profit_target": {"values": {"50000": 3000, "100000": None}, "percent": 8}},
+        "risk_limits": {
+            "drawdown": {"type": "trailing_eod", "percent": {"default": 3}},
+            "daily_loss_limit": {"values": {"50000": 1000, "100000": None}},
+        },
+    },
+    "bare_percent_target": {
+        "evaluation": {"profit_target": 8, "min_trading_days": {"days": 3}},
+        "risk_limits": {"drawdown": {"type": "static", "percent": 0.1}, "daily_loss_limit": {"percent": 0.03}},
+        "funded": {"consistency_rule": {"enabled": True, "max_single_day_percent": 40}},
+    },
+    "defaults": {},
+}
+
+
+def test_compiled_rules_match_the_lookups():
+    compiled = compile_rules({"firms": LOOKUP_FIRMS})
+
+    assert [firm.name for firm in compiled.firms] == list(LOOKUP_FIRMS)
+    for name, rules in LOOKUP_FIRMS.items():
+        firm = compiled.firm(name)
+        dd_type, dd_limit = get_drawdown_type(rules)
+        assert (firm.drawdown_type, firm.drawdown_limit) == (dd_type, dd_limit), name
+        assert firm.consistency == get_consistency_rule(rules), name
+        assert firm.min_trading_days == get_min_trading_days(rules), name
+        for size in (*ACCOUNT_SIZES, 150000):
+            account = firm.account(size)
+            assert account.drawdown_limit_abs == (size * dd_limit if dd_limit < 1 else dd_limit), (name, size)
+            assert account.daily_loss_limit == get_daily_loss_limit(rules, size), (name, size)
+            assert account.profit_target == get_profit_target(rules, size), (name, size)
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"firms": FIRMS}))
+    return path
+
+
+def test_rules_cache_hits_until_the_file_changes(rules_file, caplog):
+    caplog.set_level(logging.DEBUG, logger="lib.prop_firm")
+
+    first = load_compiled_rules(rules_file)
+    second = load_compiled_rules(rules_file)
+    assert second == first
+    assert [r.message.split(" for ")[0] for r in caplog.records] == [
+        "Prop firm rules cache miss", "Prop firm rules cache hit",
+    ]
+
+    changed = {**FIRMS, "static_pct": {**FIRMS["static_pct"], "evaluation": {"profit_target": 4000}}}
+    rules_file.write_text(json.dumps({"firms": changed}))
+    caplog.clear()
+    third = load_compiled_rules(rules_file)
+
+    assert "cache miss" in caplog.records[-1].message
+    assert third.sha256 != first.sha256
+    assert third.firm("static_pct").account(50000).profit_target == 4000.0
+    assert len(list(rules_cache_dir().glob("*.pickle"))) == 2
+
+
+def test_unreadable_cache_entry_is_rebuilt(rules_file):
+    expected = load_compiled_rules(rules_file)
+    (entry,) = rules_cache_dir().glob("*.pickle")
+    entry.write_bytes(b"not a pickle")
+
+    assert load_compiled_rules(rules_file) == expected
+    assert load_compiled_rules(rules_file) == expected
+
+
+def test_invalid_rules_are_refused_and_not_cached(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"firms": {"bad": {"risk_limits": {"drawdown": {"percent": "five"}}}}}))
+
+    with pytest.raises(ValueError, match="bad.*drawdown.percent"):
+        load_compiled_rules(path)
+    assert not list(rules_cache_dir().glob("*.pickle"))
+    with pytest.raises(FileNotFoundError):
+        load_compiled_rules(tmp_path / "missing.json")
@@ -0,0 +1,78 @@
+"""Round trips of backtest results through every output format."""
+
+from __future__ import annotations
+
+import json
+import math
+
+import pytest
+
+from lib.backtest_runner import DEFAULT_FUTURES_COST, run_backtest
+from lib.result_io import (
+    OUTPUT_FORMATS,
+    SIDECAR_SUFFIX,
+    load_result,
+    read_result_summary,
+    sidecar_path,
+    write_result,
+)
+
+from conftest import SAMPLE_STRATEGY
+
+
+def canonical(obj) -> str:
+    # NaN never equals itself; compare the stdlib encoding instead.
+    return json.dumps(obj, sort_keys=True)
+
+
+@pytest.fixture
+def results(bars_csv) -> dict:
+    results = run_backtest(str(SAMPLE_STRATEGY), str(bars_csv), DEFAULT_FUTURES_COST, use_cache=False)
+    results["metrics"].update(profit_factor=math.inf, sortino_ratio=-math.inf, calmar_ratio=math.nan)
+    results["trade_log"][0]["mfe"] = math.nan
+    results["note"] = None
+    return results
+
+
+@pytest.mark.parametrize("fmt", OUTPUT_FORMATS)
+@pytest.mark.parametrize("name", ["result.json", "result.npz"])
+def test_round_trip(tmp_path, results, fmt, name):
+    path = tmp_path / name
+    written = write_result(results, path, fmt=fmt)
+
+    assert written[-1] == path
+    assert canonical(load_result(path)) == canonical(results)
+
+
+@pytest.mark.parametrize("fmt", OUTPUT_FORMATS)
+def test_summary_drops_row_sections(tmp_path, results, fmt):
+    path = tmp_path / "result.json"
+    write_result(results, path, fmt=fmt)
+
+    summary = read_result_summary(path)
+    assert not {"trade_log", "equity_curve", "daily_returns"} & set(summary)
+    assert summary["metrics"]["profit_factor"] == math.inf
+    assert summary["metrics"]["sortino_ratio"] == -math.inf
+    assert math.isnan(summary["metrics"]["calmar_ratio"])
+
+
+def test_npz_sidecar_never_overwrites_the_summary(tmp_path, results):
+    path = tmp_path / "result.npz"
+    written = write_result(results, path, fmt="npz")
+
+    assert sidecar_path(path) == tmp_path / f"result{SIDECAR_SUFFIX}"
+    assert sorted(written) == sorted([path, sidecar_path(path)])
+    assert canonical(read_result_summary(path)["metrics"]) == canonical(results["metrics"])
+
+
+def test_legacy_sidecar_name_is_still_read(tmp_path, results):
+    path = tmp_path / "result.json"
+    write_result(results, path, fmt="npz")
+    sidecar_path(path).rename(tmp_path / "result.npz")
+
+    assert canonical(load_result(path)) == canonical(results)
+
+
+def test_unknown_format_is_rejected(tmp_path, results):
+    with pytest.raises(ValueError, match="Unknown result format"):
+        write_result(results, tmp_path / "result.json", fmt="yaml")
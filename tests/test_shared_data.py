@@ -0,0 +1,88 @@
+"""Shared-memory frames: round trips, read-only columns and block cleanup."""
+
+from __future__ import annotations
+
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.backtest_runner import DEFAULT_FUTURES_COST, expand_param_grid, load_data, run_param_sweep
+from lib.shared_data import attach_frame, share_frame
+
+from conftest import SAMPLE_STRATEGY
+
+SHM_DIR = "/dev/shm"
+
+
+def shm_entries() -> set[str]:
+    return set(os.listdir(SHM_DIR)) if os.path.isdir(SHM_DIR) else set()
+
+
+@pytest.fixture
+def frame(bars) -> pd.DataFrame:
+    df = bars.head(500).copy()
+    df["timestamp"] = df["timestamp"].dt.tz_convert("America/Chicago")
+    df["naive"] = df["timestamp"].dt.tz_localize(None)
+    df["count"] = np.arange(len(df), dtype=np.int32)
+    df["symbol"] = "ES"
+    return df
+
+
+@pytest.fixture
+def attached(frame):
+    with share_frame(frame) as shared:
+        attached = attach_frame(shared.handle)
+        yield attached
+        for block in attached.blocks:
+            block.close()
+
+
+def test_round_trip_preserves_columns_and_dtypes(frame, attached):
+    pd.testing.assert_frame_equal(attached.df, frame)
+    assert str(attached.df["timestamp"].dtype.tz) == "America/Chicago"
+    assert attached.df["count"].dtype == np.int32
+
+
+def test_shared_columns_are_read_only(attached):
+    values = attached.df["close"].to_numpy()
+
+    assert not values.flags.writeable
+    with pytest.raises(ValueError):
+        values[0] = 0.0
+
+
+def test_new_columns_can_be_added(attached):
+    df = attached.df.copy(deep=False)
+    df["sma"] = df["close"].rolling(5).mean()
+
+    assert df["sma"].notna().sum() == len(df) - 4
+
+
+def test_close_unlinks_every_block(frame):
+    shared = share_frame(frame)
+    names = [col.shm_name for col in shared.handle.columns]
+    assert names
+
+    shared.close()
+
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_shared_memory_sweep_matches_and_cleans_up(bars_csv):
+    df = load_data(str(bars_csv), use_cache=False)
+    combos = expand_param_grid({"fast_period": [5, 10], "slow_period": [20, 30]})
+    before = shm_entries()
+
+    shared = run_param_sweep(
+        str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, combos, workers=2, use_shared_memory=True
+    )
+    copied = run_param_sweep(str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, combos, workers=2)
+
+    assert shared["failed_combos"] == 0
+    assert shared["results"] == copied["results"]
+    assert shm_entries() <= before
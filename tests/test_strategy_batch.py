@@ -0,0 +1,70 @@
+"""Multi-strategy batches over one dataset."""
+
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+from lib.backtest_runner import DEFAULT_FUTURES_COST, load_data, run_backtest, run_strategy_batch
+from lib.indicator_cache import IndicatorCache
+
+from conftest import SAMPLE_STRATEGY
+
+
+@pytest.fixture
+def strategies(tmp_path) -> list[str]:
+    """The sample strategy, an identical copy, a variant whose "sma" is a rolling max, and a broken one."""
+    source = SAMPLE_STRATEGY.read_text()
+    paths = {
+        "a.py": source,
+        "b.py": source.replace(".rolling(p[\"fast_period\"]).mean()", ".rolling(p[\"fast_period\"]).max()"),
+        "c.py": source,
+        "broken.py": source.replace("def signals(self, df):", "def signals(self, df):\n        raise RuntimeError('boom')"),
+    }
+    assert paths["b.py"] != source
+    for name, text in paths.items():
+        (tmp_path / name).write_text(text)
+    return [str(tmp_path / name) for name in paths]
+
+
+@pytest.fixture
+def df(bars_csv) -> pd.DataFrame:
+    return load_data(str(bars_csv), use_cache=False)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_matches_single_backtests_with_a_shared_cache(strategies, df, bars_csv, workers):
+    summary = run_strategy_batch(
+        strategies, df, DEFAULT_FUTURES_COST, str(bars_csv), workers=workers, indicator_cache=IndicatorCache()
+    )
+
+    assert summary["failed_strategies"] == 1
+    metrics = [result["metrics"] for result in summary["results"]]  # a, b, c; the broken one has none
+    for path, got in zip(strategies, metrics):
+        expected = run_backtest(path, str(bars_csv), DEFAULT_FUTURES_COST, use_cache=False)
+        assert got == pytest.approx(expected["metrics"]), path
+    assert metrics[0] == metrics[2]
+    assert metrics[0] != metrics[1]
+
+
+def test_broken_strategy_is_a_failed_row(strategies, df):
+    summary = run_strategy_batch(strategies, df, DEFAULT_FUTURES_COST, workers=1)
+
+    (failed,) = [row for row in summary["leaderboard"] if "error" in row]
+    assert failed["strategy_path"] == strategies[3]
+    assert "boom" in failed["error"]
+    assert failed["rank"] == len(strategies)
+
+
+def test_output_dir_gets_one_file_per_strategy(strategies, df, tmp_path):
+    out = tmp_path / "batch"
+
+    summary = run_strategy_batch(strategies[:2], df, DEFAULT_FUTURES_COST, workers=1, output_dir=str(out))
+
+    assert sorted(p.name for p in out.iterdir()) == ["a.json", "b.json"]
+    assert "results" not in summary
+    for row in summary["leaderboard"]:
+        written = json.loads((out / row["output"]).read_text())
+        assert written["metrics"]["sharpe_ratio"] == row["sharpe_ratio"]
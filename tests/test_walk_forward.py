@@ -0,0 +1,92 @@
+"""Walk-forward: the strict look-ahead check, parallel folds and ordered fold output."""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from lib.backtest_runner import DEFAULT_FUTURES_COST, load_data, run_walk_forward
+
+from conftest import SAMPLE_STRATEGY
+
+WF_CONFIG = {"train_bars": 300, "test_bars": 100, "step_bars": 100}
+
+PEEKING_STRATEGY = '''
+class Strategy:
+    name = "Peeking"
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def warmup_bars(self):
+        return 10
+
+    def indicators(self, df):
+        df["next_close"] = df["close"].shift(-1)
+        return df
+
+    def signals(self, df):
+        df["signal"] = (df["next_close"] > df["close"]).astype(int)
+        return df
+'''
+
+
+@pytest.fixture
+def df(bars_csv) -> pd.DataFrame:
+    return load_data(str(bars_csv), use_cache=False)
+
+
+def test_strict_mode_passes_for_a_causal_strategy(df):
+    strict = run_walk_forward(str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, WF_CONFIG, strict=True)
+    relaxed = run_walk_forward(str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, WF_CONFIG)
+
+    assert strict["leakage_check"] == "passed"
+    assert relaxed["leakage_check"] == "skipped"
+    assert strict["total_folds"] == (len(df) - 400) // 100 + 1
+    assert strict["folds"] == relaxed["folds"]
+
+
+def test_strict_mode_catches_look_ahead(df, tmp_path):
+    strategy = tmp_path / "peeking.py"
+    strategy.write_text(PEEKING_STRATEGY)
+
+    with pytest.raises(ValueError, match="Look-ahead leakage in fold 1 train: column 'next_close'"):
+        run_walk_forward(str(strategy), df, DEFAULT_FUTURES_COST, WF_CONFIG, strict=True)
+
+
+def test_strict_mode_catches_a_short_warmup(df):
+    config = {**WF_CONFIG, "warmup_bars": 5}
+
+    with pytest.raises(ValueError, match="Declare a larger warmup_bars"):
+        run_walk_forward(str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, config, strict=True)
+
+
+@pytest.mark.parametrize("strict", [False, True])
+@pytest.mark.parametrize("use_shared_memory", [False, True])
+def test_parallel_folds_match_sequential(df, strict, use_shared_memory):
+    before = set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+    sequential = run_walk_forward(str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, WF_CONFIG, strict=strict)
+    parallel = run_walk_forward(
+        str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, WF_CONFIG, strict=strict, jobs=2,
+        use_shared_memory=use_shared_memory,
+    )
+
+    assert parallel == sequential
+    if os.path.isdir("/dev/shm"):
+        assert set(os.listdir("/dev/shm")) <= before
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_fold_stream_is_in_fold_order(df, jobs):
+    stream = io.StringIO()
+
+    results = run_walk_forward(str(SAMPLE_STRATEGY), df, DEFAULT_FUTURES_COST, WF_CONFIG, jobs=jobs, fold_stream=stream)
+
+    streamed = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [fold["fold"] for fold in streamed] == list(range(1, results["total_folds"] + 1))
+    assert streamed == json.loads(json.dumps(results["folds"]))